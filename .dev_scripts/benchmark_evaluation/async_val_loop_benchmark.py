@@ -0,0 +1,158 @@
+import argparse
+import os.path as osp
+import sys
+import time
+
+import torch
+import torch.nn as nn
+from rich.console import Console
+from rich.table import Table
+from torch.utils.data import DataLoader
+
+# yapf: disable
+sys.path.append(osp.abspath(osp.join(__file__, '../../..')))  # isort:skip  # noqa
+
+from mmgen.core import GenDataSample, GenEvaluator, PixelData  # isort:skip  # noqa
+from mmgen.core.evaluation.metrics import GenerativeMetric  # isort:skip  # noqa
+from mmgen.core.runners import GenValLoop  # isort:skip  # noqa
+# yapf: enable
+
+console = Console()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Benchmark the overlap of generation and metric '
+        'processing in GenValLoop on CPU')
+    parser.add_argument(
+        '--num-images', type=int, default=2048, help='number of images')
+    parser.add_argument(
+        '--batch-size', type=int, default=32, help='batch size')
+    parser.add_argument(
+        '--resolution', type=int, default=64, help='resolution of images')
+    parser.add_argument(
+        '--queue-size', type=int, default=2, help='queue size of async mode')
+    parser.add_argument(
+        '--num-threads',
+        type=int,
+        default=None,
+        help='number of intra-op threads of torch')
+    parser.add_argument(
+        '--repeat', type=int, default=3, help='number of repeated runs')
+    return parser.parse_args()
+
+
+def conv_stack(in_channels, out_channels, num_layers):
+    layers = []
+    for idx in range(num_layers):
+        layers += [
+            nn.Conv2d(in_channels if idx == 0 else 64, 64, 3, padding=1),
+            nn.ReLU()
+        ]
+    layers.append(nn.Conv2d(64, out_channels, 3, padding=1))
+    return nn.Sequential(*layers)
+
+
+class ToyGAN(nn.Module):
+    """Generator producing images from noise maps with convolutions."""
+
+    def __init__(self, resolution):
+        super().__init__()
+        self.resolution = resolution
+        self.generator = conv_stack(8, 3, 4)
+        self.data_preprocessor = nn.Identity()
+        self.data_preprocessor.device = 'cpu'
+
+    def val_step(self, data):
+        noise = torch.randn(data['num_batches'], 8, self.resolution,
+                            self.resolution)
+        images = torch.tanh(self.generator(noise))
+        return [GenDataSample(fake_img=PixelData(data=img)) for img in images]
+
+
+class ToyFeatureMetric(GenerativeMetric):
+    """Metric extracting features with a small CNN and keeping per-image
+    statistics, similar to inception based metrics."""
+
+    name = 'Toy'
+
+    def __init__(self, fake_nums):
+        super().__init__(fake_nums, sample_model='orig')
+        self.extractor = conv_stack(3, 64, 3)
+
+    def process(self, data_batch, predictions):
+        if len(self.fake_results) >= self.fake_nums_per_device:
+            return
+        images = torch.stack(
+            [pred['fake_img']['data'] for pred in predictions])
+        feat = self.extractor(images).mean(dim=(2, 3))
+        # per-image bookkeeping on the host
+        for image_feat in feat.cpu().numpy():
+            self.fake_results.append(float((image_feat**2).sum()))
+
+    def compute_metrics(self, results):
+        return dict(score=sum(results) / len(results))
+
+
+class DummyRunner:
+
+    def __init__(self, model):
+        self.model = model
+        self.metrics = None
+
+    def call_hook(self, name, **kwargs):
+        if name == 'after_val_epoch':
+            self.metrics = kwargs['metrics']
+
+    def build_evaluator(self, evaluator):
+        return evaluator
+
+
+def run_loop(args, async_process):
+    torch.manual_seed(0)
+    model = ToyGAN(args.resolution).eval()
+    metric = ToyFeatureMetric(args.num_images)
+    runner = DummyRunner(model)
+    dataloader = DataLoader(list(range(args.num_images)), args.batch_size)
+    loop = GenValLoop(
+        runner,
+        dataloader,
+        GenEvaluator([metric]),
+        async_process=async_process,
+        queue_size=args.queue_size)
+    start = time.perf_counter()
+    loop.run()
+    cost = time.perf_counter() - start
+    return runner.metrics['score'], cost
+
+
+def main():
+    args = parse_args()
+    if args.num_threads is not None:
+        torch.set_num_threads(args.num_threads)
+
+    table = Table(
+        title=f'GenValLoop on CPU ({args.num_images} images, batch size '
+        f'{args.batch_size}, {torch.get_num_threads()} threads, best of '
+        f'{args.repeat} runs)')
+    table.add_column('Mode')
+    table.add_column('Score')
+    table.add_column('Time (s)')
+    table.add_column('Speedup')
+    sync_cost = None
+    for async_process in [False, True]:
+        costs, scores = [], []
+        for _ in range(args.repeat):
+            score, cost = run_loop(args, async_process)
+            costs.append(cost)
+            scores.append(score)
+        cost = min(costs)
+        if sync_cost is None:
+            sync_cost = cost
+        table.add_row('async' if async_process else 'sync', f'{scores[0]:.6f}',
+                      f'{cost:.3f}', f'{sync_cost / cost:.2f}x')
+    console.print(table)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+import argparse
+import os.path as osp
+import sys
+import time
+
+import numpy as np
+from rich.console import Console
+from rich.table import Table
+
+# yapf: disable
+sys.path.append(osp.abspath(osp.join(__file__, '../../..')))  # isort:skip  # noqa
+
+from mmgen.core.evaluation.metric_utils import (  # isort:skip  # noqa
+    frechet_distance_sym, sqrtm_psd)
+from mmgen.core.evaluation.metrics import FrechetInceptionDistance  # isort:skip  # noqa
+# yapf: enable
+
+console = Console()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Benchmark the solvers of the Frechet distance')
+    parser.add_argument(
+        '--dim', type=int, default=2048, help='dimension of the features')
+    parser.add_argument(
+        '--num-samples',
+        type=int,
+        default=10000,
+        help='number of samples used to build the covariances')
+    parser.add_argument(
+        '--repeat', type=int, default=3, help='number of repeated runs')
+    parser.add_argument('--seed', type=int, default=0, help='random seed')
+    return parser.parse_args()
+
+
+def random_gaussian_stats(rng, num_samples, dim):
+    # correlated features, similar to inception features
+    mixing = rng.randn(dim, dim) / np.sqrt(dim)
+    feat = rng.randn(num_samples, dim) @ mixing + rng.rand(dim)
+    return np.mean(feat, 0), np.cov(feat, rowvar=False)
+
+
+def timeit(func, repeat):
+    costs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        costs.append(time.perf_counter() - start)
+    return result, min(costs)
+
+
+def main():
+    args = parse_args()
+    rng = np.random.RandomState(args.seed)
+    real_mean, real_cov = random_gaussian_stats(rng, args.num_samples,
+                                                args.dim)
+    fake_mean, fake_cov = random_gaussian_stats(rng, args.num_samples,
+                                                args.dim)
+
+    real_cov_sqrt, factor_cost = timeit(lambda: sqrtm_psd(real_cov),
+                                        args.repeat)
+    solvers = {
+        'scipy':
+        lambda: FrechetInceptionDistance._calc_fid(fake_mean, fake_cov,
+                                                   real_mean, real_cov),
+        'eigh':
+        lambda: frechet_distance_sym(fake_mean, fake_cov, real_mean, real_cov),
+        'eigh (cached real)':
+        lambda: frechet_distance_sym(fake_mean, fake_cov, real_mean, real_cov,
+                                     real_cov_sqrt)
+    }
+
+    table = Table(title=f'Frechet distance solvers (dim={args.dim}, '
+                  f'best of {args.repeat} runs, real factorization '
+                  f'{factor_cost:.3f}s)')
+    table.add_column('Solver')
+    table.add_column('FID')
+    table.add_column('Abs diff to scipy')
+    table.add_column('Time (s)')
+    scipy_fid = None
+    for name, solver in solvers.items():
+        (fid, _, _), cost = timeit(solver, args.repeat)
+        if scipy_fid is None:
+            scipy_fid = fid
+        table.add_row(name, f'{fid:.6f}', f'{abs(fid - scipy_fid):.2e}',
+                      f'{cost:.3f}')
+    console.print(table)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+import argparse
+import os
+import os.path as osp
+import sys
+import time
+
+import numpy as np
+import torch
+from PIL import Image
+from rich.console import Console
+from rich.table import Table
+
+# yapf: disable
+sys.path.append(osp.abspath(osp.join(__file__, '../../..')))  # isort:skip  # noqa
+
+from mmgen.core.evaluation.inception_utils import load_inception  # isort:skip  # noqa
+from mmgen.core.evaluation.metric_utils import frechet_distance_sym  # isort:skip  # noqa
+# yapf: enable
+
+console = Console()
+
+IMG_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Compare the precision and speed of Inception backends '
+        'for FID on CPU')
+    parser.add_argument(
+        '--inception-path',
+        type=str,
+        default=None,
+        help='path to Tero\'s Inception, download it if not given')
+    parser.add_argument(
+        '--data-root',
+        type=str,
+        default=None,
+        help='directory of real images. Random images are used if not given')
+    parser.add_argument(
+        '--num-images', type=int, default=1000, help='number of images')
+    parser.add_argument(
+        '--resolution', type=int, default=256, help='resolution of images')
+    parser.add_argument(
+        '--noise-std',
+        type=float,
+        default=20,
+        help='std of the noise added to images to get the fake images')
+    parser.add_argument(
+        '--batch-size', type=int, default=50, help='batch size')
+    parser.add_argument(
+        '--num-threads',
+        type=int,
+        default=None,
+        help='number of intra-op threads of torch')
+    parser.add_argument('--seed', type=int, default=0, help='random seed')
+    return parser.parse_args()
+
+
+def load_images(args, rng):
+    """Load real images in uint8 NCHW and get fake images by adding
+    noise."""
+    if args.data_root is None:
+        reals = rng.randint(
+            0,
+            256,
+            size=(args.num_images, 3, args.resolution, args.resolution),
+            dtype=np.uint8)
+    else:
+        files = []
+        for root, _, names in os.walk(args.data_root):
+            files += [
+                osp.join(root, name) for name in sorted(names)
+                if name.lower().endswith(IMG_EXTENSIONS)
+            ]
+        reals = []
+        for path in sorted(files)[:args.num_images]:
+            img = Image.open(path).convert('RGB').resize(
+                (args.resolution, args.resolution), Image.BICUBIC)
+            reals.append(np.asarray(img).transpose(2, 0, 1))
+        reals = np.stack(reals)
+    fakes = reals + rng.randn(*reals.shape) * args.noise_std
+    return reals, np.clip(fakes, 0, 255).astype(np.uint8)
+
+
+@torch.no_grad()
+def extract(model, images, batch_size):
+    feats = []
+    for idx in range(0, images.shape[0], batch_size):
+        batch = torch.from_numpy(images[idx:idx + batch_size])
+        feats.append(model(batch, return_features=True).numpy())
+    return np.concatenate(feats).astype(np.float64)
+
+
+def main():
+    args = parse_args()
+    if args.num_threads is not None:
+        torch.set_num_threads(args.num_threads)
+    rng = np.random.RandomState(args.seed)
+    reals, fakes = load_images(args, rng)
+
+    backends = {
+        'StyleGAN (reference)': dict(type='StyleGAN', cpu_optimize=False),
+        'StyleGAN-Frozen': dict(type='StyleGAN', cpu_optimize=True)
+    }
+    table = Table(
+        title=f'Inception backends for FID ({reals.shape[0]} images, '
+        f'{torch.get_num_threads()} threads)')
+    table.add_column('Backend')
+    table.add_column('FID')
+    table.add_column('Abs diff')
+    table.add_column('Rel diff')
+    table.add_column('Max feat diff')
+    table.add_column('Images / s')
+
+    ref_fid, ref_feats = None, None
+    for name, inception_args in backends.items():
+        model, _ = load_inception(
+            dict(inception_path=args.inception_path, **inception_args), 'FID')
+        # warm up, optimized graphs are specialized at the first runs
+        extract(model, reals[:args.batch_size], args.batch_size)
+        start = time.perf_counter()
+        real_feats = extract(model, reals, args.batch_size)
+        fake_feats = extract(model, fakes, args.batch_size)
+        speed = 2 * reals.shape[0] / (time.perf_counter() - start)
+        fid, _, _ = frechet_distance_sym(
+            np.mean(fake_feats, 0), np.cov(fake_feats, rowvar=False),
+            np.mean(real_feats, 0), np.cov(real_feats, rowvar=False))
+        if ref_fid is None:
+            ref_fid, ref_feats = fid, real_feats
+        table.add_row(name, f'{fid:.4f}', f'{abs(fid - ref_fid):.2e}',
+                      f'{abs(fid - ref_fid) / max(ref_fid, 1e-12):.2e}',
+                      f'{np.abs(real_feats - ref_feats).max():.2e}',
+                      f'{speed:.1f}')
+    console.print(table)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,383 @@
+import argparse
+import json
+import os.path as osp
+import resource
+import sys
+import time
+from tempfile import TemporaryDirectory
+from unittest.mock import patch
+
+import numpy as np
+import torch
+import torch.multiprocessing as mp
+import torch.nn as nn
+import torch.nn.functional as F
+from mmengine.data import pseudo_collate
+from PIL import Image
+from rich.console import Console
+from rich.table import Table
+from torch.utils.data import DataLoader
+
+# yapf: disable
+sys.path.append(osp.abspath(osp.join(__file__, '../../..')))  # isort:skip  # noqa
+
+from mmgen.core import GenEvaluator  # isort:skip  # noqa
+from mmgen.core.evaluation import inception_utils  # isort:skip  # noqa
+from mmgen.core.evaluation.metrics import FrechetInceptionDistance, InceptionScore, PrecisionAndRecall  # isort:skip  # noqa
+from mmgen.datasets import PackGenInputs, UnconditionalImageDataset  # isort:skip  # noqa
+from mmgen.models import LSGAN, DCGANGenerator, GANDataPreprocessor, StyleGAN3  # isort:skip  # noqa
+from mmgen.models import StyleGANv2Generator, StyleGANv3Generator  # isort:skip  # noqa
+from mmgen.registry import METRICS  # isort:skip  # noqa
+# yapf: enable
+
+console = Console()
+
+PHASES = ('prepare', 'generate', 'process', 'collect', 'compute')
+
+# metric config and the generator to drive it. `{n}` and `{r}` are replaced
+# by the number of images and the resolution.
+BENCHMARKS = {
+    'FID':
+    dict(metric=dict(type='FID', fake_nums='{n}'), model='dcgan'),
+    'KID':
+    dict(
+        metric=dict(type='KID', fake_nums='{n}', num_subsets=10),
+        model='dcgan'),
+    'FID-Infinity':
+    dict(metric=dict(type='FID-Infinity', fake_nums='{n}'), model='dcgan'),
+    'IS':
+    dict(
+        metric=dict(type='IS', fake_nums='{n}', sample_model='orig'),
+        model='dcgan'),
+    'SWD':
+    dict(
+        metric=dict(
+            type='SWD',
+            fake_nums='{n}',
+            image_shape=(3, '{r}', '{r}'),
+            sample_model='orig'),
+        model='dcgan'),
+    'MS_SSIM':
+    dict(
+        metric=dict(type='MS_SSIM', fake_nums='{n}', sample_model='orig'),
+        model='dcgan'),
+    'PR':
+    dict(
+        metric=dict(
+            type='PR', fake_nums='{n}', sample_model='orig', auto_save=False),
+        model='dcgan'),
+    'PPL':
+    dict(
+        metric=dict(
+            type='PPL',
+            fake_nums='{n}',
+            space='W',
+            sample_model='orig',
+            latent_dim=8),
+        model='stylegan2'),
+    'Equivariance':
+    dict(
+        metric=dict(
+            type='Equivariance',
+            fake_nums='{n}',
+            sample_mode='orig',
+            eq_cfg=dict(
+                compute_eqt_int=True, compute_eqt_frac=True,
+                compute_eqr=True)),
+        model='stylegan3'),
+}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Benchmark the speed and memory of metrics on CPU with '
+        'synthetic generators and tiny backbones')
+    parser.add_argument(
+        '--metrics',
+        type=str,
+        nargs='+',
+        default=list(BENCHMARKS),
+        choices=list(BENCHMARKS),
+        help='metrics to benchmark')
+    parser.add_argument(
+        '--num-images', type=int, default=256, help='number of images')
+    parser.add_argument(
+        '--batch-size', type=int, default=16, help='batch size')
+    parser.add_argument(
+        '--resolution', type=int, default=64, help='resolution of images')
+    parser.add_argument(
+        '--num-threads',
+        type=int,
+        default=None,
+        help='number of intra-op threads of torch')
+    parser.add_argument(
+        '--repeat',
+        type=int,
+        default=1,
+        help='number of repeated runs, the fastest one is reported')
+    parser.add_argument(
+        '--out', type=str, default=None, help='path to save the json results')
+    parser.add_argument(
+        '--baseline',
+        type=str,
+        default=None,
+        help='json results of a previous run to compare with')
+    parser.add_argument(
+        '--tolerance',
+        type=float,
+        default=0.1,
+        help='relative slowdown against the baseline regarded as regression')
+    parser.add_argument('--seed', type=int, default=0, help='random seed')
+    return parser.parse_args()
+
+
+class TinyBackbone(nn.Module):
+    """A small CNN standing in for Inception and VGG. It takes uint8 images
+    like Tero's script modules."""
+
+    def __init__(self, feat_dim, num_classes=1008):
+        super().__init__()
+        self.features = nn.Sequential(
+            nn.Conv2d(3, 32, 3, stride=2, padding=1), nn.ReLU(),
+            nn.Conv2d(32, 64, 3, stride=2, padding=1), nn.ReLU(),
+            nn.AdaptiveAvgPool2d(1), nn.Flatten(), nn.Linear(64, feat_dim))
+        self.fc = nn.Linear(feat_dim, num_classes)
+
+    def forward(self, x, return_features=False, no_output_bias=False):
+        feat = self.features(x.float() / 127.5 - 1)
+        if return_features:
+            return feat
+        return F.softmax(self.fc(feat), dim=1)
+
+
+class TinyPercept(nn.Module):
+    """A small CNN standing in for the LPIPS network of PPL."""
+
+    def __init__(self):
+        super().__init__()
+        self.features = nn.Sequential(
+            nn.Conv2d(3, 16, 3, padding=1), nn.ReLU(),
+            nn.Conv2d(16, 16, 3, stride=2, padding=1))
+
+    def forward(self, img0, img1):
+        feat0 = F.normalize(self.features(img0), dim=1)
+        feat1 = F.normalize(self.features(img1), dim=1)
+        return (feat0 - feat1).square().sum(1).mean(dim=(1, 2))
+
+
+def build_model(name, resolution):
+    data_preprocessor = GANDataPreprocessor()
+    if name == 'dcgan':
+        generator = DCGANGenerator(resolution, noise_size=16, base_channels=64)
+        return LSGAN(generator, data_preprocessor=data_preprocessor)
+    if name == 'stylegan2':
+        generator = StyleGANv2Generator(resolution, 8)
+        return LSGAN(generator, data_preprocessor=data_preprocessor)
+    generator = StyleGANv3Generator(resolution, 8, 3, noise_size=8)
+    return StyleGAN3(generator, data_preprocessor=data_preprocessor)
+
+
+def build_metric(cfg, args):
+
+    def fill(value):
+        if isinstance(value, dict):
+            return {k: fill(v) for k, v in value.items()}
+        if isinstance(value, (list, tuple)):
+            return type(value)(fill(v) for v in value)
+        if value == '{n}':
+            return args.num_images
+        if value == '{r}':
+            return args.resolution
+        return value
+
+    inception = (TinyBackbone(2048), 'StyleGAN')
+    vgg = (TinyBackbone(4096), True)
+    with patch.object(FrechetInceptionDistance, '_load_inception',
+                      lambda *_: inception), \
+            patch.object(InceptionScore, '_load_inception',
+                         lambda *_: inception), \
+            patch.object(PrecisionAndRecall, '_load_vgg', lambda *_: vgg):
+        metric = METRICS.build(fill(cfg))
+    if cfg['type'] == 'PPL':
+        metric.percept = TinyPercept()
+    return metric
+
+
+def save_images(data_root, args):
+    rng = np.random.RandomState(args.seed)
+    for idx in range(args.num_images):
+        img = rng.randint(
+            0, 256, size=(args.resolution, args.resolution, 3), dtype=np.uint8)
+        Image.fromarray(img).save(osp.join(data_root, f'{idx:06d}.png'))
+
+
+def get_peak_rss():
+    """Get the peak resident set size of the process in MB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # bytes on macOS, kilobytes on Linux
+    return peak / 1024**2 if sys.platform == 'darwin' else peak / 1024
+
+
+@torch.no_grad()
+def run_metric(name, args, data_root):
+    """Run one metric as :class:`GenValLoop` does, and record the time of
+    each phase."""
+    if args.num_threads is not None:
+        torch.set_num_threads(args.num_threads)
+    torch.manual_seed(args.seed)
+    benchmark = BENCHMARKS[name]
+    model = build_model(benchmark['model'], args.resolution).eval()
+    metric = build_metric(benchmark['metric'], args)
+    pipeline = [
+        dict(type='mmgen.LoadImageFromFile', key='img'),
+        PackGenInputs(meta_keys=[])
+    ]
+    dataset = UnconditionalImageDataset(data_root, pipeline, test_mode=True)
+    dataloader = DataLoader(
+        dataset, batch_size=args.batch_size, collate_fn=pseudo_collate)
+    evaluator = GenEvaluator([metric])
+
+    timings = dict.fromkeys(PHASES, 0.)
+    compute_metrics = metric.compute_metrics
+
+    def timed_compute_metrics(*args, **kwargs):
+        start = time.perf_counter()
+        results = compute_metrics(*args, **kwargs)
+        timings['compute'] += time.perf_counter() - start
+        return results
+
+    metric.compute_metrics = timed_compute_metrics
+
+    with TemporaryDirectory() as cache_dir:
+        # do not reuse features cached by previous runs
+        inception_utils.MMGEN_CACHE_DIR = cache_dir
+        start = time.perf_counter()
+        evaluator.prepare_metrics(model, dataloader)
+        timings['prepare'] = time.perf_counter() - start
+
+        for metrics, sampler in evaluator.prepare_samplers(model, dataloader):
+            for data in sampler:
+                start = time.perf_counter()
+                outputs = model.val_step(data)
+                timings['generate'] += time.perf_counter() - start
+                start = time.perf_counter()
+                evaluator.process(data, outputs, metrics)
+                timings['process'] += time.perf_counter() - start
+        if hasattr(metric, 'process_pending'):
+            start = time.perf_counter()
+            metric.process_pending()
+            timings['process'] += time.perf_counter() - start
+
+        start = time.perf_counter()
+        results = evaluator.evaluate()
+        timings['collect'] = time.perf_counter() - start - timings['compute']
+
+    total = sum(timings.values())
+    return dict(
+        images_per_sec=args.num_images / max(timings['process'], 1e-12),
+        e2e_images_per_sec=args.num_images / total,
+        peak_rss_mb=get_peak_rss(),
+        timings=dict(total=total, **timings),
+        results={k: float(v)
+                 for k, v in results.items()})
+
+
+def _run_metric_worker(queue, name, args, data_root):
+    try:
+        queue.put(run_metric(name, args, data_root))
+    except Exception as exp:
+        queue.put(exp)
+        raise
+
+
+def run_metric_in_subprocess(name, args, data_root):
+    """Run each metric in a new process, therefore the peak RSS only counts
+    the metric itself."""
+    ctx = mp.get_context('spawn')
+    queue = ctx.Queue()
+    proc = ctx.Process(
+        target=_run_metric_worker, args=(queue, name, args, data_root))
+    proc.start()
+    result = queue.get()
+    proc.join()
+    if isinstance(result, Exception):
+        raise result
+    return result
+
+
+def compare_with_baseline(results, baseline, tolerance):
+    """Get metrics whose throughput drops more than ``tolerance``."""
+    regressions = dict()
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        base_speed = baseline[name]['images_per_sec']
+        ratio = result['images_per_sec'] / base_speed
+        if ratio < 1 - tolerance:
+            regressions[name] = ratio
+    return regressions
+
+
+def main():
+    args = parse_args()
+    baseline = None
+    if args.baseline is not None:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['metrics']
+
+    results = dict()
+    with TemporaryDirectory() as data_root:
+        save_images(data_root, args)
+        for name in args.metrics:
+            runs = [
+                run_metric_in_subprocess(name, args, data_root)
+                for _ in range(args.repeat)
+            ]
+            results[name] = min(runs, key=lambda r: r['timings']['total'])
+            console.print(f'{name}: {results[name]["timings"]["total"]:.2f}s')
+
+    table = Table(
+        title=f'Metrics on CPU ({args.num_images} images, resolution '
+        f'{args.resolution}, batch size {args.batch_size})')
+    table.add_column('Metric')
+    for phase in PHASES:
+        table.add_column(f'{phase} (s)')
+    table.add_column('Images / s')
+    table.add_column('Peak RSS (MB)')
+    if baseline is not None:
+        table.add_column('vs. baseline')
+    for name, result in results.items():
+        row = [name] + [f'{result["timings"][p]:.3f}' for p in PHASES]
+        row += [
+            f'{result["images_per_sec"]:.1f}', f'{result["peak_rss_mb"]:.0f}'
+        ]
+        if baseline is not None and name in baseline:
+            ratio = (
+                result['images_per_sec'] / baseline[name]['images_per_sec'])
+            row.append(f'{ratio:.2f}x')
+        elif baseline is not None:
+            row.append('-')
+        table.add_row(*row)
+    console.print(table)
+
+    if args.out is not None:
+        env = dict(
+            torch=torch.__version__,
+            num_threads=args.num_threads or torch.get_num_threads(),
+            num_images=args.num_images,
+            batch_size=args.batch_size,
+            resolution=args.resolution)
+        with open(args.out, 'w') as f:
+            json.dump(dict(env=env, metrics=results), f, indent=2)
+
+    if baseline is not None:
+        regressions = compare_with_baseline(results, baseline, args.tolerance)
+        for name, ratio in regressions.items():
+            console.print(f'[red]{name} is {1 / ratio:.2f}x slower than the '
+                          'baseline[/red]')
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,14 +1,16 @@
 # Copyright (c) OpenMMLab. All rights reserved.
 from .evaluator import GenEvaluator
 from .metric_utils import slerp
-from .metrics import (Equivariance, FrechetInceptionDistance, InceptionScore,
-                      MultiScaleStructureSimilarity, PerceptualPathLength,
-                      PrecisionAndRecall, SlicedWassersteinDistance, TransFID,
-                      TransIS)
+from .metrics import (Equivariance, FrechetInceptionDistance,
+                      FrechetInceptionDistanceInfinity, InceptionScore,
+                      KernelInceptionDistance, MultiScaleStructureSimilarity,
+                      PerceptualPathLength, PrecisionAndRecall,
+                      SlicedWassersteinDistance, TransFID, TransIS)
 
 __all__ = [
     'slerp', 'InceptionScore', 'FrechetInceptionDistance',
     'MultiScaleStructureSimilarity', 'SlicedWassersteinDistance',
     'GenEvaluator', 'PrecisionAndRecall', 'TransFID', 'TransIS',
-    'Equivariance', 'PerceptualPathLength'
+    'Equivariance', 'PerceptualPathLength', 'KernelInceptionDistance',
+    'FrechetInceptionDistanceInfinity'
 ]
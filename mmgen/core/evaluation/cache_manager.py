@@ -0,0 +1,441 @@
+# Copyright (c) OpenMMLab. All rights reserved.
+import hashlib
+import json
+import os
+import os.path as osp
+import shutil
+import time
+import weakref
+from typing import Any, List, Optional, Sequence, Union
+
+import numpy as np
+import torch.nn as nn
+from mmengine import print_log
+from torch.utils.data.dataset import Dataset
+
+from mmgen.utils import MMGEN_CACHE_DIR
+
+CACHE_INDEX_NAME = 'cache_index.json'
+CACHE_MAX_SIZE_ENV = 'MMGEN_CACHE_MAX_SIZE'
+CACHE_PREFIXES = ('inception_state-', 'vgg_state-', 'gen_samples-')
+# resumable feature chunks and temporary files being written
+CACHE_IN_PROGRESS_MARKS = ('.chunks', '.tmp')
+
+# number of files whose size and mtime are hashed in the file list digest
+FILE_LIST_NUM_CHECKS = 16
+
+_SIZE_UNITS = dict(K=1024, M=1024**2, G=1024**3, T=1024**4)
+
+# digests are costly for large datasets and backbones, compute them once for
+# each object
+_DIGEST_MEMO = dict()
+
+
+def parse_size(size: Union[int, str, None]) -> Optional[int]:
+    """Parse size in bytes from int or str like '512M' and '20G'.
+
+    Args:
+        size (int | str | None): The size to parse.
+
+    Returns:
+        Optional[int]: Size in bytes. Return None if ``size`` is None.
+    """
+    if size is None or isinstance(size, int):
+        return size
+    size = size.strip().upper().rstrip('B')
+    if size and size[-1] in _SIZE_UNITS:
+        return int(float(size[:-1]) * _SIZE_UNITS[size[-1]])
+    return int(size)
+
+
+def get_path_size(path: str) -> int:
+    """Get the size of a file or all files in a directory in bytes."""
+    if osp.isfile(path):
+        return osp.getsize(path)
+    size = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            size += osp.getsize(osp.join(root, name))
+    return size
+
+
+def _memo_digest(obj: Any, tag: str, digest_fn) -> str:
+    """Compute digest of ``obj`` with ``digest_fn`` once. A weak reference
+    is kept to make sure the memo is not reused by another object with the
+    same id."""
+    key = (tag, id(obj))
+    if key in _DIGEST_MEMO:
+        obj_ref, digest = _DIGEST_MEMO[key]
+        if obj_ref() is obj:
+            return digest
+    digest = digest_fn(obj)
+    try:
+        _DIGEST_MEMO[key] = (weakref.ref(obj), digest)
+    except TypeError:
+        # object does not support weak reference, do not memorize
+        pass
+    return digest
+
+
+def _load_dataset_manifest(dataset: Dataset) -> Optional[dict]:
+    """Load the valid manifest of `data_root` if the dataset lists files with
+    manifests. Return None if it is not found."""
+    data_root = getattr(dataset, 'data_root', None)
+    suffix = getattr(dataset, '_VALID_IMG_SUFFIX', None)
+    if (not getattr(dataset, 'use_manifest', False) or suffix is None
+            or not isinstance(data_root, str) or not osp.isdir(data_root)):
+        return None
+    # import here to avoid the circular import of `mmgen.datasets`
+    from mmgen.datasets.file_manifest import load_valid_manifest
+    return load_valid_manifest(data_root, suffix)
+
+
+def get_file_list_digest(dataset: Dataset) -> str:
+    """Get the digest of the files in the dataset. The relative paths (to
+    `data_root`) of all '*_path' items are hashed together with the state of
+    the files.
+
+    Statting every file costs minutes for large datasets on network
+    filesystems, therefore the state is taken from the valid manifest of
+    `data_root` (see
+    :func:`~mmgen.datasets.file_manifest.list_files_with_manifest`) if
+    available. Otherwise, the mtimes of the directories of the files, which
+    change when files are added, removed or renamed, and the sizes and
+    mtimes of a few evenly picked files, which change when files are
+    modified in-place, are hashed. Each path is only statted once.
+
+    Args:
+        dataset (Dataset): The dataset.
+
+    Returns:
+        str: The md5 digest.
+    """
+
+    if not hasattr(dataset, 'get_data_info'):
+        # datasets not inherited from `BaseDataset`, use the number of items
+        return hashlib.md5(f'{type(dataset).__name__}-{len(dataset)}'.encode(
+            'utf-8')).hexdigest()
+
+    def _digest(dataset):
+        data_root = getattr(dataset, 'data_root', None) or ''
+        md5 = hashlib.md5()
+        # unique paths in the order of appearance
+        paths = dict()
+        for idx in range(len(dataset)):
+            data_info = dataset.get_data_info(idx)
+            for key in sorted(data_info.keys()):
+                path = data_info[key]
+                if not key.endswith('_path') or not isinstance(path, str):
+                    continue
+                rel_path = osp.relpath(path, data_root) if data_root else path
+                md5.update(f'{rel_path}\0'.encode('utf-8'))
+                paths[path] = None
+
+        manifest = _load_dataset_manifest(dataset)
+        if manifest is not None:
+            for key in ['paths', 'sizes', 'mtimes', 'dirs', 'dir_mtimes']:
+                md5.update(manifest[key].tobytes())
+            return md5.hexdigest()
+
+        paths = list(paths)
+        dirs = sorted({osp.dirname(path) for path in paths})
+        step = max(len(paths) // FILE_LIST_NUM_CHECKS, 1)
+        for path in dirs + paths[::step]:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                # files on remote backends (e.g. ceph)
+                continue
+            md5.update(f'{stat.st_size}:{stat.st_mtime_ns}\0'.encode('utf-8'))
+        return md5.hexdigest()
+
+    return _memo_digest(dataset, 'file_list', _digest)
+
+
+def _get_semantic_args(obj: Any, depth: int = 0) -> Any:
+    """Convert transforms to the class names and their arguments in basic
+    types, which is not influenced by cosmetic changes of `__repr__`."""
+    if isinstance(obj, (int, float, str, bool, type(None))):
+        return obj
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, (list, tuple)):
+        return [_get_semantic_args(o, depth) for o in obj]
+    if isinstance(obj, dict):
+        return {
+            str(k): _get_semantic_args(v, depth)
+            for k, v in sorted(obj.items(), key=lambda item: str(item[0]))
+        }
+    if hasattr(obj, 'transforms'):
+        return _get_semantic_args(list(obj.transforms), depth)
+    name = f'{type(obj).__module__}.{type(obj).__qualname__}'
+    if depth >= 3 or not hasattr(obj, '__dict__'):
+        return name
+    return [name, _get_semantic_args(vars(obj), depth + 1)]
+
+
+def get_pipeline_digest(pipeline: Any) -> str:
+    """Get the digest of the data pipeline from the types and arguments of
+    the transforms.
+
+    Args:
+        pipeline (Any): The pipeline of the dataset.
+
+    Returns:
+        str: The md5 digest.
+    """
+    semantic = json.dumps(_get_semantic_args(pipeline), sort_keys=True)
+    return hashlib.md5(semantic.encode('utf-8')).hexdigest()
+
+
+def get_module_digest(module: nn.Module) -> str:
+    """Get the digest of the weights of the module.
+
+    Args:
+        module (nn.Module): The module.
+
+    Returns:
+        str: The md5 digest.
+    """
+
+    def _digest(module):
+        md5 = hashlib.md5()
+        for name, tensor in sorted(module.state_dict().items()):
+            md5.update(name.encode('utf-8'))
+            md5.update(tensor.detach().cpu().numpy().tobytes())
+        return md5.hexdigest()
+
+    return _memo_digest(module, 'module', _digest)
+
+
+def register_derived_module_digest(module: nn.Module, source: nn.Module,
+                                   tag: str) -> str:
+    """Register the digest of a module derived from ``source``, e.g. a
+    frozen or quantized copy, whose weights can not be read from its state
+    dict. The digest is derived from the digest of ``source`` and ``tag``.
+
+    Args:
+        module (nn.Module): The derived module.
+        source (nn.Module): The module ``module`` is derived from.
+        tag (str): Tag of the derivation, e.g. 'frozen'.
+
+    Returns:
+        str: The md5 digest of ``module``.
+    """
+    digest = hashlib.md5(
+        f'{get_module_digest(source)}-{tag}'.encode('utf-8')).hexdigest()
+    return _memo_digest(module, 'module', lambda _: digest)
+
+
+class FeatureCacheManager:
+    """Manager of the feature caches in the cache directory.
+
+    An index file (`cache_index.json`) records the size, creation time and
+    last access time of every cache saved by
+    :func:`~mmgen.core.evaluation.inception_utils.prepare_inception_feat` and
+    :func:`~mmgen.core.evaluation.inception_utils.prepare_vgg_feat`. If
+    ``max_size`` is set, least recently used caches will be removed once the
+    total size exceeds it.
+
+    Args:
+        cache_dir (str): The cache directory. Defaults to `MMGEN_CACHE_DIR`.
+        max_size (int | str, optional): The byte budget of the caches, can be
+            str like '20G'. If not passed, the environment variable
+            `MMGEN_CACHE_MAX_SIZE` will be used, and no cache will be removed
+            automatically if it is not set either. Defaults to None.
+    """
+
+    def __init__(self,
+                 cache_dir: str = MMGEN_CACHE_DIR,
+                 max_size: Union[int, str, None] = None):
+        self.cache_dir = cache_dir
+        if max_size is None:
+            max_size = os.environ.get(CACHE_MAX_SIZE_ENV, None)
+        self.max_size = parse_size(max_size)
+
+    @property
+    def index_path(self) -> str:
+        """The path of the index file."""
+        return osp.join(self.cache_dir, CACHE_INDEX_NAME)
+
+    def load_index(self) -> dict:
+        """Load the index. Entries whose caches are removed are dropped."""
+        if not osp.exists(self.index_path):
+            return dict()
+        try:
+            with open(self.index_path, 'r') as file:
+                index = json.load(file)
+        except ValueError:
+            print_log(
+                f'Cache index \'{self.index_path}\' is broken, rebuild '
+                'it.', 'current')
+            return dict()
+        return {
+            name: entry
+            for name, entry in index.items()
+            if osp.exists(osp.join(self.cache_dir, name))
+        }
+
+    def _save_index(self, index: dict) -> None:
+        """Save the index with an atomic rename."""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = f'{self.index_path}.tmp-{os.getpid()}'
+        with open(tmp_path, 'w') as file:
+            json.dump(index, file, default=str, indent=2)
+        os.replace(tmp_path, self.index_path)
+
+    def register(self, name: str, meta: Optional[dict] = None) -> None:
+        """Register a newly saved cache and evict caches beyond the budget.
+
+        Args:
+            name (str): The name of the cache in the cache directory.
+            meta (dict, optional): Meta info shown in :meth:`list_entries`.
+                Defaults to None.
+        """
+        index = self.load_index()
+        now = time.time()
+        index[name] = dict(
+            size=get_path_size(osp.join(self.cache_dir, name)),
+            created=now,
+            last_access=now,
+            meta=meta or dict())
+        self._save_index(index)
+        if self.max_size is not None:
+            self.evict(keep=[name])
+
+    def touch(self, name: str) -> None:
+        """Update the last access time of a cache. Caches not in the index
+        (e.g. saved by previous versions) will be registered.
+
+        Args:
+            name (str): The name of the cache in the cache directory.
+        """
+        index = self.load_index()
+        if name not in index:
+            self.register(name)
+            return
+        index[name]['last_access'] = time.time()
+        self._save_index(index)
+
+    @staticmethod
+    def _is_in_progress(name: str, path: str) -> bool:
+        """Whether the cache is still being written, e.g., chunks of a
+        resumable extraction, temporary files, or sample caches whose meta
+        files are not dumped yet."""
+        if any(mark in name for mark in CACHE_IN_PROGRESS_MARKS):
+            return True
+        if name.startswith('gen_samples-') and osp.isdir(path):
+            # each rank dumps 'rank{RANK}.json' once its samples are saved
+            return not any(
+                filename.startswith('rank') and filename.endswith('.json')
+                for filename in os.listdir(path))
+        return False
+
+    def list_entries(self) -> List[dict]:
+        """List caches in the cache directory, sorted by last access time.
+        Caches with known prefixes but not in the index are listed as
+        untracked, except those still being written.
+
+        Returns:
+            List[dict]: Info of the caches.
+        """
+        index = self.load_index()
+        entries = [
+            dict(name=name, tracked=True, **entry)
+            for name, entry in index.items()
+        ]
+        if osp.isdir(self.cache_dir):
+            for name in sorted(os.listdir(self.cache_dir)):
+                if name in index or not name.startswith(CACHE_PREFIXES):
+                    continue
+                path = osp.join(self.cache_dir, name)
+                if self._is_in_progress(name, path):
+                    continue
+                mtime = osp.getmtime(path)
+                entries.append(
+                    dict(
+                        name=name,
+                        tracked=False,
+                        size=get_path_size(path),
+                        created=mtime,
+                        last_access=mtime,
+                        meta=dict()))
+        return sorted(entries, key=lambda entry: entry['last_access'])
+
+    def remove(self, name: str) -> None:
+        """Remove a cache and its index entry.
+
+        Args:
+            name (str): The name of the cache in the cache directory.
+        """
+        path = osp.join(self.cache_dir, name)
+        if osp.isdir(path):
+            shutil.rmtree(path)
+        elif osp.exists(path):
+            os.remove(path)
+        index = self.load_index()
+        index.pop(name, None)
+        self._save_index(index)
+        print_log(f'Remove feature cache \'{path}\'.', 'current')
+
+    def evict(
+        self,
+        max_size: Union[int, str, None] = None,
+        keep: Sequence[str] = ()
+    ) -> List[str]:
+        """Remove least recently used caches until the total size is no more
+        than ``max_size``.
+
+        Args:
+            max_size (int | str, optional): The byte budget. If not passed,
+                :attr:`max_size` will be used. Defaults to None.
+            keep (Sequence[str]): Names of caches never to remove. Defaults
+                to ().
+
+        Returns:
+            List[str]: Names of the removed caches.
+        """
+        max_size = self.max_size if max_size is None else parse_size(max_size)
+        if max_size is None:
+            return []
+        entries = [entry for entry in self.list_entries() if entry['tracked']]
+        total_size = sum([entry['size'] for entry in entries])
+        removed = []
+        for entry in entries:
+            if total_size <= max_size:
+                break
+            if entry['name'] in keep:
+                continue
+            self.remove(entry['name'])
+            total_size -= entry['size']
+            removed.append(entry['name'])
+        return removed
+
+    def prune(self,
+              max_size: Union[int, str, None] = None,
+              older_than: Optional[float] = None,
+              untracked: bool = False) -> List[str]:
+        """Remove stale caches.
+
+        Args:
+            max_size (int | str, optional): Remove least recently used caches
+                until the total size is no more than it. Defaults to None.
+            older_than (float, optional): Remove caches not accessed in the
+                given seconds. Defaults to None.
+            untracked (bool): Whether to remove caches not in the index.
+                Defaults to False.
+
+        Returns:
+            List[str]: Names of the removed caches.
+        """
+        removed = []
+        now = time.time()
+        for entry in self.list_entries():
+            if ((untracked and not entry['tracked'])
+                    or (older_than is not None
+                        and now - entry['last_access'] > older_than)):
+                self.remove(entry['name'])
+                removed.append(entry['name'])
+        if max_size is not None:
+            removed += self.evict(max_size)
+        return removed
@@ -38,6 +38,11 @@ class GenEvaluator(Evaluator):
     :meth:~`mmgen.core.runners.loops.GenValLoop.run` and
     :meth:~`mmgen.core.runners.loops.GenTestLoop.run`.
 
+    Metrics in one evaluator share a feature cache (:attr:`feature_cache`).
+    Metrics whose feature extractors and input images are the same (e.g. FID
+    and KID with the same Inception) only run the extractor once per batch and
+    reuse the outputs. The cache is cleared for each batch in :meth:`process`.
+
     Args:
         metrics (dict or BaseMetric or Sequence): The config of metrics.
     """
@@ -46,6 +51,11 @@ class GenEvaluator(Evaluator):
         super().__init__(metrics)
         self.is_ready = False
 
+        self.feature_cache = dict()
+        for metric in self.metrics:
+            if hasattr(metric, 'feature_cache'):
+                metric.feature_cache = self.feature_cache
+
     def prepare_metrics(self, module: BaseModel, dataloader: DataLoader):
         """Prepare for metrics before evaluation starts. Some metrics use
         pretrained model to extract feature. Some metrics use pretrained model
@@ -141,9 +151,12 @@ class GenEvaluator(Evaluator):
         for pred in predictions:
             _predictions.append(pred.to_dict())
 
-        # feed to the specifics metrics
+        # feed to the specifics metrics, outputs of feature extractors are
+        # only shared within current batch
+        self.feature_cache.clear()
         for metric in metrics:
             metric.process(_data_batch, _predictions)
+        self.feature_cache.clear()
 
     def evaluate(self) -> dict:
         """Invoke ``evaluate`` method of each metric and collect the metrics
@@ -1,12 +1,15 @@
 # Copyright (c) OpenMMLab. All rights reserved.
 import hashlib
+import json
 import os
 import os.path as osp
 import pickle
+import shutil
 import sys
+import warnings
 from contextlib import contextmanager
 from copy import deepcopy
-from typing import Optional, Tuple
+from typing import Callable, List, Optional, Tuple
 
 import mmcv
 import numpy as np
@@ -25,10 +28,44 @@ from torchvision.models.inception import inception_v3
 from mmgen.models.architectures import InceptionV3
 from mmgen.utils import MMGEN_CACHE_DIR
 from mmgen.utils.io_utils import download_from_url
+from .cache_manager import (FeatureCacheManager, get_file_list_digest,
+                            get_module_digest, get_pipeline_digest,
+                            register_derived_module_digest)
+from .metric_utils import ImageAccumulator, compute_kth_radii
 
 ALLOWED_INCEPTION = ['StyleGAN', 'PyTorch']
 TERO_INCEPTION_URL = 'https://nvlabs-fi-cdn.nvidia.com/stylegan2-ada-pytorch/pretrained/metrics/inception-2015-12-05.pt'  # noqa
 
+FEAT_CACHE_META = 'meta.json'
+
+# Feature extractors loaded by metrics. Metrics with the same backbone (e.g.
+# FID and IS with the same Tero's Inception) share one network instance.
+_FEATURE_EXTRACTORS = dict()
+
+
+def load_shared_extractor(key: tuple, load_fn: Callable, *args,
+                          **kwargs) -> Optional[nn.Module]:
+    """Load a feature extractor with ``load_fn`` or return the one already
+    loaded with the same ``key``. Only successfully loaded networks are
+    registered.
+
+    Args:
+        key (tuple): The key of the feature extractor, e.g.
+            ``('StyleGAN', inception_path)``.
+        load_fn (Callable): Function to load the network.
+        *args, **kwargs: Arguments passed to ``load_fn``.
+
+    Returns:
+        Optional[nn.Module]: The loaded feature extractor.
+    """
+    if key in _FEATURE_EXTRACTORS:
+        print_log(f'Reuse loaded feature extractor \'{key}\'.', 'current')
+        return _FEATURE_EXTRACTORS[key]
+    model = load_fn(*args, **kwargs)
+    if isinstance(model, nn.Module):
+        _FEATURE_EXTRACTORS[key] = model
+    return model
+
 
 @contextmanager
 def disable_gpu_fuser_on_pt19():
@@ -56,7 +93,15 @@ def load_inception(inception_args, metric):
     detailly, we would first try to load the model from disk with the given
     'inception_path', and then try to download the checkpoint from
     'inception_url'. If both method are failed, pytorch version of Inception
-    would be loaded.
+    would be loaded. Loaded networks are registered by their style and path,
+    therefore metrics requiring the same Inception share one network.
+
+    Two extra keys in `inception_args` control the optimization for CPU
+    inference (see :func:`optimize_inception_for_cpu`). 'cpu_optimize'
+    decides whether to freeze and optimize Tero's TorchScript network, and
+    it is turned on automatically if no CUDA device is available. 'quantize'
+    decides whether to quantize the linear layers of PyTorch's Inception to
+    int8 dynamically. Networks optimized for CPU can not be moved to GPUs.
     Args:
         inception_args (dict): Keyword args for inception net.
         metric (string): Metric to use the Inception. This argument would
@@ -72,6 +117,15 @@ def load_inception(inception_args, metric):
 
     _inception_args = deepcopy(inception_args)
     inception_type = _inception_args.pop('type', None)
+    cpu_optimize = _inception_args.pop('cpu_optimize', None)
+    quantize = _inception_args.pop('quantize', False)
+    if cpu_optimize is None:
+        # evaluation nodes without GPUs
+        cpu_optimize = not torch.cuda.is_available()
+    elif cpu_optimize and torch.cuda.is_available():
+        print_log(
+            'Inception optimized for CPU can not run on GPUs. Please make '
+            'sure the evaluation runs on CPU.', 'current')
 
     if torch.__version__ < '1.6.0':
         print_log(
@@ -79,32 +133,89 @@ def load_inception(inception_args, metric):
             'Inception Model from torch model zoo. If you want to use '
             'Tero\' script model, please update your Pytorch higher '
             f'than \'1.6\' (now is {torch.__version__})', 'current')
-        return _load_inception_torch(_inception_args, metric), 'pytorch'
+        return _load_shared_inception_torch(_inception_args, metric), 'pytorch'
 
     # load pytorch version is specific
     if inception_type != 'StyleGAN':
-        return _load_inception_torch(_inception_args, metric), 'pytorch'
+        model = _load_shared_inception_torch(_inception_args, metric)
+        if quantize:
+            key = ('PyTorch-INT8', metric,
+                   repr(sorted(_inception_args.items())))
+            model = load_shared_extractor(key, optimize_inception_for_cpu,
+                                          model, True)
+        return model, 'pytorch'
 
     # try to load Tero's version
     path = _inception_args.get('inception_path', TERO_INCEPTION_URL)
     if path is None:
         path = TERO_INCEPTION_URL
 
+    if quantize:
+        print_log(
+            'Dynamic quantization does not support TorchScript networks, '
+            'Tero\'s Inception will not be quantized.', 'current')
+
     # try to parse `path` as web url and download
+    model = None
     if 'http' not in path:
-        model = _load_inception_from_path(path)
-        if isinstance(model, torch.nn.Module):
-            return model, 'StyleGAN'
+        model = load_shared_extractor(('StyleGAN', path),
+                                      _load_inception_from_path, path)
 
     # try to parse `path` as path on disk
-    model = _load_inception_from_url(path)
+    if not isinstance(model, torch.nn.Module):
+        model = _load_inception_from_url(path)
+
     if isinstance(model, torch.nn.Module):
+        if cpu_optimize:
+            model = load_shared_extractor(('StyleGAN-Frozen', path),
+                                          optimize_inception_for_cpu, model)
         return model, 'StyleGAN'
 
     raise RuntimeError('Cannot Load Inception Model, please check the input '
                        f'`inception_args`: {inception_args}')
 
 
+def optimize_inception_for_cpu(model: nn.Module,
+                               quantize: bool = False) -> nn.Module:
+    """Optimize the Inception network for inference on CPU.
+
+    TorchScript networks (e.g. Tero's Inception) are frozen, i.e. weights
+    are inlined as constants and batch norms are folded into convolutions,
+    and then optimized by ``torch.jit.optimize_for_inference`` if available.
+    If `quantize` is True, the linear layers of eager networks are quantized
+    to int8 dynamically. Convolutions are kept in fp32, since dynamic
+    quantization of PyTorch only supports linear and recurrent layers. The
+    digest of the optimized network is derived from the original one, so
+    that feature caches of the two networks are not mixed.
+
+    Args:
+        model (nn.Module): The Inception network.
+        quantize (bool): Whether to quantize linear layers to int8. Defaults
+            to False.
+
+    Returns:
+        nn.Module: The optimized network.
+    """
+    source = model.eval()
+    quantize = quantize and not isinstance(model, torch.jit.ScriptModule)
+    if quantize:
+        model = torch.quantization.quantize_dynamic(
+            model, {nn.Linear}, dtype=torch.qint8)
+    if isinstance(model, torch.jit.ScriptModule) and hasattr(
+            torch.jit, 'freeze'):
+        model = torch.jit.freeze(model)
+        if hasattr(torch.jit, 'optimize_for_inference'):
+            model = torch.jit.optimize_for_inference(model)
+    if model is source:
+        return model
+    register_derived_module_digest(model, source,
+                                   'int8' if quantize else 'frozen')
+    print_log(
+        'Optimize Inception for CPU inference '
+        f'({"int8" if quantize else "frozen"}).', 'current')
+    return model
+
+
 def _load_inception_from_path(inception_path):
     print_log(
         'Try to load Tero\'s Inception Model from '
@@ -127,12 +238,21 @@ def _load_inception_from_url(inception_url: str) -> nn.Module:
     try:
         path = download_from_url(inception_url, dest_dir=MMGEN_CACHE_DIR)
         print_log('Download Finished.', 'current')
-        return _load_inception_from_path(path)
+        return load_shared_extractor(('StyleGAN', path),
+                                     _load_inception_from_path, path)
     except Exception as e:
         print_log(f'Download Failed. {e} occurs.', 'current')
         return None
 
 
+def _load_shared_inception_torch(inception_args, metric) -> nn.Module:
+    """Load Inception network from PyTorch's model zoo, and share it with
+    other metrics of the same kind."""
+    key = ('PyTorch', metric, repr(sorted(inception_args.items())))
+    return load_shared_extractor(key, _load_inception_torch, inception_args,
+                                 metric)
+
+
 def _load_inception_torch(inception_args, metric) -> nn.Module:
     """Load Inception network from PyTorch's model zoo."""
     assert metric in ['FID', 'IS']
@@ -152,17 +272,146 @@ def _load_inception_torch(inception_args, metric) -> nn.Module:
     return inception_model
 
 
+def save_feature_cache(cache_dir: str,
+                       arrays: dict,
+                       meta: Optional[dict] = None) -> None:
+    """Save features to a memory-mappable cache directory. Each array is saved
+    as a raw `.npy` file, and a small json header (`meta.json`) records the
+    file, shape and dtype of each array and the meta info. The cache is
+    written to a temporary directory first and then renamed, therefore a
+    half-written cache will never be loaded.
+
+    Args:
+        cache_dir (str): The directory to save the cache.
+        arrays (dict): Arrays (np.ndarray or Tensor) to save.
+        meta (dict, optional): Meta info of the cache, e.g. args to extract
+            the features. Must be json serializable, otherwise values will be
+            converted to str. Defaults to None.
+    """
+    tmp_dir = f'{cache_dir.rstrip(os.sep)}.tmp-{os.getpid()}'
+    os.makedirs(tmp_dir, exist_ok=True)
+    arrays_info = dict()
+    for name, array in arrays.items():
+        if isinstance(array, torch.Tensor):
+            array = array.cpu().numpy()
+        array = np.ascontiguousarray(array)
+        filename = f'{name}.npy'
+        np.save(osp.join(tmp_dir, filename), array)
+        arrays_info[name] = dict(
+            file=filename, shape=list(array.shape), dtype=str(array.dtype))
+    with open(osp.join(tmp_dir, FEAT_CACHE_META), 'w') as file:
+        json.dump(
+            dict(arrays=arrays_info, meta=meta or dict()),
+            file,
+            default=str,
+            indent=2)
+    if osp.exists(cache_dir):
+        shutil.rmtree(cache_dir)
+    os.rename(tmp_dir, cache_dir)
+
+
+def is_feature_cache(path: str) -> bool:
+    """Whether the given path is a cache directory saved by
+    :func:`save_feature_cache`."""
+    return osp.isdir(path) and osp.exists(osp.join(path, FEAT_CACHE_META))
+
+
+def update_feature_cache(cache_dir: str, arrays: dict) -> None:
+    """Add or replace arrays in a cache directory saved by
+    :func:`save_feature_cache`. Existing arrays are not rewritten, and the
+    json header is replaced atomically after the new arrays are saved.
+
+    Args:
+        cache_dir (str): The directory of the cache.
+        arrays (dict): Arrays (np.ndarray or Tensor) to add.
+    """
+    meta_path = osp.join(cache_dir, FEAT_CACHE_META)
+    with open(meta_path, 'r') as file:
+        header = json.load(file)
+    for name, array in arrays.items():
+        if isinstance(array, torch.Tensor):
+            array = array.cpu().numpy()
+        array = np.ascontiguousarray(array)
+        filename = f'{name}.npy'
+        tmp_path = osp.join(cache_dir, f'{filename}.tmp-{os.getpid()}')
+        with open(tmp_path, 'wb') as file:
+            np.save(file, array)
+        os.replace(tmp_path, osp.join(cache_dir, filename))
+        header['arrays'][name] = dict(
+            file=filename, shape=list(array.shape), dtype=str(array.dtype))
+    tmp_path = f'{meta_path}.tmp-{os.getpid()}'
+    with open(tmp_path, 'w') as file:
+        json.dump(header, file, default=str, indent=2)
+    os.replace(tmp_path, meta_path)
+
+
+def load_feature_cache(cache_dir: str, mmap: bool = True) -> dict:
+    """Load features from the cache directory saved by
+    :func:`save_feature_cache`. With ``mmap=True``, arrays are memory-mapped
+    in read-only mode, which is nearly free and lets processes on the same
+    node share the page-cached features.
+
+    Args:
+        cache_dir (str): The directory of the cache.
+        mmap (bool): Whether to memory-map the arrays. Defaults to True.
+
+    Returns:
+        dict: The meta info and arrays of the cache.
+    """
+    with open(osp.join(cache_dir, FEAT_CACHE_META), 'r') as file:
+        header = json.load(file)
+    state = dict(header['meta'])
+    mmap_mode = 'r' if mmap else None
+    for name, info in header['arrays'].items():
+        state[name] = np.load(
+            osp.join(cache_dir, info['file']), mmap_mode=mmap_mode)
+    return state
+
+
+def _load_feat_state(path: str) -> dict:
+    """Load feature state from a cache directory or a pickle file."""
+    if is_feature_cache(path):
+        return load_feature_cache(path)
+    with open(path, 'rb') as file:
+        return pickle.load(file)
+
+
+def _save_feat_state(path: str, arrays: dict, meta: dict) -> None:
+    """Save feature state. A pickle file will be saved if ``path`` ends with
+    '.pkl', otherwise a memory-mappable cache directory will be saved."""
+    if path.endswith('.pkl'):
+        dir_name = osp.dirname(path)
+        if dir_name:
+            os.makedirs(dir_name, exist_ok=True)
+        with open(path, 'wb') as file:
+            pickle.dump(dict(**meta, **arrays), file)
+    else:
+        save_feature_cache(path, arrays, meta)
+
+
+def _find_feat_state(path: str) -> Optional[str]:
+    """Find the saved feature state of ``path``. Caches saved as pickle by
+    previous versions (``path + '.pkl'``) are also supported."""
+    for candidate in [path, f'{path}.pkl']:
+        if osp.exists(candidate):
+            return candidate
+    return None
+
+
 def get_inception_feat_cache_name_and_args(
         dataloader: DataLoader, metric: BaseMetric, real_nums: int,
         capture_mean_cov: bool, capture_all: bool) -> Tuple[str, dict]:
     """Get the name and meta info of the inception feature cache file
     corresponding to the input dataloader and metric.
 
-    The meta info includs
-    'data_root', 'data_prefix', 'meta_info' and 'pipeline' of the dataset, and
-    'inception_style' and 'inception_args' of the metric. Then we calculate the
-    hash value of the meta info dict with md5, and the name of the inception
-    feature cache will be 'inception_feat_{HASH}.pkl'.
+    The cache is content-addressed: the key includes the digest of the image
+    files (relative paths, sizes and modification times), the digest of the
+    pipeline semantics (types and arguments of the transforms), the digest of
+    the Inception weights, and the arguments of the features. Then we
+    calculate the hash value of the key with md5, and the name of the
+    inception feature cache directory will be
+    'inception_state-{TYPE}-{NUM}-{HASH}'. 'data_root', 'data_prefix',
+    'meta_info' and the number of gpus are saved as meta info but not hashed.
     Args:
         datalaoder (Dataloader): The dataloader of real images.
         metric (BaseMetric): The metric which needs inception features.
@@ -180,40 +429,40 @@ def get_inception_feat_cache_name_and_args(
     assert isinstance(dataset, Dataset), (
         f'Only support normal dataset, but receive {type(dataset)}.')
 
-    # get dataset info
-    data_root = deepcopy(dataset.data_root)
-    data_prefix = deepcopy(dataset.data_prefix)
-    metainfo = dataset.metainfo
-    pipeline = repr(dataset.pipeline)
-
     # get metric info
     inception_style = metric.inception_style
     inception_args = getattr(metric, 'inception_args', None)
+    inception = getattr(metric, 'inception', None)
 
     real_key = 'img' if metric.real_key is None else metric.real_key
-    args = dict(
-        data_root=data_root,
-        data_prefix=data_prefix,
-        metainfo=metainfo,
-        pipeline=pipeline,
+    key_args = dict(
+        file_list=get_file_list_digest(dataset),
+        pipeline=get_pipeline_digest(getattr(dataset, 'pipeline', None)),
         inception_style=inception_style,
         inception_args=inception_args,
-        # save `num_gpus` because this may influence the data loading order
-        num_gpus=get_world_size(),
+        inception_weights=get_module_digest(inception) if isinstance(
+            inception, nn.Module) else None,
         capture_mean_cov=capture_mean_cov,
         capture_all=capture_all,
         real_keys=real_key,
         real_nums=real_nums)
+    args = dict(
+        data_root=deepcopy(getattr(dataset, 'data_root', None)),
+        data_prefix=deepcopy(getattr(dataset, 'data_prefix', None)),
+        metainfo=getattr(dataset, 'metainfo', None),
+        # only influence the order of the raw features
+        num_gpus=get_world_size(),
+        **key_args)
 
     real_nums_str = 'full' if real_nums == -1 else str(real_nums)
-    md5 = hashlib.md5(repr(sorted(args.items())).encode('utf-8'))
+    md5 = hashlib.md5(repr(sorted(key_args.items())).encode('utf-8'))
     if capture_all:
         prefix = 'inception_state-capture_all'
     elif capture_mean_cov:
         prefix = 'inception_state-capture_mean_cov'
     else:
         prefix = 'inception_state-capture_all_mean_cov'
-    cache_tag = f'{prefix}-{real_nums_str}-{md5.hexdigest()}.pkl'
+    cache_tag = f'{prefix}-{real_nums_str}-{md5.hexdigest()}'
     return cache_tag, args
 
 
@@ -222,11 +471,11 @@ def get_vgg_feat_cache_name_and_args(dataloader: DataLoader,
     """Get the name and meta info of the vgg feature cache file corresponding
     to the input dataloader and metric.
 
-    The meta info includs 'data_root',
-    'data_prefix', 'meta_info' and 'pipeline' of the dataset, and
-    'use_tero_scirpt' of the metric. Then we calculate the hash value of the
-    meta info dict with md5, and the name of the vgg feature cache will be
-    'vgg_feat_{HASH}.pkl'.
+    Same as :func:`get_inception_feat_cache_name_and_args`, the key includes
+    the digests of the image files, the pipeline semantics and the vgg
+    weights, and 'use_tero_scirpt' of the metric. Then we calculate the hash
+    value of the key with md5, and the name of the vgg feature cache
+    directory will be 'vgg_state-{HASH}'.
     Args:
         datalaoder (Dataloader): The dataloader of real images.
         metric (BaseMetric): The metric which needs inception features.
@@ -239,36 +488,83 @@ def get_vgg_feat_cache_name_and_args(dataloader: DataLoader,
     assert isinstance(dataset, Dataset), (
         f'Only support normal dataset, but receive {type(dataset)}.')
 
-    # get dataset info
-    data_root = deepcopy(dataset.data_root)
-    data_prefix = deepcopy(dataset.data_prefix)
-    metainfo = dataset.metainfo
-    pipeline = dataset.pipeline
-    if isinstance(pipeline, Compose):
-        pipeline_str = repr(pipeline)
-    else:
-        pipeline_str = ''
-
-    # get metric info
-    use_tero_scirpt = metric.use_tero_scirpt
-
+    pipeline = getattr(dataset, 'pipeline', None)
+    vgg16 = getattr(metric, 'vgg16', None)
+    key_args = dict(
+        file_list=get_file_list_digest(dataset),
+        pipeline=get_pipeline_digest(pipeline) if isinstance(
+            pipeline, Compose) else '',
+        vgg_weights=get_module_digest(vgg16)
+        if isinstance(vgg16, nn.Module) else None,
+        use_tero_scirpt=metric.use_tero_scirpt)
     args = dict(
-        data_root=data_root,
-        data_prefix=data_prefix,
-        metainfo=metainfo,
-        pipeline=pipeline_str,
-        use_tero_scirpt=use_tero_scirpt)
-
-    md5 = hashlib.md5(repr(sorted(args.items())).encode('utf-8'))
-    cache_tag = f'vgg_state-{md5.hexdigest()}.pkl'
+        data_root=deepcopy(getattr(dataset, 'data_root', None)),
+        data_prefix=deepcopy(getattr(dataset, 'data_prefix', None)),
+        metainfo=getattr(dataset, 'metainfo', None),
+        **key_args)
+
+    md5 = hashlib.md5(repr(sorted(key_args.items())).encode('utf-8'))
+    cache_tag = f'vgg_state-{md5.hexdigest()}'
     return cache_tag, args
 
 
+def _build_feat_accumulator(metric: BaseMetric, image: torch.Tensor,
+                            forward_fn: Callable) -> ImageAccumulator:
+    """Build the accumulator to regroup real images into batches of the
+    feature batch size of the metric. Metrics without
+    `get_feature_batch_size` feed images to the extractor as they are
+    loaded."""
+    get_batch_size = getattr(type(metric), 'get_feature_batch_size', None)
+    if get_batch_size is None:
+        return ImageAccumulator()
+    return ImageAccumulator(get_batch_size(metric, image, forward_fn))
+
+
+def _load_feat_chunks(chunk_dir: str, rank: int) -> List[np.ndarray]:
+    """Load the finished inception feature chunks of the given rank.
+
+    Args:
+        chunk_dir (str): The directory of feature chunks.
+        rank (int): The rank of current process.
+
+    Returns:
+        List[np.ndarray]: Feature chunks in order.
+    """
+    if not osp.isdir(chunk_dir):
+        return []
+    chunk_names = sorted([
+        name for name in os.listdir(chunk_dir)
+        if name.startswith(f'rank{rank}-') and name.endswith('.npy')
+    ])
+    return [np.load(osp.join(chunk_dir, name)) for name in chunk_names]
+
+
+def _save_feat_chunk(chunk_dir: str, rank: int, chunk_idx: int,
+                     feat: torch.Tensor) -> None:
+    """Save one inception feature chunk of the given rank. The chunk is
+    written to a temporary file and then renamed, therefore only finished
+    chunks can be found by :func:`_load_feat_chunks`.
+
+    Args:
+        chunk_dir (str): The directory of feature chunks.
+        rank (int): The rank of current process.
+        chunk_idx (int): The index of the chunk.
+        feat (torch.Tensor): Features to save.
+    """
+    os.makedirs(chunk_dir, exist_ok=True)
+    chunk_path = osp.join(chunk_dir, f'rank{rank}-{chunk_idx:06d}.npy')
+    tmp_path = f'{chunk_path}.tmp'
+    with open(tmp_path, 'wb') as file:
+        np.save(file, feat.cpu().numpy())
+    os.replace(tmp_path, chunk_path)
+
+
 def prepare_inception_feat(dataloader: DataLoader,
                            metric: BaseMetric,
                            data_preprocessor: Optional[nn.Module] = None,
                            capture_mean_cov: bool = False,
-                           capture_all: bool = False) -> dict:
+                           capture_all: bool = False,
+                           chunk_size: Optional[int] = None) -> dict:
     """Prepare inception feature for the input metric.
 
     - If `metric.inception_pkl` is an online path, try to download and load
@@ -279,6 +575,23 @@ def prepare_inception_feat(dataloader: DataLoader,
       extract the inception feature manually and save to 'inception_pkl'.
     - If `metric.inception_pkl` is not defined, we will extrace the inception
       feature and save it to default cache dir with default name.
+
+    `metric.inception_pkl` can be a pickle file or a cache directory saved by
+    :func:`save_feature_cache`. Features extracted manually are saved as
+    pickle if the target path ends with '.pkl', otherwise saved as a
+    memory-mappable cache directory, which is the default format of the
+    caches in `MMGEN_CACHE_DIR`.
+
+    If `chunk_size` is given, each rank saves its extracted features to
+    '{inception_pkl}.chunks' every `chunk_size` images. If the extraction is
+    interrupted, the next call will load the finished chunks and resume from
+    the first unfinished image. Chunks are removed once the merged inception
+    state is saved.
+
+    Images are loaded with the batch size of `dataloader`, and regrouped into
+    batches of `metric.feature_batch_size` images (see
+    :class:`~mmgen.core.evaluation.metrics.GenerativeMetric`) before being
+    fed to the Inception network.
     Args:
         datalaoder (Dataloader): The dataloader of real images.
         metric (BaseMetric): The metric which needs inception features.
@@ -290,6 +603,9 @@ def prepare_inception_feat(dataloader: DataLoader,
         capture_all (bool): Whether save the raw inception feature. If true,
             it will take a lot of time to save the inception feature. Defaults
             to False.
+        chunk_size (int, optional): Number of images of each checkpointed
+            feature chunk per rank. If not passed, features are only saved
+            after the extraction is finished. Defaults to None.
     Returns:
         dict: Dict contains inception feature.
     """
@@ -301,8 +617,7 @@ def prepare_inception_feat(dataloader: DataLoader,
 
     if isinstance(inception_pkl, str):
         if is_filepath(inception_pkl) and osp.exists(inception_pkl):
-            with open(inception_pkl, 'rb') as file:
-                inception_state = pickle.load(file)
+            inception_state = _load_feat_state(inception_pkl)
             print_log(
                 f'\'{metric.prefix}\' successful load inception feature '
                 f'from \'{inception_pkl}\'', 'current')
@@ -325,16 +640,20 @@ def prepare_inception_feat(dataloader: DataLoader,
     assert hasattr(metric, 'real_nums'), (
         f'Metric \'{metric.name}\' must have attribute \'real_nums\'.')
     real_nums = metric.real_nums
+    cache_manager = None
     if inception_pkl is None:
         inception_pkl, args = get_inception_feat_cache_name_and_args(
             dataloader, metric, real_nums, capture_mean_cov, capture_all)
         inception_pkl = osp.join(MMGEN_CACHE_DIR, inception_pkl)
+        cache_manager = FeatureCacheManager(MMGEN_CACHE_DIR)
     else:
         args = dict()
-    if osp.exists(inception_pkl):
-        with open(inception_pkl, 'rb') as file:
-            real_feat = pickle.load(file)
-        print(f'load preprocessed feat from {inception_pkl}')
+    cache_path = _find_feat_state(inception_pkl)
+    if cache_path is not None:
+        real_feat = _load_feat_state(cache_path)
+        print(f'load preprocessed feat from {cache_path}')
+        if cache_manager is not None and is_main_process():
+            cache_manager.touch(osp.basename(cache_path))
         return real_feat
 
     assert hasattr(metric, 'inception'), (
@@ -359,6 +678,22 @@ def prepare_inception_feat(dataloader: DataLoader,
     rank, num_gpus = get_dist_info()
     item_subset = [(i * num_gpus + rank) % num_items
                    for i in range((num_items - 1) // num_gpus + 1)]
+
+    if chunk_size is not None:
+        # the items of each rank depend on the number of gpus
+        chunk_dir = osp.join(f'{inception_pkl}.chunks',
+                             f'{num_gpus}gpus-{chunk_size}items')
+        chunks = _load_feat_chunks(chunk_dir, rank)
+        num_finished = sum([chunk.shape[0] for chunk in chunks])
+        if chunks:
+            print_log(
+                f'Resume inception feature extraction from {num_finished} '
+                f'finished images in \'{chunk_dir}\'.', 'current')
+        device = getattr(metric, 'device', 'cpu')
+        real_feat = [torch.from_numpy(chunk).to(device) for chunk in chunks]
+        item_subset = item_subset[num_finished:]
+        chunk_idx, chunk_buffer = len(chunks), []
+
     inception_dataloader = DataLoader(
         dataset,
         batch_size=batch_size,
@@ -388,6 +723,7 @@ def prepare_inception_feat(dataloader: DataLoader,
                 total=len(inception_dataloader),
                 visible=True)
 
+    accumulator = None
     for data in inception_dataloader:
         inputs, _ = data_preprocessor(data)
 
@@ -407,8 +743,23 @@ def prepare_inception_feat(dataloader: DataLoader,
                 f'same time. But receive \'{mean}\' and \'{std}\' '
                 'respectively.')
 
-        real_feat_ = metric.forward_inception(img)
-        real_feat.append(real_feat_)
+        if accumulator is None:
+            accumulator = _build_feat_accumulator(metric, img[0],
+                                                  metric.forward_inception)
+        for _, batch in accumulator.add(img):
+            real_feat_ = metric.forward_inception(batch)
+            real_feat.append(real_feat_)
+
+            if chunk_size is not None:
+                chunk_buffer.append(real_feat_)
+                if sum([feat.shape[0] for feat in chunk_buffer]) >= chunk_size:
+                    chunk_feat = torch.cat(chunk_buffer)
+                    while chunk_feat.shape[0] >= chunk_size:
+                        _save_feat_chunk(chunk_dir, rank, chunk_idx,
+                                         chunk_feat[:chunk_size])
+                        chunk_feat = chunk_feat[chunk_size:]
+                        chunk_idx += 1
+                    chunk_buffer = [chunk_feat]
 
         if is_main_process():
             if is_slurm:
@@ -423,6 +774,18 @@ def prepare_inception_feat(dataloader: DataLoader,
         else:
             pbar.stop()
 
+    remaining = accumulator.flush() if accumulator is not None else None
+    if remaining is not None:
+        real_feat_ = metric.forward_inception(remaining[1])
+        real_feat.append(real_feat_)
+        if chunk_size is not None:
+            chunk_buffer.append(real_feat_)
+
+    if chunk_size is not None and chunk_buffer:
+        chunk_feat = torch.cat(chunk_buffer)
+        if chunk_feat.shape[0] > 0:
+            _save_feat_chunk(chunk_dir, rank, chunk_idx, chunk_feat)
+
     # collect results
     real_feat = torch.cat(real_feat)
     # use `all_gather` here, gather tensor is much quicker than gather object.
@@ -430,30 +793,43 @@ def prepare_inception_feat(dataloader: DataLoader,
 
     # only cat on the main process
     if is_main_process():
-        inception_state = dict(**args)
+        real_feat = torch.cat(real_feat, dim=0)[:num_items].cpu().numpy()
+        inception_feats = dict()
         if capture_mean_cov:
-            real_feat = torch.cat(real_feat, dim=0)[:num_items].cpu().numpy()
-            real_mean = np.mean(real_feat, 0)
-            real_cov = np.cov(real_feat, rowvar=False)
-            inception_state['real_mean'] = real_mean
-            inception_state['real_cov'] = real_cov
+            inception_feats['real_mean'] = np.mean(real_feat, 0)
+            inception_feats['real_cov'] = np.cov(real_feat, rowvar=False)
         if capture_all:
-            inception_state['raw_feature'] = real_feat
-        dir_name = osp.dirname(inception_pkl)
-        os.makedirs(dir_name, exist_ok=True)
+            inception_feats['raw_feature'] = real_feat
         print_log(
             f'Saving inception pkl to {inception_pkl}. Please be patient.',
             'current')
-        with open(inception_pkl, 'wb') as file:
-            pickle.dump(inception_state, file)
+        _save_feat_state(inception_pkl, inception_feats, args)
         print_log('Inception pkl Finished.', 'current')
-        return inception_state
+        if cache_manager is not None:
+            cache_manager.register(
+                osp.basename(inception_pkl),
+                dict(data_root=args['data_root'], real_nums=real_nums))
+        if chunk_size is not None:
+            shutil.rmtree(f'{inception_pkl}.chunks', ignore_errors=True)
+        return dict(**args, **inception_feats)
+
+
+def _as_tensor(feat) -> torch.Tensor:
+    """Convert the loaded feature to tensor. Memory-mapped arrays are
+    converted without copy."""
+    if isinstance(feat, torch.Tensor):
+        return feat
+    with warnings.catch_warnings():
+        # memory-mapped arrays are read-only, which is expected
+        warnings.simplefilter('ignore', UserWarning)
+        return torch.from_numpy(feat)
 
 
 def prepare_vgg_feat(dataloader: DataLoader,
                      metric: BaseMetric,
                      data_preprocessor: Optional[nn.Module] = None,
-                     auto_save=True) -> np.ndarray:
+                     auto_save=True,
+                     knn_k: Optional[int] = None) -> np.ndarray:
     """Prepare vgg feature for the input metric.
 
     - If `metric.vgg_pkl` is an online path, try to download and load
@@ -464,27 +840,75 @@ def prepare_vgg_feat(dataloader: DataLoader,
       extract the vgg feature manually and save to 'vgg_pkl'.
     - If `metric.vgg_pkl` is not defined, we will extrace the vgg
       feature and save it to default cache dir with default name.
+
+    Same as :func:`prepare_inception_feat`, `metric.vgg_pkl` can be a pickle
+    file or a memory-mappable cache directory. Features loaded from a cache
+    directory share memory with the memory-mapped file. Images are regrouped
+    into batches of `metric.feature_batch_size` images as well.
+
+    If `knn_k` is given, the distance from each feature to its `knn_k`-th
+    nearest neighbour is also returned. The radii are loaded from the cache
+    if they are saved as 'kth_radii_k{knn_k}', otherwise computed on the main
+    process and added to the cache directory when `auto_save` is True.
     Args:
         datalaoder (Dataloader): The dataloader of real images.
         metric (BaseMetric): The metric which needs vgg features.
         data_preprocessor (Optional[nn.Module]): Data preprocessor of the
             module. Used to preprocess the real images. If not passed, real
             images will automatically normalized to [-1, 1]. Defaults to None.
+        auto_save (bool): Whether to save the features and radii. Defaults
+            to True.
+        knn_k (int, optional): The k-th nearest neighbour of the radii to
+            prepare. Defaults to None.
         Returns:
-            np.ndarray: Loaded vgg feature.
+            np.ndarray | Tuple[np.ndarray]: Loaded vgg feature, and the k-th
+                nearest neighbour radii if `knn_k` is given. Radii are None
+                on non-main processes.
+    """
+    vgg_feat, vgg_state, cache_dir = _prepare_vgg_feat(dataloader, metric,
+                                                       data_preprocessor,
+                                                       auto_save)
+    if knn_k is None:
+        return vgg_feat
+    if vgg_feat is None or not is_main_process():
+        return vgg_feat, None
+
+    kth_key = f'kth_radii_k{knn_k}'
+    if kth_key in vgg_state:
+        return vgg_feat, _as_tensor(vgg_state[kth_key])
+    kth = compute_kth_radii(vgg_feat, knn_k,
+                            getattr(metric, 'row_batch_size', 10000),
+                            getattr(metric, 'col_batch_size', 10000))
+    if auto_save and cache_dir is not None:
+        update_feature_cache(cache_dir, {kth_key: kth})
+        print_log(f'Save k-th nearest neighbour radii to \'{cache_dir}\'.',
+                  'current')
+    return vgg_feat, kth
+
+
+def _prepare_vgg_feat(dataloader: DataLoader,
+                      metric: BaseMetric,
+                      data_preprocessor: Optional[nn.Module] = None,
+                      auto_save=True) -> tuple:
+    """Prepare vgg feature for :func:`prepare_vgg_feat`.
+
+    Returns:
+        tuple: The vgg feature, the loaded state and the cache directory to
+            save extra arrays. The cache directory is None if features are
+            not saved as a cache directory.
     """
     if not hasattr(metric, 'vgg16_pkl'):
-        return
+        return None, None, None
     vgg_pkl: Optional[str] = metric.vgg16_pkl
 
     if isinstance(vgg_pkl, str):
         if is_filepath(vgg_pkl) and osp.exists(vgg_pkl):
-            with open(vgg_pkl, 'rb') as file:
-                vgg_state = pickle.load(file)
+            vgg_state = _load_feat_state(vgg_pkl)
             print_log(
                 f'\'{metric.prefix}\' successful load VGG feature '
                 f'from \'{vgg_pkl}\'', 'currnet')
-            return vgg_state['vgg_feat']
+            cache_dir = vgg_pkl if is_feature_cache(vgg_pkl) else None
+            return _as_tensor(vgg_state['vgg_feat']), vgg_state, cache_dir
         elif vgg_pkl.startswith('s3'):
             try:
                 raise NotImplementedError(
@@ -500,16 +924,21 @@ def prepare_vgg_feat(dataloader: DataLoader,
                 raise exp('Not support download from url currently')
 
     # cannot load or download from file, extract manually
+    cache_manager = None
     if vgg_pkl is None:
         vgg_pkl, args = get_vgg_feat_cache_name_and_args(dataloader, metric)
         vgg_pkl = osp.join(MMGEN_CACHE_DIR, vgg_pkl)
+        cache_manager = FeatureCacheManager(MMGEN_CACHE_DIR)
     else:
         args = dict()
-    if osp.exists(vgg_pkl):
-        with open(vgg_pkl, 'rb') as file:
-            real_feat = pickle.load(file)['vgg_feat']
-        print(f'load preprocessed feat from {vgg_pkl}')
-        return real_feat
+    cache_path = _find_feat_state(vgg_pkl)
+    if cache_path is not None:
+        vgg_state = _load_feat_state(cache_path)
+        print(f'load preprocessed feat from {cache_path}')
+        if cache_manager is not None and is_main_process():
+            cache_manager.touch(osp.basename(cache_path))
+        cache_dir = cache_path if is_feature_cache(cache_path) else None
+        return _as_tensor(vgg_state['vgg_feat']), vgg_state, cache_dir
 
     assert hasattr(
         metric,
@@ -539,6 +968,7 @@ def prepare_vgg_feat(dataloader: DataLoader,
             total=len(dataloader.dataset),
             visible=True)
 
+    accumulator = None
     for data in dataloader:
         inputs, _ = data_preprocessor(data)
 
@@ -558,16 +988,23 @@ def prepare_vgg_feat(dataloader: DataLoader,
                 f'same time. But receive \'{mean}\' and \'{std}\' '
                 'respectively.')
 
-        real_feat_ = metric.extract_features(img)
-        real_feat.append(real_feat_)
+        if accumulator is None:
+            accumulator = _build_feat_accumulator(metric, img[0],
+                                                  metric.extract_features)
+        for _, batch in accumulator.add(img):
+            real_feat.append(metric.extract_features(batch))
         # real_feat += torch.tensor_split(real_feat_, real_feat_.shape[0])
         if is_main_process():
-            pbar.update(task, advance=len(real_feat_) * get_world_size())
+            pbar.update(task, advance=len(img) * get_world_size())
 
     # stop the pbar
     if is_main_process():
         pbar.stop()
 
+    remaining = accumulator.flush() if accumulator is not None else None
+    if remaining is not None:
+        real_feat.append(metric.extract_features(remaining[1]))
+
     # collect results
     real_feat = torch.cat(real_feat)
     # use `all_gather` here, gather tensor is much quicker than gather object.
@@ -576,8 +1013,13 @@ def prepare_vgg_feat(dataloader: DataLoader,
     # only cat on the main process
     if is_main_process():
         real_feat = torch.cat(real_feat, dim=0)[:len(dataloader.dataset)].cpu()
+        cache_dir = None
         if auto_save:
-            vgg_state = dict(vgg_feat=real_feat, **args)
-            with open(vgg_pkl, 'wb') as file:
-                pickle.dump(vgg_state, file)
-        return real_feat
+            _save_feat_state(vgg_pkl, dict(vgg_feat=real_feat), args)
+            if cache_manager is not None:
+                cache_manager.register(
+                    osp.basename(vgg_pkl), dict(data_root=args['data_root']))
+            if is_feature_cache(vgg_pkl):
+                cache_dir = vgg_pkl
+        return real_feat, dict(), cache_dir
+    return None, None, None
@@ -78,6 +78,119 @@ def extract_inception_features(dataloader,
     return features
 
 
+class ImageAccumulator:
+    """Regroup batches of images into batches of `batch_size` images, which
+    decouples the batch size of feature extractors from the batch size of
+    generators or dataloaders. Images are buffered until a full batch is
+    available, and the remaining images are returned by :meth:`flush`. If
+    `batch_size` is None, images are returned as they are.
+
+    Args:
+        batch_size (int, optional): Number of images of each output batch.
+            Defaults to None.
+    """
+
+    def __init__(self, batch_size=None):
+        assert batch_size is None or batch_size > 0, (
+            f'\'batch_size\' must be None or positive, but receive '
+            f'\'{batch_size}\'.')
+        self.batch_size = batch_size
+        self.reset()
+
+    def __len__(self):
+        """Number of buffered images."""
+        return self.num_pending
+
+    def reset(self):
+        """Drop the buffered images and reset the counter of images."""
+        self._pending = []
+        self.num_pending = 0
+        self.num_emitted = 0
+
+    def add(self, images):
+        """Add a batch of images and get the full batches.
+
+        Args:
+            images (Tensor): Images with shape [N, C, H, W].
+
+        Returns:
+            list[tuple[int, Tensor]]: Full batches and the index of their
+                first image among all added images.
+        """
+        if self.batch_size is None:
+            batches = [(self.num_emitted, images)]
+            self.num_emitted += images.shape[0]
+            return batches
+
+        self._pending.append(images)
+        self.num_pending += images.shape[0]
+        if self.num_pending < self.batch_size:
+            return []
+        images = torch.cat(self._pending, dim=0)
+        batches = []
+        while images.shape[0] >= self.batch_size:
+            batches.append((self.num_emitted, images[:self.batch_size]))
+            self.num_emitted += self.batch_size
+            images = images[self.batch_size:]
+        self._pending = [images] if images.shape[0] > 0 else []
+        self.num_pending = images.shape[0]
+        return batches
+
+    def flush(self):
+        """Get the buffered images as the last (partial) batch.
+
+        Returns:
+            tuple[int, Tensor] | None: The batch and the index of its first
+                image. None if no image is buffered.
+        """
+        if self.num_pending == 0:
+            return None
+        batch = (self.num_emitted, torch.cat(self._pending, dim=0))
+        self.num_emitted += self.num_pending
+        self._pending = []
+        self.num_pending = 0
+        return batch
+
+
+@torch.no_grad()
+def find_max_batch_size(forward_fn,
+                        image,
+                        min_batch_size=1,
+                        max_batch_size=1024):
+    """Find the largest batch size with which ``forward_fn`` fits into the
+    memory. The batch size is doubled from `min_batch_size` until an
+    out-of-memory error is raised or `max_batch_size` is exceeded.
+
+    Args:
+        forward_fn (Callable): Function to forward a batch of images.
+        image (Tensor): An image with shape [C, H, W] to build batches.
+        min_batch_size (int): The initial batch size. Defaults to 1.
+        max_batch_size (int): The maximum batch size. Defaults to 1024.
+
+    Returns:
+        int: The largest batch size which fits into the memory.
+    """
+    batch_size, max_fit = min_batch_size, None
+    while batch_size <= max_batch_size:
+        batch = image[None].expand(batch_size, *image.shape).contiguous()
+        try:
+            forward_fn(batch)
+        except RuntimeError as err:
+            if 'out of memory' not in str(err):
+                raise
+            break
+        finally:
+            del batch
+        max_fit = batch_size
+        batch_size *= 2
+    if torch.cuda.is_available():
+        torch.cuda.empty_cache()
+    if max_fit is None:
+        raise RuntimeError('Out of memory with the minimum batch size '
+                           f'\'{min_batch_size}\'.')
+    return max_fit
+
+
 def _hox_downsample(img):
     r"""Downsample images with factor equal to 0.5.
 
@@ -195,12 +308,18 @@ def get_descriptors_for_minibatch(minibatch, nhood_size, nhoods_per_image):
     assert len(S) == 4 and S[1] == 3
     N = nhoods_per_image * S[0]
     H = nhood_size // 2
-    nhood, chan, x, y = np.ogrid[0:N, 0:3, -H:H + 1, -H:H + 1]
+    # sample patch centers on the device of the images
+    device = minibatch.device
+    offset = torch.arange(-H, H + 1, device=device)
+    nhood = torch.arange(N, device=device).view(N, 1, 1, 1)
+    chan = torch.arange(3, device=device).view(1, 3, 1, 1)
+    x = offset.view(1, 1, 1, -1) + torch.randint(
+        H, S[3] - H, size=(N, 1, 1, 1), device=device)
+    y = offset.view(1, 1, -1, 1) + torch.randint(
+        H, S[2] - H, size=(N, 1, 1, 1), device=device)
     img = nhood // nhoods_per_image
-    x = x + np.random.randint(H, S[3] - H, size=(N, 1, 1, 1))
-    y = y + np.random.randint(H, S[2] - H, size=(N, 1, 1, 1))
     idx = ((img * S[1] + chan) * S[2] + y) * S[3] + x
-    return minibatch.view(-1)[idx]
+    return minibatch.reshape(-1)[idx]
 
 
 def finalize_descriptors(desc):
@@ -223,6 +342,32 @@ def finalize_descriptors(desc):
     return desc
 
 
+def sliced_wasserstein_from_histograms(hist_a, hist_b, bin_width):
+    r"""Sliced Wasserstein distance of two sets of patches from the histograms
+    of their projections on the same directions and bins.
+
+    For each direction, the 1D Wasserstein-1 distance equals the integral of
+    the absolute difference between the two CDFs, which is computed on the
+    bin edges. The error caused by the binning is no more than the bin width.
+
+    Args:
+        hist_a (Tensor): Histograms of the first distribution with shape
+            [num_dirs, num_bins].
+        hist_b (Tensor): Histograms of the second distribution with shape
+            [num_dirs, num_bins].
+        bin_width (Tensor): Bin width of each direction with shape
+            [num_dirs].
+
+    Returns:
+        float: sliced Wasserstein distance.
+    """
+    assert hist_a.shape == hist_b.shape
+    cdf_a = hist_a.cumsum(dim=1) / hist_a.sum(dim=1, keepdim=True)
+    cdf_b = hist_b.cumsum(dim=1) / hist_b.sum(dim=1, keepdim=True)
+    dists = (cdf_a - cdf_b).abs().sum(dim=1) * bin_width
+    return dists.mean().item()
+
+
 def compute_pr_distances(row_features,
                          col_features,
                          num_gpus=1,
@@ -250,6 +395,330 @@ def compute_pr_distances(row_features,
     return torch.cat(dist_batches, dim=1)[:, :num_cols] if rank == 0 else None
 
 
+def compute_kth_radii(features, k, row_batch_size=10000, col_batch_size=10000):
+    """Compute the distance from each feature to its k-th nearest neighbour
+    in the feature set, which is the radius of the hypersphere used to
+    estimate the manifold in Precision and Recall metric.
+
+    Args:
+        features (Tensor): Features with shape [N, D].
+        k (int): The k-th nearest neighbour.
+        row_batch_size (int): The batch size of row data. Defaults to 10000.
+        col_batch_size (int): The batch size of col data. Defaults to 10000.
+
+    Returns:
+        Tensor: The radii in float16 with shape [N].
+    """
+    kth = []
+    for row_batch in features.split(row_batch_size):
+        distance = compute_pr_distances(
+            row_features=row_batch,
+            col_features=features,
+            col_batch_size=col_batch_size)
+        kth.append(
+            distance.to(torch.float32).kthvalue(k + 1).values.to(
+                torch.float16))
+    return torch.cat(kth)
+
+
+def sqrtm_psd(mat):
+    """Square root of a symmetric positive semi-definite matrix via
+    eigendecomposition in float64. Negative eigenvalues caused by numerical
+    error are clipped to zero.
+
+    Args:
+        mat (np.ndarray): Symmetric matrix with shape [D, D].
+
+    Returns:
+        np.ndarray: Symmetric square root of the input matrix.
+    """
+    mat = np.asarray(mat, dtype=np.float64)
+    eigvals, eigvecs = np.linalg.eigh((mat + mat.T) / 2)
+    return (eigvecs * np.sqrt(np.clip(eigvals, 0, None))) @ eigvecs.T
+
+
+def frechet_distance_sym(sample_mean,
+                         sample_cov,
+                         real_mean,
+                         real_cov,
+                         real_cov_sqrt=None):
+    r"""Fréchet distance between two Gaussians with the symmetric form.
+
+    :math:`Tr(\sqrt{\Sigma_1 \Sigma_2})` equals the sum of the square roots
+    of the eigenvalues of the symmetric PSD matrix
+    :math:`\sqrt{\Sigma_2} \Sigma_1 \sqrt{\Sigma_2}`, which only needs a
+    symmetric eigendecomposition instead of the general ``scipy.linalg.sqrtm``.
+
+    Args:
+        sample_mean (np.ndarray): Mean of the sample features.
+        sample_cov (np.ndarray): Covariance of the sample features.
+        real_mean (np.ndarray): Mean of the real features.
+        real_cov (np.ndarray): Covariance of the real features.
+        real_cov_sqrt (np.ndarray, optional): Precomputed square root of
+            ``real_cov`` by :func:`sqrtm_psd`. Defaults to None.
+
+    Returns:
+        tuple[float]: The Fréchet distance, the squared norm of the mean
+            difference and the trace term.
+    """
+    sample_cov = np.asarray(sample_cov, dtype=np.float64)
+    real_cov = np.asarray(real_cov, dtype=np.float64)
+    if real_cov_sqrt is None:
+        real_cov_sqrt = sqrtm_psd(real_cov)
+    mat = real_cov_sqrt @ sample_cov @ real_cov_sqrt
+    eigvals = np.linalg.eigvalsh((mat + mat.T) / 2)
+    trace_sqrt = np.sqrt(np.clip(eigvals, 0, None)).sum()
+
+    mean_diff = np.asarray(
+        sample_mean, dtype=np.float64) - np.asarray(
+            real_mean, dtype=np.float64)
+    mean_norm = mean_diff @ mean_diff
+    trace = np.trace(sample_cov) + np.trace(real_cov) - 2 * trace_sqrt
+    return float(mean_norm + trace), float(mean_norm), float(trace)
+
+
+def _poly_kernel_sum(x, y, block_size, exclude_diag=False):
+    """Sum of the cubic polynomial kernel :math:`(x^T y / d + 1)^3` between
+    all rows of ``x`` and ``y``. Rows of ``x`` are processed in blocks, so
+    only a [block_size, M] kernel block is in memory at the same time.
+
+    Args:
+        x (Tensor): Features with shape [N, D].
+        y (Tensor): Features with shape [M, D].
+        block_size (int): Number of rows of ``x`` in each block.
+        exclude_diag (bool): Whether to exclude the diagonal of the kernel
+            matrix, ``x`` and ``y`` must be the same if True. Defaults to
+            False.
+
+    Returns:
+        Tensor: Sum of the kernel values.
+    """
+    feat_dim = x.shape[1]
+    total = x.new_zeros(())
+    for start in range(0, x.shape[0], block_size):
+        kernel = (x[start:start + block_size] @ y.t() / feat_dim + 1)**3
+        total += kernel.sum()
+    if exclude_diag:
+        total -= ((x * x).sum(dim=1) / feat_dim + 1).pow(3).sum()
+    return total
+
+
+def poly_mmd2(x, y, block_size=1000):
+    """Unbiased estimator of squared MMD with the cubic polynomial kernel,
+    which is used in Kernel Inception Distance.
+
+    Ref: https://github.com/NVlabs/stylegan2-ada-pytorch/blob/main/metrics/kernel_inception_distance.py  # noqa
+
+    Args:
+        x (Tensor): Features of one distribution with shape [N, D].
+        y (Tensor): Features of another distribution with shape [N, D].
+        block_size (int): Number of rows in each block of kernel matrix.
+            Defaults to 1000.
+
+    Returns:
+        float: The squared MMD.
+    """
+    assert x.shape == y.shape, (
+        'The shape of two feature sets must be the same, but receive '
+        f'\'{x.shape}\' and \'{y.shape}\'.')
+    num = x.shape[0]
+    kxx = _poly_kernel_sum(x, x, block_size, exclude_diag=True)
+    kyy = _poly_kernel_sum(y, y, block_size, exclude_diag=True)
+    kxy = _poly_kernel_sum(x, y, block_size)
+    mmd2 = (kxx + kyy) / (num * (num - 1)) - 2 * kxy / (num * num)
+    return float(mmd2)
+
+
+def _nearest_centroid(features, centroids, batch_size=10000):
+    """Index of the nearest centroid of each feature."""
+    return torch.cat([
+        torch.cdist(feat.float(), centroids).argmin(dim=1)
+        for feat in features.split(batch_size)
+    ])
+
+
+def build_ivf_index(features,
+                    num_lists,
+                    num_iters=10,
+                    seed=0,
+                    batch_size=10000):
+    """Build an IVF (inverted file) index for approximate nearest neighbour
+    search. Features are clustered by k-means into ``num_lists`` lists, and
+    the covering radius of each list is recorded to bound the distances
+    between queries and the members of the list.
+
+    Args:
+        features (Tensor): Features to index with shape [N, D].
+        num_lists (int): Number of lists (k-means clusters).
+        num_iters (int): Number of k-means iterations. Defaults to 10.
+        seed (int): Random seed to initialize k-means. Defaults to 0.
+        batch_size (int): Batch size to compute the distances to centroids.
+            Defaults to 10000.
+
+    Returns:
+        dict: The index, contains the centroids, the member indices of each
+            list and the covering radius of each list.
+    """
+    num_feats = features.shape[0]
+    num_lists = max(1, min(num_lists, num_feats))
+    generator = torch.Generator().manual_seed(seed)
+    # k-means on a subset is enough for a coarse quantizer
+    num_train = min(num_feats, num_lists * 64)
+    train_idx = torch.randperm(num_feats, generator=generator)[:num_train]
+    train_feats = features[train_idx.to(features.device)].float()
+    centroids = train_feats[:num_lists].clone()
+    for _ in range(num_iters):
+        assign = _nearest_centroid(train_feats, centroids, batch_size)
+        sums = torch.zeros_like(centroids).index_add_(0, assign, train_feats)
+        counts = torch.bincount(assign, minlength=num_lists)
+        nonempty = counts > 0
+        centroids[nonempty] = sums[nonempty] / counts[nonempty, None]
+
+    assign = _nearest_centroid(features, centroids, batch_size)
+    dist = torch.cat([(feat.float() - centroids[assign_]).norm(dim=1)
+                      for feat, assign_ in zip(
+                          features.split(batch_size), assign.split(batch_size))
+                      ])
+    counts = torch.bincount(assign, minlength=num_lists).tolist()
+    lists = list(torch.argsort(assign).split(counts))
+    radius = torch.stack([
+        dist[members].max() if members.numel() > 0 else dist.new_zeros(())
+        for members in lists
+    ])
+    return dict(centroids=centroids, lists=lists, radius=radius)
+
+
+def ivf_knn_radii(index, manifold, queries, k, nprobe=8, batch_size=10000):
+    """Approximate distance from each query to its k-th nearest neighbour in
+    the manifold with the IVF index.
+
+    Lists are probed in the order of the distance between the query and the
+    centroids. By the triangle inequality, members of an unprobed list are
+    not closer than `dist(query, centroid) - radius`. Probing stops once this
+    bound of every unprobed list exceeds the current k-th distance, where the
+    result is certified to be exact, or after ``nprobe`` lists. Uncertified
+    results are upper bounds of the exact distances.
+
+    Args:
+        index (dict): The index of ``manifold`` built by
+            :func:`build_ivf_index`.
+        manifold (Tensor): The indexed features with shape [N, D].
+        queries (Tensor): Query features with shape [M, D].
+        k (int): Return the (k+1)-th smallest distance, which is the distance
+            to the k-th neighbour if queries are the manifold itself.
+        nprobe (int): Maximum number of probed lists of certified queries.
+            Lists are probed until at least k + 1 neighbours are found.
+            Defaults to 8.
+        batch_size (int): Number of queries processed in each batch.
+            Defaults to 10000.
+
+    Returns:
+        Tuple[Tensor]: The k-th distances and whether they are certified to be
+            exact.
+    """
+    num_lists = len(index['lists'])
+    kth_list, certified_list = [], []
+    for query in queries.split(batch_size):
+        query = query.float()
+        dist_qc = torch.cdist(query, index['centroids'])
+        order = dist_qc.argsort(dim=1)
+        lower_bound = dist_qc - index['radius']
+        best = query.new_full((query.shape[0], k + 1), float('inf'))
+        probed = torch.zeros_like(dist_qc, dtype=torch.bool)
+        active = torch.ones_like(best[:, 0], dtype=torch.bool)
+        for rnd in range(num_lists):
+            if not active.any():
+                break
+            list_ids = order[:, rnd]
+            for list_id in list_ids[active].unique().tolist():
+                mask = active & (list_ids == list_id)
+                probed[mask, list_id] = True
+                members = index['lists'][list_id]
+                if members.numel() == 0:
+                    continue
+                dist = torch.cdist(query[mask], manifold[members].float())
+                best[mask] = torch.cat([best[mask], dist], dim=1).topk(
+                    k + 1, dim=1, largest=False).values
+            kth = best[:, k]
+            remaining = lower_bound.masked_fill(probed, float('inf'))
+            certified = remaining.min(dim=1).values >= kth
+            active = ~certified & ((rnd + 1 < nprobe) | torch.isinf(kth))
+        kth_list.append(kth)
+        certified_list.append(certified)
+    return torch.cat(kth_list), torch.cat(certified_list)
+
+
+def ivf_manifold_membership(index,
+                            manifold,
+                            radii,
+                            radii_certified,
+                            probes,
+                            nprobe=8,
+                            batch_size=10000):
+    """Approximate whether each probe is in the estimated manifold, i.e.
+    within the radius of any manifold feature, with the IVF index.
+
+    Lists which cannot contain a covering feature by the triangle inequality
+    are skipped, and at most ``nprobe`` lists are probed for each probe. The
+    result of a probe is uncertain if it is not covered while some reachable
+    lists are not probed, or it is only covered by features whose radii are
+    not certified. The fraction of uncertain probes bounds the error of the
+    estimated precision or recall.
+
+    Args:
+        index (dict): The index of ``manifold`` built by
+            :func:`build_ivf_index`.
+        manifold (Tensor): The indexed features with shape [N, D].
+        radii (Tensor): Radii of manifold features with shape [N].
+        radii_certified (Tensor): Whether the radii are exact.
+        probes (Tensor): Probe features with shape [M, D].
+        nprobe (int): Maximum number of probed lists. Defaults to 8.
+        batch_size (int): Number of probes processed in each batch.
+            Defaults to 10000.
+
+    Returns:
+        Tuple[Tensor]: Whether probes are in the manifold and whether the
+            results are uncertain.
+    """
+    num_lists = len(index['lists'])
+    max_radii = torch.stack([
+        radii[members].max()
+        if members.numel() > 0 else radii.new_tensor(-float('inf'))
+        for members in index['lists']
+    ])
+    pred_list, uncertain_list = [], []
+    for probe in probes.split(batch_size):
+        probe = probe.float()
+        dist_pc = torch.cdist(probe, index['centroids'])
+        order = dist_pc.argsort(dim=1)
+        reachable = dist_pc - index['radius'] <= max_radii
+        found = torch.zeros_like(dist_pc[:, 0], dtype=torch.bool)
+        found_certain = torch.zeros_like(found)
+        probed = torch.zeros_like(reachable)
+        active = torch.ones_like(found)
+        for rnd in range(num_lists):
+            if not active.any():
+                break
+            list_ids = order[:, rnd]
+            for list_id in list_ids[active].unique().tolist():
+                mask = active & (list_ids == list_id)
+                probed[mask, list_id] = True
+                mask &= reachable[:, list_id]
+                members = index['lists'][list_id]
+                if members.numel() == 0 or not mask.any():
+                    continue
+                dist = torch.cdist(probe[mask], manifold[members].float())
+                covered = dist <= radii[members]
+                found[mask] = found[mask] | covered.any(dim=1)
+                found_certain[mask] = found_certain[mask] | (
+                    covered & radii_certified[members]).any(dim=1)
+            pending = (reachable & ~probed).any(dim=1)
+            active = ~found & pending & (rnd + 1 < nprobe)
+        pred_list.append(found)
+        uncertain_list.append((found & ~found_certain) | (~found & pending))
+    return torch.cat(pred_list), torch.cat(uncertain_list)
+
+
 def normalize(a):
     """L2 normalization.
 
@@ -458,6 +927,164 @@ def ms_ssim(img1,
     return results
 
 
+def _gaussian_window_1d(size, sigma):
+    """1D Gaussian window. The outer product of the window with itself equals
+    :func:`_f_special_gauss`."""
+    radius = size // 2
+    offset = 0.5 if size % 2 == 0 else 0.0
+    x = np.arange(offset - radius, radius + 1 - 2 * offset)
+    assert len(x) == size
+    g = np.exp(-(x**2) / (2.0 * sigma**2))
+    return g / g.sum()
+
+
+def _ssim_for_multi_scale_torch(img1,
+                                img2,
+                                max_val=255,
+                                filter_size=11,
+                                filter_sigma=1.5,
+                                k1=0.01,
+                                k2=0.03):
+    """Calculate SSIM (structural similarity) and contrast sensitivity with
+    torch. Same as :func:`_ssim_for_multi_scale` but images are in order
+    "NCHW", and the Gaussian blur is applied by separable depthwise
+    convolutions on the device of the input images.
+
+    Args:
+        img1 (Tensor): Images with range [0, 255] and order "NCHW".
+        img2 (Tensor): Images with range [0, 255] and order "NCHW".
+        max_val (int): the dynamic range of the images. Default to 255.
+        filter_size (int): Size of blur kernel to use (will be reduced for
+            small images). Default to 11.
+        filter_sigma (float): Standard deviation for Gaussian blur kernel (will
+            be reduced for small images). Default to 1.5.
+        k1 (float): Constant used to maintain stability in the SSIM
+            calculation. Default to 0.01.
+        k2 (float): Constant used to maintain stability in the SSIM
+            calculation. Default to 0.03.
+
+    Returns:
+        tuple: Pair containing the mean SSIM and contrast sensitivity between
+        `img1` and `img2`.
+    """
+    num_channels, height, width = img1.shape[1:]
+
+    # Filter size can't be larger than height or width of images.
+    size = min(filter_size, height, width)
+
+    # Scale down sigma if a smaller filter size is used.
+    sigma = size * filter_sigma / filter_size if filter_size else 0
+
+    # blur img1, img2, img1^2, img2^2 and img1*img2 in one batch
+    maps = torch.cat([img1, img2, img1 * img1, img2 * img2, img1 * img2],
+                     dim=1)
+    if filter_size:
+        window = torch.from_numpy(_gaussian_window_1d(size, sigma)).to(maps)
+        groups = maps.shape[1]
+        maps = F.conv2d(
+            maps,
+            window.view(1, 1, 1, size).repeat(groups, 1, 1, 1),
+            groups=groups)
+        maps = F.conv2d(
+            maps,
+            window.view(1, 1, size, 1).repeat(groups, 1, 1, 1),
+            groups=groups)
+    mu1, mu2, sigma11, sigma22, sigma12 = maps.split(num_channels, dim=1)
+
+    mu11 = mu1 * mu1
+    mu22 = mu2 * mu2
+    mu12 = mu1 * mu2
+    sigma11 = sigma11 - mu11
+    sigma22 = sigma22 - mu22
+    sigma12 = sigma12 - mu12
+
+    # Calculate intermediate values used by both ssim and cs_map.
+    c1 = (k1 * max_val)**2
+    c2 = (k2 * max_val)**2
+    v1 = 2.0 * sigma12 + c2
+    v2 = sigma11 + sigma22 + c2
+    ssim = (((2.0 * mu12 + c1) * v1) / ((mu11 + mu22 + c1) * v2)).mean(
+        dim=(1, 2, 3))  # Return for each image individually.
+    cs = (v1 / v2).mean(dim=(1, 2, 3))
+    return ssim, cs
+
+
+def ms_ssim_torch(img1,
+                  img2,
+                  max_val=255,
+                  filter_size=11,
+                  filter_sigma=1.5,
+                  k1=0.01,
+                  k2=0.03,
+                  weights=None,
+                  reduce_mean=True):
+    """Calculate MS-SSIM (multi-scale structural similarity) with torch.
+
+    Same as :func:`ms_ssim`, but the whole batch is processed on the device
+    of the input images.
+
+    Args:
+        img1 (Tensor): Images with range [0, 255] and order "NCHW".
+        img2 (Tensor): Images with range [0, 255] and order "NCHW".
+        max_val (int): the dynamic range of the images. Default to 255.
+        filter_size (int): Size of blur kernel to use (will be reduced for
+            small images). Default to 11.
+        filter_sigma (float): Standard deviation for Gaussian blur kernel (will
+            be reduced for small images). Default to 1.5.
+        k1 (float): Constant used to maintain stability in the SSIM
+            calculation. Default to 0.01.
+        k2 (float): Constant used to maintain stability in the SSIM
+            calculation. Default to 0.03.
+        weights (list): List of weights for each level; if none, use five
+            levels and the weights from the original paper. Default to None.
+
+    Returns:
+        Tensor: MS-SSIM score between `img1` and `img2`.
+    """
+    if img1.shape != img2.shape:
+        raise RuntimeError(
+            'Input images must have the same shape (%s vs. %s).' %
+            (img1.shape, img2.shape))
+    if img1.ndim != 4:
+        raise RuntimeError('Input images must have four dimensions, not %d' %
+                           img1.ndim)
+
+    weights = torch.tensor(
+        weights if weights else [0.0448, 0.2856, 0.3001, 0.2363, 0.1333],
+        dtype=torch.float32,
+        device=img1.device)
+    levels = weights.numel()
+    im1, im2 = img1.float(), img2.float()
+    mssim = []
+    mcs = []
+    for _ in range(levels):
+        ssim, cs = _ssim_for_multi_scale_torch(
+            im1,
+            im2,
+            max_val=max_val,
+            filter_size=filter_size,
+            filter_sigma=filter_sigma,
+            k1=k1,
+            k2=k2)
+        mssim.append(ssim)
+        mcs.append(cs)
+        im1, im2 = [(x[:, :, 0::2, 0::2] + x[:, :, 1::2, 0::2] +
+                     x[:, :, 0::2, 1::2] + x[:, :, 1::2, 1::2]) * 0.25
+                    for x in [im1, im2]]
+
+    # Clip to zero. Otherwise we get NaNs.
+    mssim = torch.stack(mssim).clamp(min=0)
+    mcs = torch.stack(mcs).clamp(min=0)
+
+    results = torch.prod(
+        mcs[:-1]**weights[:-1, None], dim=0) * (
+            mssim[-1]**weights[-1])
+    if reduce_mean:
+        # Average over images only at the end.
+        results = results.mean()
+    return results
+
+
 def sliced_wasserstein(distribution_a,
                        distribution_b,
                        dir_repeats=4,
@@ -5,7 +5,8 @@ import warnings
 from abc import ABCMeta
 from collections import defaultdict
 from copy import deepcopy
-from typing import Any, Iterator, List, Optional, Sequence, Tuple, Union
+from typing import (Any, Callable, Iterator, List, Optional, Sequence, Tuple,
+                    Union)
 
 import numpy as np
 import torch
@@ -13,8 +14,9 @@ import torch.nn as nn
 import torch.nn.functional as F
 from mmengine import is_list_of, print_log
 from mmengine.data import pseudo_collate
-from mmengine.dist import (all_gather, broadcast_object_list, collect_results,
-                           get_dist_info, get_world_size, is_main_process)
+from mmengine.dist import (all_gather, all_reduce, broadcast_object_list,
+                           collect_results, get_dist_info, get_world_size,
+                           is_main_process)
 from mmengine.evaluator import BaseMetric
 from mmengine.model import is_model_wrapper
 from PIL import Image
@@ -29,18 +31,97 @@ from mmgen.models.architectures.lpips import PerceptualLoss
 from mmgen.registry import METRICS
 from mmgen.typing import ForwardInputs, ForwardOutputs, ValTestStepInputs
 from .inception_utils import (disable_gpu_fuser_on_pt19, load_inception,
-                              prepare_inception_feat, prepare_vgg_feat)
-from .metric_utils import (compute_pr_distances, finalize_descriptors,
-                           get_descriptors_for_minibatch, get_gaussian_kernel,
-                           laplacian_pyramid, ms_ssim, slerp,
-                           sliced_wasserstein)
+                              load_shared_extractor, prepare_inception_feat,
+                              prepare_vgg_feat)
+# yapf: disable
+from .metric_utils import (ImageAccumulator, build_ivf_index,
+                           compute_kth_radii, compute_pr_distances,
+                           finalize_descriptors, find_max_batch_size,
+                           frechet_distance_sym, get_descriptors_for_minibatch,
+                           get_gaussian_kernel, ivf_knn_radii,
+                           ivf_manifold_membership, laplacian_pyramid,
+                           ms_ssim_torch, poly_mmd2, slerp, sliced_wasserstein,
+                           sliced_wasserstein_from_histograms, sqrtm_psd)
 
 from mmgen.models.architectures.common import get_module_device  # isort:skip  # noqa
+# yapf: enable
+
+
+class ResultBuffer:
+    """Preallocated buffer for tensor results of metrics. Instead of splitting
+    each batch into per-image tensors and appending them to a list, results
+    are written to a contiguous tensor by slice assignment, and can be
+    gathered across ranks as a whole.
+
+    The storage is allocated when the first batch is added, with the shape
+    ``(capacity, *batch.shape[1:])`` and on the same device as the batch.
+    Results beyond `capacity` are dropped. If `capacity` is None, the storage
+    grows geometrically as required. :meth:`clear` only resets the number of
+    results, and the storage is reused in the next evaluation.
+
+    Args:
+        capacity (int, optional): Maximum number of results. Defaults to None.
+        dtype (torch.dtype, optional): Data type of the storage. If None, the
+            data type of the first batch will be used. Defaults to None.
+    """
+
+    def __init__(self,
+                 capacity: Optional[int] = None,
+                 dtype: Optional[torch.dtype] = None):
+        self.capacity = capacity
+        self.dtype = dtype
+        self._storage: Optional[Tensor] = None
+        self._num = 0
+
+    def __len__(self) -> int:
+        return self._num
+
+    @property
+    def data(self) -> Optional[Tensor]:
+        """Optional[Tensor]: View of the results in the buffer."""
+        if self._storage is None:
+            return None
+        return self._storage[:self._num]
+
+    def add(self, results: Tensor) -> None:
+        """Add a batch of results to the buffer.
+
+        Args:
+            results (Tensor): Results in shape like (N, ...).
+        """
+        results = results.detach()
+        if self.capacity is not None:
+            results = results[:self.capacity - self._num]
+        num = results.shape[0]
+        if num == 0:
+            return
+
+        if self._storage is None:
+            size = num if self.capacity is None else self.capacity
+            dtype = self.dtype or results.dtype
+            self._storage = results.new_empty((size, *results.shape[1:]),
+                                              dtype=dtype)
+        elif self._num + num > self._storage.shape[0]:
+            size = max(self._num + num, 2 * self._storage.shape[0])
+            storage = self._storage.new_empty((size, *self._storage.shape[1:]))
+            storage[:self._num] = self._storage[:self._num]
+            self._storage = storage
+        self._storage[self._num:self._num + num] = results
+        self._num += num
+
+    def clear(self) -> None:
+        """Remove all results and keep the storage."""
+        self._num = 0
 
 
 class GenMetric(BaseMetric):
     """Metric for MMGeneration.
 
+    Results are stored in :attr:`fake_results` and :attr:`real_results`,
+    which are lists by default. Metrics whose results are tensors of the same
+    shape can use a :class:`ResultBuffer` instead to avoid per-sample tensors,
+    and :meth:`_concat_results` handles both kinds of results.
+
     Args:
         fake_nums (int): Numbers of the generated image need for the metric.
         real_nums (int): Numbers of the real image need for the metric. If `-1`
@@ -80,6 +161,34 @@ class GenMetric(BaseMetric):
         self.real_results: List[Any] = []
         self.fake_results: List[Any] = []
 
+        # outputs of feature extractors shared with other metrics of the
+        # same evaluator, set and cleared by `GenEvaluator` for each batch
+        self.feature_cache: Optional[dict] = None
+
+    def forward_with_cache(self, key: tuple, forward_fn: Callable,
+                           *args) -> Tensor:
+        """Call ``forward_fn`` with ``args`` or reuse the output computed by
+        another metric for the current batch. Metrics whose feature extractor
+        and input images are identical (e.g. FID and KID with the same
+        Inception) should use the same ``key``, so that the backbone only runs
+        once per batch.
+
+        Args:
+            key (tuple): The key of the output, which should contain the
+                identity of the feature extractor, the kind of output and
+                everything decides the input images.
+            forward_fn (Callable): Function to compute the output.
+            *args: Arguments passed to ``forward_fn``.
+
+        Returns:
+            Tensor: The output of ``forward_fn``.
+        """
+        if self.feature_cache is None:
+            return forward_fn(*args)
+        if key not in self.feature_cache:
+            self.feature_cache[key] = forward_fn(*args)
+        return self.feature_cache[key]
+
     @property
     def real_nums_per_device(self):
         """Number of real images need for current device."""
@@ -112,21 +221,44 @@ class GenMetric(BaseMetric):
                 ' Please ensure that the processed results are properly added '
                 f'into `self.{target}_results` in `process` method.')
 
-        if is_list_of(results, Tensor):
+        if isinstance(results, ResultBuffer):
+            # results are contiguous already, gather them as a whole and do
+            # not split them into per-sample tensors
+            results = [torch.cat(all_gather(results.data), dim=0)[:size]]
+            results_num = results[0].shape[0]
+        elif is_list_of(results, Tensor):
             # apply all_gather for tensor results
             results = torch.cat(results, dim=0)
             results = torch.cat(all_gather(results), dim=0)[:size]
             results = torch.split(results, 1)
+            results_num = len(results)
         else:
             # apply collect_results (all_gather_object) for non-tensor results
             results = collect_results(results, size, self.collect_device)
+            results_num = len(results) if results is not None else 0
 
         # on non-main process, results should be `None`
-        if is_main_process() and len(results) != size:
-            raise ValueError(f'Length of results is \'{len(results)}\', not '
+        if is_main_process() and results_num != size:
+            raise ValueError(f'Length of results is \'{results_num}\', not '
                              f'equals to target size \'{size}\'.')
         return results
 
+    @staticmethod
+    def _concat_results(
+            results: Union[ResultBuffer, Sequence[Tensor]]) -> Tensor:
+        """Concatenate tensor results to one tensor.
+
+        Args:
+            results (ResultBuffer | Sequence[Tensor]): The result buffer or
+                list of tensor results.
+
+        Returns:
+            Tensor: The concatenated results.
+        """
+        if isinstance(results, ResultBuffer):
+            return results.data
+        return torch.cat(list(results), dim=0)
+
     def evaluate(self) -> dict:
         """Evaluate the model performance of the whole dataset after processing
         all batches. Different like :class:`~mmengine.evaluator.BaseMetric`,
@@ -244,6 +376,22 @@ class SlicedWassersteinDistance(GenMetric):
             names to disambiguate homonymous metrics of different evaluators.
             If prefix is not provided in the argument, self.default_prefix
             will be used instead. Defaults to None.
+        streaming (bool): Whether to only keep histograms of the descriptors
+            projected on fixed directions instead of the descriptors. The
+            directions are sampled once with `seed`. The channel statistics
+            to normalize descriptors and the range of bins are estimated from
+            the first batch of each evaluation, and histograms are
+            all-reduced across ranks, therefore the memory cost does not
+            depend on `fake_nums`. The range of bins is the range of the
+            first batch with a margin of 50% on both sides. Projections in
+            the range have a binning error of no more than the bin width,
+            while projections out of the range are clamped into the edge
+            bins, and their errors are not bounded. The number of clamped
+            projections is counted and warned. Defaults to False.
+        num_bins (int): Number of histogram bins of each direction in
+            streaming mode. Defaults to 4096.
+        seed (int): Random seed to sample the projection directions in
+            streaming mode. Defaults to 0.
     """
 
     name = 'SWD'
@@ -255,7 +403,10 @@ class SlicedWassersteinDistance(GenMetric):
                  real_key: Optional[str] = 'img',
                  sample_model: str = 'ema',
                  collect_device: str = 'cpu',
-                 prefix: Optional[str] = None):
+                 prefix: Optional[str] = None,
+                 streaming: bool = False,
+                 num_bins: int = 4096,
+                 seed: int = 0):
         super().__init__(fake_nums, fake_nums, fake_key, real_key,
                          sample_model, collect_device, prefix)
 
@@ -277,6 +428,12 @@ class SlicedWassersteinDistance(GenMetric):
 
         self._num_processed = 0
 
+        self.streaming = streaming
+        self.num_bins = num_bins
+        self.seed = seed
+        self._dirs = None
+        self._sketches = None
+
     def process(self, data_batch: Sequence[dict],
                 predictions: Sequence[dict]) -> None:
         """Process one batch of data samples and predictions. The processed
@@ -321,24 +478,104 @@ class SlicedWassersteinDistance(GenMetric):
         assert real_imgs.shape[1:] == self.image_shape
         real_pyramid = laplacian_pyramid(real_imgs, self.n_pyramids - 1,
                                          self.gaussian_k)
-        # lod: layer_of_descriptors
-        for lod, level in enumerate(real_pyramid):
-            desc = get_descriptors_for_minibatch(level, self.nhood_size,
-                                                 self.nhoods_per_image)
-            self.real_results[lod].append(desc.cpu())
-
         # fake images
         assert fake_imgs.shape[1:] == self.image_shape
         fake_pyramid = laplacian_pyramid(fake_imgs, self.n_pyramids - 1,
                                          self.gaussian_k)
+
         # lod: layer_of_descriptors
-        for lod, level in enumerate(fake_pyramid):
-            desc = get_descriptors_for_minibatch(level, self.nhood_size,
-                                                 self.nhoods_per_image)
-            self.fake_results[lod].append(desc.cpu())
+        levels = zip(real_pyramid, fake_pyramid)
+        for lod, (real_level, fake_level) in enumerate(levels):
+            real_desc = get_descriptors_for_minibatch(real_level,
+                                                      self.nhood_size,
+                                                      self.nhoods_per_image)
+            fake_desc = get_descriptors_for_minibatch(fake_level,
+                                                      self.nhood_size,
+                                                      self.nhoods_per_image)
+            if self.streaming:
+                self._update_sketch(lod, real_desc, fake_desc)
+            else:
+                self.real_results[lod].append(real_desc.cpu())
+                self.fake_results[lod].append(fake_desc.cpu())
 
         self._num_processed += real_img.shape[0]
 
+    def _update_sketch(self, lod: int, real_desc: Tensor,
+                       fake_desc: Tensor) -> None:
+        """Project descriptors of one level on the fixed directions and add
+        them to the histograms in streaming mode. The sketch of the level is
+        initialized with the first batch.
+
+        Args:
+            lod (int): The level of descriptors.
+            real_desc (Tensor): Descriptors of real images.
+            fake_desc (Tensor): Descriptors of fake images.
+        """
+        device = real_desc.device
+        if self._dirs is None:
+            generator = torch.Generator().manual_seed(self.seed)
+            feat_dim = real_desc[0].numel()
+            dirs = torch.randn(
+                feat_dim,
+                self.dir_repeats * self.dirs_per_repeat,
+                generator=generator)
+            self._dirs = dirs / dirs.norm(dim=0, keepdim=True)
+        if self._sketches is None:
+            self._sketches = [None for _ in self.resolutions]
+        dirs = self._dirs.to(device)
+
+        if self._sketches[lod] is None:
+            sketch = dict()
+            proj_list = []
+            for target, desc in [('real', real_desc), ('fake', fake_desc)]:
+                # channel statistics of the first batch, same on all ranks
+                mean = desc.mean(dim=(0, 2, 3))
+                std = desc.std(dim=(0, 2, 3))
+                all_reduce(mean, op='mean')
+                all_reduce(std, op='mean')
+                sketch[f'{target}_mean'] = mean
+                sketch[f'{target}_std'] = std
+                proj_list.append(
+                    self._project(desc, mean, std, dirs).to(torch.float64))
+            proj = torch.cat(proj_list)
+            low, high = proj.min(dim=0).values, proj.max(dim=0).values
+            all_reduce(low, op='min')
+            all_reduce(high, op='max')
+            # leave margins for samples out of the range of the first batch
+            margin = (high - low).clamp(min=1e-6) * 0.5
+            sketch['low'] = low - margin
+            sketch['bin_width'] = (high - low + 2 * margin) / self.num_bins
+            for target in ['real', 'fake']:
+                sketch[f'{target}_hist'] = torch.zeros(
+                    dirs.shape[1],
+                    self.num_bins,
+                    dtype=torch.float64,
+                    device=device)
+                sketch[f'{target}_clamped'] = torch.tensor(
+                    0., dtype=torch.float64, device=device)
+            self._sketches[lod] = sketch
+
+        sketch = self._sketches[lod]
+        for target, desc in [('real', real_desc), ('fake', fake_desc)]:
+            proj = self._project(desc, sketch[f'{target}_mean'],
+                                 sketch[f'{target}_std'], dirs)
+            bins = ((proj.to(torch.float64) - sketch['low']) /
+                    sketch['bin_width']).floor_()
+            # projections out of the range are clamped into the edge bins
+            out_of_range = (bins < 0) | (bins >= self.num_bins)
+            sketch[f'{target}_clamped'] += out_of_range.sum()
+            bins = bins.long().clamp_(0, self.num_bins - 1)
+            sketch[f'{target}_hist'].scatter_add_(
+                1, bins.t(), torch.ones_like(bins.t(), dtype=torch.float64))
+
+    @staticmethod
+    def _project(desc: Tensor, mean: Tensor, std: Tensor,
+                 dirs: Tensor) -> Tensor:
+        """Normalize descriptors along channel and project them on the
+        directions."""
+        desc = (desc - mean.view(1, -1, 1, 1)) / std.view(1, -1, 1, 1)
+        return desc.reshape(desc.shape[0], -1) @ dirs
+
     def _collect_target_results(self, target: str) -> Optional[list]:
         """Collect function for SWD metric. This function support collect
         results typing as `List[List[Tensor]]`.
@@ -352,6 +589,27 @@ class SlicedWassersteinDistance(GenMetric):
         assert target in [
             'fake', 'real'
         ], ('Only support to collect \'fake\' or \'real\' results.')
+        if self.streaming:
+            # histograms and bin widths of each level
+            results_collected = []
+            for lod, sketch in enumerate(self._sketches):
+                hist = sketch[f'{target}_hist']
+                all_reduce(hist)
+                num_clamped = sketch[f'{target}_clamped']
+                all_reduce(num_clamped)
+                if num_clamped > 0:
+                    warnings.warn(
+                        f'{int(num_clamped)} of {int(hist.sum())} projections '
+                        f'of {target} descriptors at level {lod} are out of '
+                        'the range of histograms, and clamped into the edge '
+                        'bins.')
+                results_collected.append((hist, sketch['bin_width']))
+            if target == 'real':
+                # both targets are collected, reset for the next evaluation
+                self._sketches = None
+            self._num_processed = 0
+            return results_collected
+
         results = getattr(self, f'{target}_results')
         results_collected = []
         world_size = get_world_size()
@@ -379,15 +637,22 @@ class SlicedWassersteinDistance(GenMetric):
         Returns:
             dict: A dict of the computed SWD metric.
         """
-        fake_descs = [finalize_descriptors(d) for d in results_fake]
-        real_descs = [finalize_descriptors(d) for d in results_real]
-        distance = [
-            sliced_wasserstein(dreal, dfake, self.dir_repeats,
-                               self.dirs_per_repeat)
-            for dreal, dfake in zip(real_descs, fake_descs)
-        ]
-        del real_descs
-        del fake_descs
+        if self.streaming:
+            # each result is a tuple of the histogram and the bin width
+            distance = [
+                sliced_wasserstein_from_histograms(real[0], fake[0], real[1])
+                for real, fake in zip(results_real, results_fake)
+            ]
+        else:
+            fake_descs = [finalize_descriptors(d) for d in results_fake]
+            real_descs = [finalize_descriptors(d) for d in results_real]
+            distance = [
+                sliced_wasserstein(dreal, dfake, self.dir_repeats,
+                                   self.dirs_per_repeat)
+                for dreal, dfake in zip(real_descs, fake_descs)
+            ]
+            del real_descs
+            del fake_descs
 
         distance = [d * 1e3 for d in distance]  # multiply by 10^3
         result = distance + [np.mean(distance)]
@@ -402,6 +667,14 @@ class GenerativeMetric(GenMetric, metaclass=ABCMeta):
     """Metric for generative metrics. Except for the preparation phase
     (:meth:`prepare`), generative metrics do not need extra real images.
 
+    The batch size of the generator and the feature extractor are decoupled
+    from the batch size of the dataloader, which is usually tuned for the
+    memory of training. Images are generated with `gen_batch_size` images per
+    batch, and metrics with feature extractors can regroup images into
+    batches of `feature_batch_size` images with
+    :meth:`_forward_fake_images`. The remaining images are fed to the
+    extractor in :meth:`process_pending` before results are collected.
+
     Args:
         fake_nums (int): Numbers of the generated image need for the metric.
         real_nums (int): Numbers of the real image need for the metric. If `-1`
@@ -419,6 +692,14 @@ class GenerativeMetric(GenMetric, metaclass=ABCMeta):
             names to disambiguate homonymous metrics of different evaluators.
             If prefix is not provided in the argument, self.default_prefix
             will be used instead. Defaults to None.
+        gen_batch_size (int, optional): Number of images generated in each
+            batch. If not passed, the batch size of the dataloader will be
+            used. Defaults to None.
+        feature_batch_size (int | str, optional): Number of images fed to the
+            feature extractor in each batch. If 'auto', the largest batch
+            size fits into the memory is searched at the first batch (only
+            on CUDA devices). If not passed, images are fed to the extractor
+            as they are generated or loaded. Defaults to None.
     """
     SAMPLER_MODE = 'Generative'
 
@@ -429,9 +710,126 @@ class GenerativeMetric(GenMetric, metaclass=ABCMeta):
                  real_key: Optional[str] = 'img',
                  sample_model: str = 'ema',
                  collect_device: str = 'cpu',
-                 prefix: Optional[str] = None):
+                 prefix: Optional[str] = None,
+                 gen_batch_size: Optional[int] = None,
+                 feature_batch_size: Union[int, str, None] = None):
         super().__init__(fake_nums, real_nums, fake_key, real_key,
                          sample_model, collect_device, prefix)
+        assert gen_batch_size is None or gen_batch_size > 0, (
+            '\'gen_batch_size\' must be None or positive, but receive '
+            f'\'{gen_batch_size}\'.')
+        if isinstance(feature_batch_size, int):
+            assert feature_batch_size > 0, (
+                '\'feature_batch_size\' must be positive, but receive '
+                f'\'{feature_batch_size}\'.')
+        else:
+            assert feature_batch_size in (None, 'auto'), (
+                '\'feature_batch_size\' must be None, \'auto\' or an int, '
+                f'but receive \'{feature_batch_size}\'.')
+        self.gen_batch_size = gen_batch_size
+        self.feature_batch_size = feature_batch_size
+        self._tuned_feature_batch_size = None
+        self._fake_accumulator: Optional[ImageAccumulator] = None
+
+    def get_feature_batch_size(self, image: Tensor,
+                               forward_fn: Callable) -> Optional[int]:
+        """Get the number of images of each batch fed to the feature
+        extractor. If :attr:`feature_batch_size` is 'auto', the largest batch
+        size fits into the memory is searched with ``forward_fn`` at the first
+        call and reused afterwards. Batch sizes are only tuned on CUDA
+        devices, where running out of memory is recoverable.
+
+        Args:
+            image (Tensor): An image with shape like (C, H, W) to tune the
+                batch size.
+            forward_fn (Callable): Function to forward a batch of images.
+
+        Returns:
+            Optional[int]: The batch size of feature extraction. None means
+                images are fed to the extractor as they are.
+        """
+        if self.feature_batch_size != 'auto':
+            return self.feature_batch_size
+        if self._tuned_feature_batch_size is None:
+            if image.device.type == 'cuda':
+                batch_size = find_max_batch_size(forward_fn, image)
+                print_log(
+                    f'\'{self.name}\' tunes the feature batch size to '
+                    f'\'{batch_size}\'.', 'current')
+            else:
+                batch_size = -1
+                print_log(
+                    f'\'{self.name}\' only tunes the feature batch size on '
+                    'CUDA devices. Images are fed to the extractor as they '
+                    'are.', 'current')
+            self._tuned_feature_batch_size = batch_size
+        if self._tuned_feature_batch_size == -1:
+            return None
+        return self._tuned_feature_batch_size
+
+    @property
+    def supports_sample_cache(self) -> bool:
+        """Whether generated images can be loaded from
+        :class:`~mmgen.core.evaluation.sample_cache.GenSampleCache`, which
+        saves images quantized as ``(img * 127.5 + 128).clamp(0, 255)``.
+        Only metrics quantizing images in exactly this way before any other
+        operation get the same inputs from the cache. Defaults to False."""
+        return False
+
+    @property
+    def _num_pending_fakes(self) -> int:
+        """Number of fake images buffered for feature extraction."""
+        if self._fake_accumulator is None:
+            return 0
+        return len(self._fake_accumulator)
+
+    def _forward_fake_images(self, images: Tensor, key: tuple,
+                             forward_fn: Callable) -> List[Tensor]:
+        """Regroup fake images into batches of the feature batch size and
+        feed the full batches to ``forward_fn``. Outputs are shared with
+        other metrics by :meth:`forward_with_cache`, therefore the batch size
+        and the index of the first image are added to ``key``.
+
+        Args:
+            images (Tensor): A batch of fake images.
+            key (tuple): The key of the output in :attr:`feature_cache`.
+            forward_fn (Callable): Function to forward a batch of images.
+
+        Returns:
+            List[Tensor]: Outputs of the full batches. The list is empty if
+                the images are buffered.
+        """
+        if self._fake_accumulator is None:
+            self._fake_accumulator = ImageAccumulator(
+                self.get_feature_batch_size(images[0], forward_fn))
+        accumulator = self._fake_accumulator
+        return [
+            self.forward_with_cache(key + (accumulator.batch_size, start),
+                                    forward_fn, batch)
+            for start, batch in accumulator.add(images)
+        ]
+
+    def _flush_fake_images(self, forward_fn: Callable) -> Optional[Tensor]:
+        """Feed the buffered fake images to ``forward_fn``.
+
+        Args:
+            forward_fn (Callable): Function to forward a batch of images.
+
+        Returns:
+            Optional[Tensor]: Output of the buffered images. None if no image
+                is buffered.
+        """
+        if self._fake_accumulator is None:
+            return None
+        batch = self._fake_accumulator.flush()
+        if batch is None:
+            return None
+        return forward_fn(batch[1])
+
+    def process_pending(self) -> None:
+        """Process the fake images buffered by :meth:`_forward_fake_images`.
+        Called by :meth:`evaluate` before results are collected. Defaults to
+        do nothing."""
 
     def get_metric_sampler(self, model: nn.Module, dataloader: DataLoader,
                            metrics: GenMetric):
@@ -442,19 +840,27 @@ class GenerativeMetric(GenMetric, metaclass=ABCMeta):
         Args:
             model (nn.Module): Model to evaluate.
             dataloader (DataLoader): Dataloader for real images. Used to get
-                batch size during generate fake images.
+                batch size during generate fake images if `gen_batch_size` is
+                not set.
             metrics (List['GenMetric']): Metrics with the same sampler mode.
 
         Returns:
             :class:`dummy_iterator`: Sampler for generative metrics.
         """
 
-        batch_size = dataloader.batch_size
-
         sample_model = metrics[0].sample_model
         assert all([metric.sample_model == sample_model for metric in metrics
                     ]), ('\'sample_model\' between metrics is inconsistency.')
 
+        gen_batch_sizes = set([
+            metric.gen_batch_size for metric in metrics
+            if getattr(metric, 'gen_batch_size', None) is not None
+        ])
+        assert len(gen_batch_sizes) <= 1, (
+            '\'gen_batch_size\' between metrics is inconsistency.')
+        batch_size = gen_batch_sizes.pop() if gen_batch_sizes else \
+            dataloader.batch_size
+
         class dummy_iterator:
 
             def __init__(self, batch_size, max_length, sample_model) -> None:
@@ -492,6 +898,9 @@ class GenerativeMetric(GenMetric, metaclass=ABCMeta):
             dict: Evaluation metrics dict on the val dataset. The keys are the
                 names of the metrics, and the values are corresponding results.
         """
+        self.process_pending()
+        if self._fake_accumulator is not None:
+            self._fake_accumulator.reset()
         results_fake = self._collect_target_results(target='fake')
 
         if is_main_process():
@@ -542,7 +951,9 @@ class FrechetInceptionDistance(GenerativeMetric):
             Defaults to -1.
         inception_style (str): The target inception style want to load. If the
             given style cannot be loaded successful, will attempt to load a
-            valid one. Defaults to 'StyleGAN'.
+            valid one. 'StyleGAN-Frozen' loads Tero's Inception frozen and
+            optimized for CPU inference, which is used for 'StyleGAN' as
+            well if no CUDA device is available. Defaults to 'StyleGAN'.
         inception_path (str, optional): Path the the pretrain Inception
             network. Defaults to None.
         inception_pkl (str, optional): Path to reference inception pickle file.
@@ -561,6 +972,28 @@ class FrechetInceptionDistance(GenerativeMetric):
             names to disambiguate homonymous metrics of different evaluators.
             If prefix is not provided in the argument, self.default_prefix
             will be used instead. Defaults to None.
+        streaming (bool): Whether to only keep the sufficient statistics
+            (number of samples, sum and sum of outer products in float64) of
+            the fake inception features instead of the features themselves.
+            The statistics are all-reduced across ranks, therefore the memory
+            cost is O(D^2) regardless of `fake_nums`. Defaults to False.
+        feat_chunk_size (int, optional): Number of real images of each
+            checkpointed feature chunk per rank when extracting the inception
+            feature of real images. If given, an interrupted extraction can
+            be resumed from the finished chunks. Defaults to None.
+        fid_solver (str): Solver of the matrix square root term. 'scipy'
+            calls ``scipy.linalg.sqrtm`` on the non-symmetric product of the
+            covariances. 'eigh' uses the symmetric form and eigendecomposition
+            in float64, which is several times faster on CPU, and the square
+            root of `real_cov` is cached across evaluations. Defaults to
+            'scipy'.
+        gen_batch_size (int, optional): Number of images generated in each
+            batch. If not passed, the batch size of the dataloader will be
+            used. Defaults to None.
+        feature_batch_size (int | str, optional): Number of images fed to
+            the Inception network in each batch, for both real and fake
+            images. If 'auto', the largest batch size fits into the memory
+            will be used, see :class:`GenerativeMetric`. Defaults to None.
     """
     name = 'FID'
 
@@ -574,16 +1007,33 @@ class FrechetInceptionDistance(GenerativeMetric):
                  real_key: Optional[str] = 'img',
                  sample_model: str = 'orig',
                  collect_device: str = 'cpu',
-                 prefix: Optional[str] = None):
+                 prefix: Optional[str] = None,
+                 streaming: bool = False,
+                 feat_chunk_size: Optional[int] = None,
+                 fid_solver: str = 'scipy',
+                 gen_batch_size: Optional[int] = None,
+                 feature_batch_size: Union[int, str, None] = None):
         super().__init__(fake_nums, real_nums, fake_key, real_key,
-                         sample_model, collect_device, prefix)
+                         sample_model, collect_device, prefix, gen_batch_size,
+                         feature_batch_size)
+        assert fid_solver in [
+            'scipy', 'eigh'
+        ], (f'\'fid_solver\' must be \'scipy\' or \'eigh\', but receive '
+            f'\'{fid_solver}\'.')
+        self.fid_solver = fid_solver
         self.real_mean = None
         self.real_cov = None
+        self._real_cov_sqrt = None
         self.device = 'cpu'
         self.inception, self.inception_style = self._load_inception(
             inception_style, inception_path)
         self.inception_pkl = inception_pkl
 
+        self.streaming = streaming
+        self._reset_feat_stats()
+        self.feat_chunk_size = feat_chunk_size
+        self.fake_results = ResultBuffer(self.fake_nums_per_device)
+
     def prepare(self, module: nn.Module, dataloader: DataLoader) -> None:
         """Preparing inception feature for the real images.
 
@@ -594,10 +1044,15 @@ class FrechetInceptionDistance(GenerativeMetric):
         self.device = module.data_preprocessor.device
         self.inception.to(self.device)
         inception_feat_dict = prepare_inception_feat(
-            dataloader, self, module.data_preprocessor, capture_mean_cov=True)
+            dataloader,
+            self,
+            module.data_preprocessor,
+            capture_mean_cov=True,
+            chunk_size=self.feat_chunk_size)
         if is_main_process():
             self.real_mean = inception_feat_dict['real_mean']
             self.real_cov = inception_feat_dict['real_cov']
+            self._real_cov_sqrt = None
 
     def _load_inception(
             self, inception_style: str,
@@ -615,6 +1070,11 @@ class FrechetInceptionDistance(GenerativeMetric):
         """
         if inception_style == 'StyleGAN':
             args = dict(type='StyleGAN', inception_path=inception_path)
+        elif inception_style == 'StyleGAN-Frozen':
+            args = dict(
+                type='StyleGAN',
+                inception_path=inception_path,
+                cpu_optimize=True)
         else:
             args = dict(type='Pytorch', normalize_input=False)
         inception, style = load_inception(args, 'FID')
@@ -652,7 +1112,12 @@ class FrechetInceptionDistance(GenerativeMetric):
             data_batch (Sequence[dict]): A batch of data from the dataloader.
             predictions (Sequence[dict]): A batch of outputs from the model.
         """
-        if len(self.fake_results) >= self.fake_nums_per_device:
+        if self.streaming:
+            if (self._feat_num + self._num_pending_fakes >=
+                    self._stream_nums_per_device):
+                return
+        elif (len(self.fake_results) + self._num_pending_fakes >=
+              self.fake_nums_per_device):
             return
 
         fake_imgs = []
@@ -670,9 +1135,119 @@ class FrechetInceptionDistance(GenerativeMetric):
             fake_imgs.append(fake_img_)
         fake_imgs = torch.stack(fake_imgs, dim=0)
 
-        feat = self.forward_inception(fake_imgs)
-        feat_list = list(torch.split(feat, 1))
-        self.fake_results += feat_list
+        for feat in self._forward_fake_images(fake_imgs,
+                                              self._inception_cache_key,
+                                              self.forward_inception):
+            self._add_fake_feat(feat)
+
+    @torch.no_grad()
+    def process_pending(self) -> None:
+        """Extract inception features of the buffered fake images."""
+        feat = self._flush_fake_images(self.forward_inception)
+        if feat is not None:
+            self._add_fake_feat(feat)
+
+    @property
+    def supports_sample_cache(self) -> bool:
+        """Only the StyleGAN style Inception quantizes the input images."""
+        return self.inception_style == 'StyleGAN'
+
+    @property
+    def _inception_cache_key(self) -> tuple:
+        """The key of inception features in :attr:`feature_cache`."""
+        return ('inception_feat', id(self.inception), self.inception_style,
+                self.sample_model, self.fake_key)
+
+    @property
+    def _stream_nums_per_device(self) -> int:
+        """Number of fake features accumulated by current rank in streaming
+        mode. Unlike :attr:`fake_nums_per_device`, the last ranks take the
+        remainder so that exactly `fake_nums` samples are used in total."""
+        rank, _ = get_dist_info()
+        nums_per_device = self.fake_nums_per_device
+        return max(
+            0, min(nums_per_device, self.fake_nums - rank * nums_per_device))
+
+    def _reset_feat_stats(self) -> None:
+        """Reset the sufficient statistics used in streaming mode."""
+        self._feat_num = 0
+        self._feat_sum = None
+        self._feat_outer_sum = None
+
+    def _add_fake_feat(self, feat: Tensor) -> None:
+        """Add inception features of fake images to the results. In streaming
+        mode, only the number of samples, the sum and the sum of outer
+        products of the features are updated (in float64).
+
+        Args:
+            feat (Tensor): Inception features in shape like (N, D).
+        """
+        if not self.streaming:
+            self.fake_results.add(feat)
+            return
+
+        feat = feat[:self._stream_nums_per_device - self._feat_num]
+        feat = feat.to(torch.float64)
+        if self._feat_sum is None:
+            feat_dim = feat.shape[1]
+            self._feat_sum = feat.new_zeros(feat_dim)
+            self._feat_outer_sum = feat.new_zeros(feat_dim, feat_dim)
+        self._feat_sum += feat.sum(dim=0)
+        self._feat_outer_sum += feat.t() @ feat
+        self._feat_num += feat.shape[0]
+
+    def _collect_target_results(self, target: str) -> Optional[list]:
+        """Collect function for FID metric. In streaming mode, the sufficient
+        statistics are all-reduced across ranks and converted to the mean and
+        covariance of the fake features, otherwise features are gathered as
+        :meth:`GenMetric._collect_target_results` does.
+
+        Args:
+            target (str): Target results to collect.
+
+        Returns:
+            Optional[list]: The collected results. In streaming mode, a list
+                of the mean and covariance (in np.ndarray) of fake features.
+        """
+        if not self.streaming:
+            return super()._collect_target_results(target)
+
+        assert target == 'fake', (
+            'Only support to collect \'fake\' results in streaming mode.')
+        # ranks may get no samples when `fake_nums` is not divisible by the
+        # world size, they still join the all-reduce with zero statistics
+        feat_dim = torch.tensor(
+            0 if self._feat_sum is None else self._feat_sum.shape[0],
+            device=self.device)
+        all_reduce(feat_dim, op='max')
+        assert int(feat_dim) > 0, (
+            f'{self.__class__.__name__} got no fake features. Please ensure '
+            'that `process` method is called before `evaluate`.')
+        if self._feat_sum is None:
+            self._feat_sum = torch.zeros(
+                int(feat_dim), dtype=torch.float64, device=self.device)
+            self._feat_outer_sum = torch.zeros(
+                int(feat_dim),
+                int(feat_dim),
+                dtype=torch.float64,
+                device=self.device)
+        feat_num = self._feat_sum.new_tensor(self._feat_num)
+        feat_sum, feat_outer_sum = self._feat_sum, self._feat_outer_sum
+        all_reduce(feat_num)
+        all_reduce(feat_sum)
+        all_reduce(feat_outer_sum)
+        self._reset_feat_stats()
+
+        if is_main_process() and int(feat_num) != self.fake_nums:
+            raise ValueError(f'Number of fake features is \'{int(feat_num)}\','
+                             f' not equals to target size \'{self.fake_nums}'
+                             '\'.')
+
+        # same as `np.cov` with `ddof=1`
+        mean = feat_sum / feat_num
+        cov = (feat_outer_sum - feat_num * torch.outer(mean, mean)) / (
+            feat_num - 1)
+        return [mean.cpu().numpy(), cov.cpu().numpy()]
 
     @staticmethod
     def _calc_fid(sample_mean: np.ndarray,
@@ -714,22 +1289,343 @@ class FrechetInceptionDistance(GenerativeMetric):
         """Compulate the result of FID metric.
 
         Args:
-            fake_results (list): List of image feature of fake images.
+            fake_results (list): List of image feature of fake images. In
+                streaming mode, list of the mean and covariance of the fake
+                features.
 
         Returns:
             dict: A dict of the computed FID metric and its mean and
                 covariance.
         """
-        fake_feats = torch.cat(fake_results, dim=0)
-        fake_feats_np = fake_feats.cpu().numpy()
-        fake_mean = np.mean(fake_feats_np, 0)
-        fake_cov = np.cov(fake_feats_np, rowvar=False)
-
-        fid, mean, cov = self._calc_fid(fake_mean, fake_cov, self.real_mean,
-                                        self.real_cov)
+        if self.streaming:
+            fake_mean, fake_cov = fake_results
+        else:
+            fake_feats = self._concat_results(fake_results)
+            fake_feats_np = fake_feats.cpu().numpy()
+            fake_mean = np.mean(fake_feats_np, 0)
+            fake_cov = np.cov(fake_feats_np, rowvar=False)
 
+        fid, mean, cov = self._calc_fid_with_solver(fake_mean, fake_cov)
         return {'fid': fid, 'mean': mean, 'cov': cov}
 
+    def _calc_fid_with_solver(self, fake_mean: np.ndarray,
+                              fake_cov: np.ndarray) -> Tuple[float]:
+        """Calculate FID to the real statistics with :attr:`fid_solver`.
+
+        Args:
+            fake_mean (np.ndarray): Mean of the fake features.
+            fake_cov (np.ndarray): Covariance of the fake features.
+
+        Returns:
+            Tuple[float]: FID, the mean term and the covariance term.
+        """
+        if self.fid_solver == 'eigh':
+            # `real_cov` never changes, only factorize it once
+            if self._real_cov_sqrt is None:
+                self._real_cov_sqrt = sqrtm_psd(self.real_cov)
+            return frechet_distance_sym(fake_mean, fake_cov, self.real_mean,
+                                        self.real_cov, self._real_cov_sqrt)
+        return self._calc_fid(fake_mean, fake_cov, self.real_mean,
+                              self.real_cov)
+
+
+@METRICS.register_module('KID')
+@METRICS.register_module()
+class KernelInceptionDistance(FrechetInceptionDistance):
+    """KID (Kernel Inception Distance) metric. The squared MMD with a cubic
+    polynomial kernel between the inception features of real and fake images
+    is calculated on `num_subsets` random subsets, and the mean and standard
+    deviation over subsets are reported. Different from FID, the estimator is
+    unbiased, which makes KID reliable with a small number of samples.
+
+    The Inception network, the processing of fake images and the real feature
+    cache are the same as :class:`FrechetInceptionDistance`, therefore KID
+    shares the Inception outputs with FID in the same evaluator. The kernel
+    matrix of each subset is computed block by block with `block_size` rows,
+    and the full kernel matrix is never materialized.
+
+    Ref: https://github.com/NVlabs/stylegan2-ada-pytorch/blob/main/metrics/kernel_inception_distance.py  # noqa
+
+    Args:
+        fake_nums (int): Numbers of the generated image need for the metric.
+        real_nums (int): Numbers of the real images need for the metric. If -1
+            is passed, means all real images in the dataset will be used.
+            Defaults to -1.
+        num_subsets (int): Number of random subsets. Defaults to 100.
+        subset_size (int): Maximum number of samples in each subset. The
+            actual size will not exceed the number of real or fake samples.
+            Defaults to 1000.
+        block_size (int): Number of rows of each kernel block. Defaults to
+            1000.
+        seed (int): Random seed to sample the subsets. Defaults to 0.
+        inception_style (str): The target inception style want to load. If the
+            given style cannot be loaded successful, will attempt to load a
+            valid one. 'StyleGAN-Frozen' loads Tero's Inception frozen and
+            optimized for CPU inference, which is used for 'StyleGAN' as
+            well if no CUDA device is available. Defaults to 'StyleGAN'.
+        inception_path (str, optional): Path the the pretrain Inception
+            network. Defaults to None.
+        inception_pkl (str, optional): Path to reference inception pickle file,
+            which must contain the raw inception features ('raw_feature'). If
+            `None`, the features of real images will be extracted at running
+            time. Defaults to None.
+        fake_key (Optional[str]): Key for get fake images of the output dict.
+            Defaults to None.
+        real_key (Optional[str]): Key for get real images from the input dict.
+            Defaults to 'img'.
+        sample_model (str): Sampling mode for the generative model. Support
+            'orig' and 'ema'. Defaults to 'orig'.
+        collect_device (str, optional): Device name used for collecting results
+            from different ranks during distributed training. Must be 'cpu' or
+            'gpu'. Defaults to 'cpu'.
+        prefix (str, optional): The prefix that will be added in the metric
+            names to disambiguate homonymous metrics of different evaluators.
+            If prefix is not provided in the argument, self.default_prefix
+            will be used instead. Defaults to None.
+        feat_chunk_size (int, optional): Number of real images of each
+            checkpointed feature chunk per rank when extracting the inception
+            feature of real images. Defaults to None.
+        gen_batch_size (int, optional): Number of images generated in each
+            batch. If not passed, the batch size of the dataloader will be
+            used. Defaults to None.
+        feature_batch_size (int | str, optional): Number of images fed to
+            the Inception network in each batch, for both real and fake
+            images. If 'auto', the largest batch size fits into the memory
+            will be used, see :class:`GenerativeMetric`. Defaults to None.
+    """
+    name = 'KID'
+
+    def __init__(self,
+                 fake_nums: int,
+                 real_nums: int = -1,
+                 num_subsets: int = 100,
+                 subset_size: int = 1000,
+                 block_size: int = 1000,
+                 seed: int = 0,
+                 inception_style='StyleGAN',
+                 inception_path: Optional[str] = None,
+                 inception_pkl: Optional[str] = None,
+                 fake_key: Optional[str] = None,
+                 real_key: Optional[str] = 'img',
+                 sample_model: str = 'orig',
+                 collect_device: str = 'cpu',
+                 prefix: Optional[str] = None,
+                 feat_chunk_size: Optional[int] = None,
+                 gen_batch_size: Optional[int] = None,
+                 feature_batch_size: Union[int, str, None] = None):
+        super().__init__(
+            fake_nums,
+            real_nums,
+            inception_style,
+            inception_path,
+            inception_pkl,
+            fake_key,
+            real_key,
+            sample_model,
+            collect_device,
+            prefix,
+            feat_chunk_size=feat_chunk_size,
+            gen_batch_size=gen_batch_size,
+            feature_batch_size=feature_batch_size)
+        self.num_subsets = num_subsets
+        self.subset_size = subset_size
+        self.block_size = block_size
+        self.seed = seed
+        self.real_feats = None
+
+    def prepare(self, module: nn.Module, dataloader: DataLoader) -> None:
+        """Preparing raw inception features of the real images.
+
+        Args:
+            module (nn.Module): The model to evaluate.
+            dataloader (DataLoader): The dataloader for real images.
+        """
+        self.device = module.data_preprocessor.device
+        self.inception.to(self.device)
+        inception_feat_dict = prepare_inception_feat(
+            dataloader,
+            self,
+            module.data_preprocessor,
+            capture_all=True,
+            chunk_size=self.feat_chunk_size)
+        if is_main_process():
+            assert 'raw_feature' in inception_feat_dict, (
+                f'\'{self.name}\' needs raw inception features, but '
+                '\'raw_feature\' is not found in the inception pkl.')
+            self.real_feats = inception_feat_dict['raw_feature']
+
+    def compute_metrics(self, fake_results: list) -> dict:
+        """Compulate the result of KID metric.
+
+        Args:
+            fake_results (list): List of image feature of fake images.
+
+        Returns:
+            dict: A dict of the computed KID metric and its standard deviation
+                over subsets.
+        """
+        fake_feats = self._concat_results(fake_results).to(torch.float64)
+        num_reals = self.real_feats.shape[0]
+        subset_size = min(num_reals, fake_feats.shape[0], self.subset_size)
+        assert subset_size > 1, (
+            f'\'{self.name}\' needs at least 2 real and fake samples.')
+
+        rng = np.random.RandomState(self.seed)
+        mmd2_list = []
+        for _ in range(self.num_subsets):
+            fake_idx = rng.choice(
+                fake_feats.shape[0], subset_size, replace=False)
+            real_idx = np.sort(
+                rng.choice(num_reals, subset_size, replace=False))
+            # only load the selected rows of memory-mapped features
+            real_subset = torch.from_numpy(
+                np.asarray(self.real_feats[real_idx], dtype=np.float64))
+            real_subset = real_subset.to(fake_feats.device)
+            mmd2_list.append(
+                poly_mmd2(fake_feats[fake_idx], real_subset, self.block_size))
+
+        return {
+            'kid': float(np.mean(mmd2_list)),
+            'std': float(np.std(mmd2_list))
+        }
+
+
+@METRICS.register_module('FID-Infinity')
+@METRICS.register_module()
+class FrechetInceptionDistanceInfinity(FrechetInceptionDistance):
+    """FID-Infinity metric. FID is biased with a finite number of samples,
+    and the bias is linear in ``1 / N``. Therefore, FID is calculated on
+    `num_points` random subsets of the fake features, whose sizes are evenly
+    spaced between `min_fake_nums` and `fake_nums`, and is linearly
+    extrapolated to ``1 / N = 0``. Estimates from 5k-10k samples are
+    comparable to the ones from much more samples, which is suitable for
+    evaluation during training. The FID of all fake samples is reported as
+    well.
+
+    Ref: Effectively Unbiased FID and Inception Score and where to find them
+    (https://arxiv.org/abs/1911.07023)
+
+    Args:
+        fake_nums (int): Numbers of the generated image need for the metric.
+        real_nums (int): Numbers of the real images need for the metric. If -1
+            is passed, means all real images in the dataset will be used.
+            Defaults to -1.
+        num_points (int): Number of subsets to fit the line. Defaults to 15.
+        min_fake_nums (int, optional): Size of the smallest subset. If None,
+            ``fake_nums // 5`` will be used. Defaults to None.
+        seed (int): Random seed to sample the subsets. Defaults to 0.
+        inception_style (str): The target inception style want to load. If the
+            given style cannot be loaded successful, will attempt to load a
+            valid one. 'StyleGAN-Frozen' loads Tero's Inception frozen and
+            optimized for CPU inference, which is used for 'StyleGAN' as
+            well if no CUDA device is available. Defaults to 'StyleGAN'.
+        inception_path (str, optional): Path the the pretrain Inception
+            network. Defaults to None.
+        inception_pkl (str, optional): Path to reference inception pickle file.
+            If `None`, the statistical value of real distribution will be
+            calculated at running time. Defaults to None.
+        fake_key (Optional[str]): Key for get fake images of the output dict.
+            Defaults to None.
+        real_key (Optional[str]): Key for get real images from the input dict.
+            Defaults to 'img'.
+        sample_model (str): Sampling mode for the generative model. Support
+            'orig' and 'ema'. Defaults to 'orig'.
+        collect_device (str, optional): Device name used for collecting results
+            from different ranks during distributed training. Must be 'cpu' or
+            'gpu'. Defaults to 'cpu'.
+        prefix (str, optional): The prefix that will be added in the metric
+            names to disambiguate homonymous metrics of different evaluators.
+            If prefix is not provided in the argument, self.default_prefix
+            will be used instead. Defaults to None.
+        feat_chunk_size (int, optional): Number of real images of each
+            checkpointed feature chunk per rank when extracting the inception
+            feature of real images. Defaults to None.
+        fid_solver (str): Solver of the matrix square root term, see
+            :class:`FrechetInceptionDistance`. FID is calculated `num_points`
+            + 1 times, therefore defaults to 'eigh', which only factorizes
+            the real covariance once.
+        gen_batch_size (int, optional): Number of images generated in each
+            batch. If not passed, the batch size of the dataloader will be
+            used. Defaults to None.
+        feature_batch_size (int | str, optional): Number of images fed to
+            the Inception network in each batch, for both real and fake
+            images. If 'auto', the largest batch size fits into the memory
+            will be used, see :class:`GenerativeMetric`. Defaults to None.
+    """
+    name = 'FID-Infinity'
+
+    def __init__(self,
+                 fake_nums: int,
+                 real_nums: int = -1,
+                 num_points: int = 15,
+                 min_fake_nums: Optional[int] = None,
+                 seed: int = 0,
+                 inception_style='StyleGAN',
+                 inception_path: Optional[str] = None,
+                 inception_pkl: Optional[str] = None,
+                 fake_key: Optional[str] = None,
+                 real_key: Optional[str] = 'img',
+                 sample_model: str = 'orig',
+                 collect_device: str = 'cpu',
+                 prefix: Optional[str] = None,
+                 feat_chunk_size: Optional[int] = None,
+                 fid_solver: str = 'eigh',
+                 gen_batch_size: Optional[int] = None,
+                 feature_batch_size: Union[int, str, None] = None):
+        super().__init__(
+            fake_nums,
+            real_nums,
+            inception_style,
+            inception_path,
+            inception_pkl,
+            fake_key,
+            real_key,
+            sample_model,
+            collect_device,
+            prefix,
+            feat_chunk_size=feat_chunk_size,
+            fid_solver=fid_solver,
+            gen_batch_size=gen_batch_size,
+            feature_batch_size=feature_batch_size)
+        assert num_points >= 2, (
+            f'\'num_points\' must be no less than 2, but receive '
+            f'\'{num_points}\'.')
+        self.num_points = num_points
+        self.min_fake_nums = min_fake_nums
+        self.seed = seed
+
+    def compute_metrics(self, fake_results: list) -> dict:
+        """Compulate the result of FID-Infinity metric.
+
+        Args:
+            fake_results (list): List of image feature of fake images.
+
+        Returns:
+            dict: A dict of the extrapolated FID and the FID of all fake
+                samples.
+        """
+        fake_feats = self._concat_results(fake_results).cpu().numpy()
+        num_fakes = fake_feats.shape[0]
+        min_fake_nums = self.min_fake_nums
+        if min_fake_nums is None:
+            min_fake_nums = num_fakes // 5
+        min_fake_nums = min(max(min_fake_nums, 2), num_fakes)
+        subset_sizes = np.linspace(min_fake_nums, num_fakes,
+                                   self.num_points).astype(np.int64)
+
+        rng = np.random.RandomState(self.seed)
+        fid_list = []
+        for size in subset_sizes:
+            subset = fake_feats[rng.choice(num_fakes, size, replace=False)]
+            fid, _, _ = self._calc_fid_with_solver(
+                np.mean(subset, 0), np.cov(subset, rowvar=False))
+            fid_list.append(fid)
+        # FID is linear in 1 / N, the intercept is the estimate with
+        # infinite samples
+        _, fid_inf = np.polyfit(1 / subset_sizes, fid_list, 1)
+        # the last subset is a permutation of all fake samples
+        return {'fid_inf': float(fid_inf), 'fid': fid_list[-1]}
+
 
 @METRICS.register_module('IS')
 @METRICS.register_module()
@@ -764,7 +1660,11 @@ class InceptionScore(GenerativeMetric):
         splits (int, optional): The number of groups. Defaults to 10.
         inception_style (str): The target inception style want to load. If the
             given style cannot be loaded successful, will attempt to load a
-            valid one. Defaults to 'StyleGAN'.
+            valid one. 'StyleGAN-Frozen' loads Tero's Inception frozen and
+            optimized for CPU inference, which is used for 'StyleGAN' as
+            well if no CUDA device is available. 'PyTorch-INT8' quantizes
+            the linear layers of PyTorch's Inception to int8. Defaults to
+            'StyleGAN'.
         inception_path (str, optional): Path the the pretrain Inception
             network. Defaults to None.
         resize_method (str): Resize method. If `resize` is False, this will be
@@ -786,6 +1686,13 @@ class InceptionScore(GenerativeMetric):
             names to disambiguate homonymous metrics of different evaluators.
             If prefix is not provided in the argument, self.default_prefix
             will be used instead. Defaults to None.
+        gen_batch_size (int, optional): Number of images generated in each
+            batch. If not passed, the batch size of the dataloader will be
+            used. Defaults to None.
+        feature_batch_size (int | str, optional): Number of images fed to
+            the Inception network in each batch. If 'auto', the largest batch
+            size fits into the memory will be used, see
+            :class:`GenerativeMetric`. Defaults to None.
     """
     name = 'IS'
 
@@ -800,9 +1707,12 @@ class InceptionScore(GenerativeMetric):
                  fake_key: Optional[str] = None,
                  sample_model='orig',
                  collect_device: str = 'cpu',
-                 prefix: str = None):
+                 prefix: str = None,
+                 gen_batch_size: Optional[int] = None,
+                 feature_batch_size: Union[int, str, None] = None):
         super().__init__(fake_nums, 0, fake_key, None, sample_model,
-                         collect_device, prefix)
+                         collect_device, prefix, gen_batch_size,
+                         feature_batch_size)
 
         self.resize = resize
         self.resize_method = resize_method
@@ -818,6 +1728,7 @@ class InceptionScore(GenerativeMetric):
 
         self.inception, self.inception_style = self._load_inception(
             inception_style, inception_path)
+        self.fake_results = ResultBuffer(self.fake_nums_per_device)
 
     def prepare(self, module: nn.Module, dataloader: DataLoader) -> None:
         """_summary_
@@ -842,8 +1753,12 @@ class InceptionScore(GenerativeMetric):
             Tuple[nn.Module, str]: The actually loaded inception network and
                 corresponding style.
         """
-        inception, style = load_inception(
-            dict(type=inception_style, inception_path=inception_path), 'IS')
+        args = dict(type=inception_style, inception_path=inception_path)
+        if inception_style == 'StyleGAN-Frozen':
+            args.update(type='StyleGAN', cpu_optimize=True)
+        elif inception_style == 'PyTorch-INT8':
+            args.update(type='PyTorch', quantize=True)
+        inception, style = load_inception(args, 'IS')
         inception.eval()
         return inception, style
 
@@ -876,6 +1791,43 @@ class InceptionScore(GenerativeMetric):
             return F.interpolate(
                 image, size=(299, 299), mode=self.resize_method)
 
+    def forward_inception(self, image: Tensor) -> Tensor:
+        """Preprocess image and feed it to inception network to get the
+        probabilities of classes.
+
+        Args:
+            image (Tensor): Image tensor fed to the Inception network.
+
+        Returns:
+            Tensor: Probabilities of classes predicted by inception.
+        """
+        image = self._preprocess(image).to(self.device)
+
+        if self.inception_style == 'StyleGAN':
+            image = (image * 127.5 + 128).clamp(0, 255).to(torch.uint8)
+            with disable_gpu_fuser_on_pt19():
+                feat = self.inception(image, no_output_bias=True)
+        else:
+            feat = F.softmax(self.inception(image), dim=1)
+        return feat
+
+    @property
+    def supports_sample_cache(self) -> bool:
+        """Images are quantized before the Pillow resize, or by the StyleGAN
+        style Inception if not resized. Interpolating float images changes
+        the results of the quantized ones."""
+        if self.resize:
+            return self.use_pillow_resize
+        return self.inception_style == 'StyleGAN'
+
+    @property
+    def _inception_cache_key(self) -> tuple:
+        """The key of inception outputs in :attr:`feature_cache`. Resize
+        arguments are included because they change the input images."""
+        return ('inception_prob', id(self.inception), self.inception_style,
+                self.sample_model, self.fake_key, self.resize,
+                self.resize_method, self.use_pillow_resize)
+
     def process(self, data_batch: Sequence[dict],
                 predictions: Sequence[dict]) -> None:
         """Process one batch of data samples and predictions. The processed
@@ -886,7 +1838,8 @@ class InceptionScore(GenerativeMetric):
             data_batch (Sequence[dict]): A batch of data from the dataloader.
             predictions (Sequence[dict]): A batch of outputs from the model.
         """
-        if len(self.fake_results) >= self.fake_nums_per_device:
+        if (len(self.fake_results) + self._num_pending_fakes >=
+                self.fake_nums_per_device):
             return
 
         fake_imgs = []
@@ -903,17 +1856,19 @@ class InceptionScore(GenerativeMetric):
                 fake_img_ = fake_img_['fake_img']['data']
             fake_imgs.append(fake_img_)
         fake_imgs = torch.stack(fake_imgs, dim=0)
-        fake_imgs = self._preprocess(fake_imgs).to(self.device)
+        for feat in self._forward_fake_images(fake_imgs,
+                                              self._inception_cache_key,
+                                              self.forward_inception):
+            # NOTE: feat is shape like (bz, 1000)
+            self.fake_results.add(feat)
 
-        if self.inception_style == 'StyleGAN':
-            fake_imgs = (fake_imgs * 127.5 + 128).clamp(0, 255).to(torch.uint8)
-            with disable_gpu_fuser_on_pt19():
-                feat = self.inception(fake_imgs, no_output_bias=True)
-        else:
-            feat = F.softmax(self.inception(fake_imgs), dim=1)
-
-        # NOTE: feat is shape like (bz, 1000), convert to a list
-        self.fake_results += list(torch.split(feat, 1))
+    @torch.no_grad()
+    def process_pending(self) -> None:
+        """Predict the probabilities of classes of the buffered fake
+        images."""
+        feat = self._flush_fake_images(self.forward_inception)
+        if feat is not None:
+            self.fake_results.add(feat)
 
     def compute_metrics(self, fake_results: list) -> dict:
         """Compute the results of Inception Score metric.
@@ -925,7 +1880,7 @@ class InceptionScore(GenerativeMetric):
             dict: A dict of the computed IS metric and its standard error
         """
         split_scores = []
-        preds = torch.cat(fake_results, dim=0).cpu().numpy()
+        preds = self._concat_results(fake_results).cpu().numpy()
         # check for the size
         assert preds.shape[0] >= self.fake_nums
         preds = preds[:self.fake_nums]
@@ -1011,13 +1966,13 @@ class MultiScaleStructureSimilarity(GenerativeMetric):
         assert minibatch.shape[0] % 2 == 0, 'batch size must be divided by 2.'
         minibatch = ((minibatch + 1) / 2)
         minibatch = minibatch.clamp_(0, 1)
-        half1 = minibatch[0::2].cpu().data.numpy().transpose((0, 2, 3, 1))
-        half1 = (half1 * 255).astype('uint8')
-        half2 = minibatch[1::2].cpu().data.numpy().transpose((0, 2, 3, 1))
-        half2 = (half2 * 255).astype('uint8')
+        # quantize to uint8 as the reference implementation, and compute on
+        # the device of the generated images
+        minibatch = (minibatch * 255).to(torch.uint8)
+        half1, half2 = minibatch[0::2], minibatch[1::2]
 
-        scores = ms_ssim(half1, half2, reduce_mean=False)
-        self.fake_results += [torch.Tensor([s]) for s in scores.tolist()]
+        scores = ms_ssim_torch(half1, half2, reduce_mean=False)
+        self.fake_results += list(torch.split(scores.cpu(), 1))
 
     def _collect_target_results(self, target: str) -> Optional[list]:
         """Collected results for MS-SSIM metric. Size of `self.fake_results` in
@@ -1107,6 +2062,25 @@ class PrecisionAndRecall(GenerativeMetric):
             col_batch_size (int, optional): The batch size of col data.
                 Defaults to 10000.
             auto_save (bool, optional): Whether save vgg feature automatically.
+            knn_backend (str, optional): Backend of the k-th nearest neighbour
+                radii and the manifold membership queries. 'exact' computes
+                dense distances between all features. 'ivf' uses an IVF index
+                (k-means coarse quantizer) and only computes distances to the
+                features in probed lists, and the fraction of uncertain
+                queries is reported as the error bound of precision and
+                recall ('precision_err_bound' and 'recall_err_bound').
+                Defaults to 'exact'.
+            ann_cfg (dict, optional): Config of the IVF index, includes
+                'num_lists' (defaults to sqrt of the number of manifold
+                features), 'nprobe' (defaults to 8), 'num_iters' (defaults to
+                10) and 'seed' (defaults to 0). Defaults to None.
+            gen_batch_size (int, optional): Number of images generated in
+                each batch. If not passed, the batch size of the dataloader
+                will be used. Defaults to None.
+            feature_batch_size (int | str, optional): Number of images fed to
+                the VGG network in each batch, for both real and fake images.
+                If 'auto', the largest batch size fits into the memory will
+                be used, see :class:`GenerativeMetric`. Defaults to None.
         """
     name = 'PR'
 
@@ -1123,9 +2097,14 @@ class PrecisionAndRecall(GenerativeMetric):
                  vgg16_pkl=None,
                  row_batch_size=10000,
                  col_batch_size=10000,
-                 auto_save=True):
+                 auto_save=True,
+                 knn_backend='exact',
+                 ann_cfg=None,
+                 gen_batch_size=None,
+                 feature_batch_size=None):
         super().__init__(fake_nums, real_nums, fake_key, real_key,
-                         sample_model, collect_device, prefix)
+                         sample_model, collect_device, prefix, gen_batch_size,
+                         feature_batch_size)
         print_log('loading vgg16 for improved precision and recall...',
                   'current')
         self.vgg16_pkl = vgg16_pkl
@@ -1136,6 +2115,25 @@ class PrecisionAndRecall(GenerativeMetric):
         self.row_batch_size = row_batch_size
         self.col_batch_size = col_batch_size
 
+        assert knn_backend in [
+            'exact', 'ivf'
+        ], (f'\'knn_backend\' must be \'exact\' or \'ivf\', but receive '
+            f'\'{knn_backend}\'.')
+        self.knn_backend = knn_backend
+        self.real_kth = None
+        self.ann_cfg = deepcopy(ann_cfg) if ann_cfg is not None else dict()
+        self.ann_cfg.setdefault('num_lists', None)
+        self.ann_cfg.setdefault('nprobe', 8)
+        self.ann_cfg.setdefault('num_iters', 10)
+        self.ann_cfg.setdefault('seed', 0)
+        self.fake_results = ResultBuffer(self.fake_nums_per_device)
+
+    @property
+    def supports_sample_cache(self) -> bool:
+        """Only the TorchScript VGG16 quantizes the input images, the
+        torchvision one interpolates float images."""
+        return self.use_tero_scirpt
+
     def _load_vgg(self, vgg16_script: Optional[str]) -> Tuple[nn.Module, bool]:
         """Load VGG network from the given path.
 
@@ -1148,13 +2146,16 @@ class PrecisionAndRecall(GenerativeMetric):
                 corresponding style.
         """
         if os.path.isfile(vgg16_script):
-            vgg16 = torch.jit.load('work_dirs/cache/vgg16.pt').eval()
+            vgg16 = load_shared_extractor(('vgg16', vgg16_script),
+                                          torch.jit.load, vgg16_script).eval()
             use_tero_scirpt = True
         else:
             print_log(
                 'Cannot load Tero\'s script module. Use official '
                 'vgg16 instead', 'current')
-            vgg16 = torchvision_models.vgg16(pretrained=True).eval()
+            vgg16 = load_shared_extractor(('vgg16', 'torchvision'),
+                                          torchvision_models.vgg16,
+                                          pretrained=True).eval()
             use_tero_scirpt = False
         return vgg16, use_tero_scirpt
 
@@ -1187,25 +2188,26 @@ class PrecisionAndRecall(GenerativeMetric):
         Returns:
             dict | list: Summarized results.
         """
-        gen_features = torch.cat(results_fake, dim=0).to(self.collect_device)
+        gen_features = self._concat_results(results_fake).to(
+            self.collect_device)
         real_features = self.results_real
 
         self._result_dict = {}
 
-        for name, manifold, probes in [
-            ('precision', real_features, gen_features),
-            ('recall', gen_features, real_features)
+        # radii of the real manifold may be cached in `prepare`
+        for name, manifold, probes, kth in [
+            ('precision', real_features, gen_features, self.real_kth),
+            ('recall', gen_features, real_features, None)
         ]:
-            kth = []
-            for manifold_batch in manifold.split(self.row_batch_size):
-                distance = compute_pr_distances(
-                    row_features=manifold_batch,
-                    col_features=manifold,
-                    col_batch_size=self.col_batch_size)
-                kth.append(
-                    distance.to(torch.float32).kthvalue(self.k + 1).values.to(
-                        torch.float16))
-            kth = torch.cat(kth)
+            if self.knn_backend == 'ivf':
+                pred, uncertain = self._ivf_membership(manifold, probes, kth)
+                self._result_dict[name] = float(pred.to(torch.float32).mean())
+                self._result_dict[f'{name}_err_bound'] = float(
+                    uncertain.to(torch.float32).mean())
+                continue
+            if kth is None:
+                kth = compute_kth_radii(manifold, self.k, self.row_batch_size,
+                                        self.col_batch_size)
             pred = []
             for probes_batch in probes.split(self.row_batch_size):
                 distance = compute_pr_distances(
@@ -1221,6 +2223,53 @@ class PrecisionAndRecall(GenerativeMetric):
         self._result_str = f'precision: {precision}, recall:{recall}'
         return self._result_dict
 
+    def _ivf_membership(self,
+                        manifold: Tensor,
+                        probes: Tensor,
+                        kth: Optional[Tensor] = None) -> Tuple[Tensor, Tensor]:
+        """Estimate the manifold with approximate k-th nearest neighbour
+        radii and query whether probes are in it with an IVF index.
+
+        Args:
+            manifold (Tensor): Features to estimate the manifold.
+            probes (Tensor): Features to query.
+            kth (Tensor, optional): Precomputed exact k-th nearest neighbour
+                radii of the manifold. Defaults to None.
+
+        Returns:
+            Tuple[Tensor, Tensor]: Whether probes are in the manifold and
+                whether the results are uncertain.
+        """
+        num_lists = self.ann_cfg['num_lists']
+        if num_lists is None:
+            num_lists = int(math.sqrt(manifold.shape[0]))
+        nprobe = self.ann_cfg['nprobe']
+        index = build_ivf_index(
+            manifold,
+            num_lists,
+            num_iters=self.ann_cfg['num_iters'],
+            seed=self.ann_cfg['seed'],
+            batch_size=self.row_batch_size)
+        if kth is None:
+            radii, radii_certified = ivf_knn_radii(
+                index,
+                manifold,
+                manifold,
+                self.k,
+                nprobe=nprobe,
+                batch_size=self.row_batch_size)
+        else:
+            radii = kth.to(device=manifold.device, dtype=torch.float32)
+            radii_certified = torch.ones_like(radii, dtype=torch.bool)
+        return ivf_manifold_membership(
+            index,
+            manifold,
+            radii,
+            radii_certified,
+            probes,
+            nprobe=nprobe,
+            batch_size=self.row_batch_size)
+
     @torch.no_grad()
     def process(self, data_batch: Sequence[dict],
                 predictions: Sequence[dict]) -> None:
@@ -1246,9 +2295,18 @@ class PrecisionAndRecall(GenerativeMetric):
                 fake_img_ = fake_img_['fake_img']['data']
             fake_imgs.append(fake_img_)
         fake_imgs = torch.stack(fake_imgs, dim=0)
-        feat = self.extract_features(fake_imgs)
-        feat_list = list(torch.split(feat, 1))
-        self.fake_results += feat_list
+        for feat in self._forward_fake_images(
+                fake_imgs, ('vgg16_feat', id(self.vgg16), self.use_tero_scirpt,
+                            self.sample_model, self.fake_key),
+                self.extract_features):
+            self.fake_results.add(feat)
+
+    @torch.no_grad()
+    def process_pending(self) -> None:
+        """Extract VGG features of the buffered fake images."""
+        feat = self._flush_fake_images(self.extract_features)
+        if feat is not None:
+            self.fake_results.add(feat)
 
     @torch.no_grad()
     def prepare(self, module: nn.Module, dataloader: DataLoader) -> None:
@@ -1256,8 +2314,20 @@ class PrecisionAndRecall(GenerativeMetric):
         device = get_module_device(module)
         self.vgg16.to(device)
 
-        vgg_feat = prepare_vgg_feat(dataloader, self, module.data_preprocessor,
-                                    self.auto_save)
+        # radii of the full real manifold never change, cache them with the
+        # features. Randomly sampled real features cannot reuse them.
+        self.real_kth = None
+        if self.real_nums == -1:
+            vgg_feat, self.real_kth = prepare_vgg_feat(
+                dataloader,
+                self,
+                module.data_preprocessor,
+                self.auto_save,
+                knn_k=self.k)
+        else:
+            vgg_feat = prepare_vgg_feat(dataloader, self,
+                                        module.data_preprocessor,
+                                        self.auto_save)
         if self.real_nums != -1:
             assert self.real_nums <= vgg_feat.shape[0], (
                 f'Need \'{self.real_nums}\' of real nums, but only '
@@ -1319,15 +2389,20 @@ class Equivariance(GenerativeMetric):
         """
         cfg_key_list = ['compute_eqt_int', 'compute_eqt_frac', 'compute_eqr']
         sample_key_list = ['eqt_int', 'eqt_frac', 'eqr']
-        for pred in predictions:
-            for cfg_key, sample_key in zip(cfg_key_list, sample_key_list):
-                if self._eq_cfg[cfg_key]:
-                    assert sample_key in pred
-                    # assert hasattr(pred, sample_key)
-                    eq_sample = pred[sample_key]
-                    diff = eq_sample['diff'].to(torch.float64).sum()
-                    mask = eq_sample['mask'].to(torch.float64).sum()
-                    self.fake_results[sample_key] += [diff, mask]
+        for cfg_key, sample_key in zip(cfg_key_list, sample_key_list):
+            if not self._eq_cfg[cfg_key]:
+                continue
+            assert all([sample_key in pred for pred in predictions])
+            # sum the diff and mask of all samples at once
+            diffs = torch.stack(
+                [pred[sample_key]['diff'] for pred in predictions])
+            masks = torch.stack(
+                [pred[sample_key]['mask'] for pred in predictions])
+            diffs = diffs.to(torch.float64).flatten(1).sum(dim=1)
+            masks = masks.to(torch.float64).flatten(1).sum(dim=1)
+            # ordered as [diff_0, mask_0, diff_1, mask_1, ...]
+            sums = torch.stack([diffs, masks], dim=1).flatten()
+            self.fake_results[sample_key] += list(sums.unbind())
 
     def get_metric_sampler(self, model: nn.Module, dataloader: DataLoader,
                            metrics: GenMetric):
@@ -1446,10 +2521,26 @@ class TransFID(FrechetInceptionDistance):
                  real_key: Optional[str] = 'img',
                  sample_model: str = 'ema',
                  collect_device: str = 'cpu',
-                 prefix: Optional[str] = None):
-        super().__init__(fake_nums, real_nums, inception_style, inception_path,
-                         inception_pkl, fake_key, real_key, sample_model,
-                         collect_device, prefix)
+                 prefix: Optional[str] = None,
+                 streaming: bool = False,
+                 feat_chunk_size: Optional[int] = None,
+                 fid_solver: str = 'scipy',
+                 feature_batch_size: Union[int, str, None] = None):
+        super().__init__(
+            fake_nums,
+            real_nums,
+            inception_style,
+            inception_path,
+            inception_pkl,
+            fake_key,
+            real_key,
+            sample_model,
+            collect_device,
+            prefix,
+            streaming,
+            feat_chunk_size,
+            fid_solver,
+            feature_batch_size=feature_batch_size)
 
         self.SAMPLER_MODE = 'normal'
 
@@ -1490,9 +2581,10 @@ class TransFID(FrechetInceptionDistance):
             fake_img_ = fake_img_['data']
             fake_imgs.append(fake_img_)
         fake_imgs = torch.stack(fake_imgs, dim=0)
-        feat = self.forward_inception(fake_imgs)
-        feat_list = list(torch.split(feat, 1))
-        self.fake_results += feat_list
+        for feat in self._forward_fake_images(fake_imgs,
+                                              self._inception_cache_key,
+                                              self.forward_inception):
+            self._add_fake_feat(feat)
 
 
 @METRICS.register_module()
@@ -1527,7 +2619,11 @@ class TransIS(InceptionScore):
         splits (int, optional): The number of groups. Defaults to 10.
         inception_style (str): The target inception style want to load. If the
             given style cannot be loaded successful, will attempt to load a
-            valid one. Defaults to 'StyleGAN'.
+            valid one. 'StyleGAN-Frozen' loads Tero's Inception frozen and
+            optimized for CPU inference, which is used for 'StyleGAN' as
+            well if no CUDA device is available. 'PyTorch-INT8' quantizes
+            the linear layers of PyTorch's Inception to int8. Defaults to
+            'StyleGAN'.
         inception_path (str, optional): Path the the pretrain Inception
             network. Defaults to None.
         resize_method (str): Resize method. If `resize` is False, this will be
@@ -1549,6 +2645,10 @@ class TransIS(InceptionScore):
             names to disambiguate homonymous metrics of different evaluators.
             If prefix is not provided in the argument, self.default_prefix
             will be used instead. Defaults to None.
+        feature_batch_size (int | str, optional): Number of images fed to
+            the Inception network in each batch. If 'auto', the largest batch
+            size fits into the memory will be used, see
+            :class:`GenerativeMetric`. Defaults to None.
     """
 
     def __init__(self,
@@ -1562,10 +2662,21 @@ class TransIS(InceptionScore):
                  fake_key: Optional[str] = None,
                  sample_model='ema',
                  collect_device: str = 'cpu',
-                 prefix: str = None):
-        super().__init__(fake_nums, resize, splits, inception_style,
-                         inception_path, resize_method, use_pillow_resize,
-                         fake_key, sample_model, collect_device, prefix)
+                 prefix: str = None,
+                 feature_batch_size: Union[int, str, None] = None):
+        super().__init__(
+            fake_nums,
+            resize,
+            splits,
+            inception_style,
+            inception_path,
+            resize_method,
+            use_pillow_resize,
+            fake_key,
+            sample_model,
+            collect_device,
+            prefix,
+            feature_batch_size=feature_batch_size)
         self.SAMPLER_MODE = 'normal'
 
     def process(self, data_batch: Optional[Sequence[dict]],
@@ -1578,7 +2689,8 @@ class TransIS(InceptionScore):
             data_batch (Sequence[dict]): A batch of data from the dataloader.
             predictions (Sequence[dict]): A batch of outputs from the model.
         """
-        if len(self.fake_results) >= self.fake_nums_per_device:
+        if (len(self.fake_results) + self._num_pending_fakes >=
+                self.fake_nums_per_device):
             return
 
         fake_imgs = []
@@ -1594,17 +2706,11 @@ class TransIS(InceptionScore):
             fake_img_ = fake_img_['data']
             fake_imgs.append(fake_img_)
         fake_imgs = torch.stack(fake_imgs, dim=0)
-        fake_imgs = self._preprocess(fake_imgs).to(self.device)
-
-        if self.inception_style == 'StyleGAN':
-            fake_imgs = (fake_imgs * 127.5 + 128).clamp(0, 255).to(torch.uint8)
-            with disable_gpu_fuser_on_pt19():
-                feat = self.inception(fake_imgs, no_output_bias=True)
-        else:
-            feat = F.softmax(self.inception(fake_imgs), dim=1)
-
-        # NOTE: feat is shape like (bz, 1000), convert to a list
-        self.fake_results += list(torch.split(feat, 1))
+        for feat in self._forward_fake_images(fake_imgs,
+                                              self._inception_cache_key,
+                                              self.forward_inception):
+            # NOTE: feat is shape like (bz, 1000)
+            self.fake_results.add(feat)
 
     def get_metric_sampler(self, model: nn.Module, dataloader: DataLoader,
                            metrics: List['GenMetric']) -> DataLoader:
@@ -1669,6 +2775,7 @@ class PerceptualPathLength(GenerativeMetric):
         self.space = space
         self.sampling = sampling
         self.latent_dim = latent_dim
+        self.fake_results = ResultBuffer(self.fake_nums_per_device)
 
     @torch.no_grad()
     def process(self, data_batch: ValTestStepInputs,
@@ -1696,8 +2803,7 @@ class PerceptualPathLength(GenerativeMetric):
             fake_imgs.append(fake_img_)
         fake_imgs = torch.stack(fake_imgs, dim=0)
         feat = self._compute_distance(fake_imgs)
-        feat_list = list(torch.split(feat, 1))
-        self.fake_results += feat_list
+        self.fake_results.add(feat)
 
     @torch.no_grad()
     def _compute_distance(self, images):
@@ -1735,7 +2841,7 @@ class PerceptualPathLength(GenerativeMetric):
         Returns:
             dict | list: Summarized results.
         """
-        distances = torch.cat(self.fake_results, dim=0).numpy()
+        distances = self._concat_results(fake_results).numpy()
         lo = np.percentile(distances, 1, interpolation='lower')
         hi = np.percentile(distances, 99, interpolation='higher')
         filtered_dist = np.extract(
@@ -0,0 +1,254 @@
+# Copyright (c) OpenMMLab. All rights reserved.
+import hashlib
+import json
+import os
+import os.path as osp
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import torch
+from mmengine import print_log
+from mmengine.dist import get_dist_info, is_main_process
+from torch import Tensor
+
+from mmgen.core.data_structures import GenDataSample, PixelData
+from mmgen.utils import MMGEN_CACHE_DIR
+from .cache_manager import FeatureCacheManager
+
+SAMPLE_CACHE_PREFIX = 'gen_samples-'
+
+
+def get_sample_cache_name(key_args: dict) -> str:
+    """Get the name of the sample cache from the arguments deciding the
+    generated samples.
+
+    Args:
+        key_args (dict): Arguments deciding the generated samples, e.g. the
+            digest of the weights, sample model, seed and sampler config.
+
+    Returns:
+        str: The name of the cache.
+    """
+    md5 = hashlib.md5(
+        json.dumps(key_args, sort_keys=True, default=str).encode('utf-8'))
+    return f'{SAMPLE_CACHE_PREFIX}{md5.hexdigest()}'
+
+
+def _flatten_images(
+    sample: GenDataSample, prefix: Tuple[str, ...] = ()
+) -> Dict[Tuple[str, ...], Tensor]:
+    """Get float images (data of :class:`PixelData`) in the sample, keyed by
+    the path of fields."""
+    images = dict()
+    for key, value in sample.items():
+        if isinstance(value, PixelData):
+            data = value.data
+            if isinstance(data, Tensor) and data.is_floating_point():
+                images[prefix + (key, )] = data
+        elif isinstance(value, GenDataSample):
+            images.update(_flatten_images(value, prefix + (key, )))
+    return images
+
+
+def _build_sample(images: Dict[Tuple[str, ...], Tensor]) -> GenDataSample:
+    """Build a sample from images keyed by the path of fields."""
+    sample = GenDataSample()
+    for path, data in images.items():
+        parent = sample
+        for key in path[:-1]:
+            if key not in parent:
+                parent.set_field(GenDataSample(), key)
+            parent = parent.get(key)
+        parent.set_field(PixelData(data=data), path[-1])
+    return sample
+
+
+class GenSampleCache:
+    """Cache of generated images of a sampler on the current rank.
+
+    Images of the :class:`PixelData` fields in the outputs of the model are
+    quantized to uint8 as ``(img * 127.5 + 128).clamp(0, 255)``, and saved as
+    memory-mappable ``.npy`` chunks of `chunk_size` samples. When loaded,
+    images are mapped back to the center of each quantization bin in
+    [-1, 1], therefore only metrics quantizing images in this way before any
+    other operation get exactly the same inputs, e.g., FID with the StyleGAN
+    style Inception. Other metrics, e.g., MS-SSIM quantizing as
+    ``(img + 1) / 2 * 255``, get different inputs, and should not use the
+    cache (see :attr:`GenerativeMetric.supports_sample_cache`). Other fields
+    of the outputs (e.g. noise) are not saved.
+
+    If the cache is complete (:attr:`is_complete`), :meth:`load_batch`
+    returns the cached outputs batch by batch, otherwise outputs are added
+    with :meth:`add` and saved by :meth:`dump`.
+
+    Args:
+        name (str): Name of the cache, see :func:`get_sample_cache_name`.
+        cache_dir (str): The cache directory. Defaults to `MMGEN_CACHE_DIR`.
+        chunk_size (int): Number of samples of each chunk file. Defaults to
+            1000.
+        device (str | torch.device): Device of the loaded images. Defaults to
+            'cpu'.
+    """
+
+    def __init__(self,
+                 name: str,
+                 cache_dir: str = MMGEN_CACHE_DIR,
+                 chunk_size: int = 1000,
+                 device: Union[str, torch.device] = 'cpu'):
+        self.name = name
+        self.cache_dir = cache_dir
+        self.chunk_size = chunk_size
+        self.device = device
+        self.rank, self.world_size = get_dist_info()
+        self.cache_path = osp.join(cache_dir, name)
+        self.manager = FeatureCacheManager(cache_dir)
+
+        self.meta = self._load_meta()
+        self.is_complete = self.meta is not None
+        self._batch_idx = 0
+        self._pending: Dict[str, List[Tensor]] = dict()
+        self._pending_num = 0
+        self._batch_sizes = []
+        self._chunk_sizes = []
+        self._paths = dict()
+        if self.is_complete:
+            self._chunks = {
+                leaf: [
+                    np.load(self._chunk_path(leaf, idx), mmap_mode='r')
+                    for idx in range(len(self.meta['chunk_sizes']))
+                ]
+                for leaf in self.meta['paths']
+            }
+            self._chunk_ends = np.cumsum(self.meta['chunk_sizes']).tolist()
+            self._batch_starts = [0] + np.cumsum(
+                self.meta['batch_sizes']).tolist()
+            if is_main_process():
+                self.manager.touch(self.name)
+            print_log(
+                f'Load {self.meta["num_samples"]} generated samples from '
+                f'\'{self.cache_path}\'.', 'current')
+
+    @property
+    def meta_path(self) -> str:
+        """The path of the meta file of the current rank."""
+        return osp.join(self.cache_path, f'rank{self.rank}.json')
+
+    def _chunk_path(self, leaf: str, idx: int) -> str:
+        return osp.join(self.cache_path,
+                        f'rank{self.rank}-{leaf}-{idx:05d}.npy')
+
+    def _load_meta(self) -> Optional[dict]:
+        """Load the meta of the current rank. Return None if the cache is not
+        complete."""
+        if not osp.exists(self.meta_path):
+            return None
+        with open(self.meta_path, 'r') as file:
+            return json.load(file)
+
+    def __len__(self) -> int:
+        """Number of cached batches."""
+        if not self.is_complete:
+            return 0
+        return len(self.meta['batch_sizes'])
+
+    def add(self, outputs: List[GenDataSample]) -> None:
+        """Add a batch of outputs of the model to the cache.
+
+        Args:
+            outputs (List[GenDataSample]): Outputs of the model.
+        """
+        assert not self.is_complete, (
+            f'Sample cache \'{self.cache_path}\' is complete already.')
+        for sample in outputs:
+            for path, image in _flatten_images(sample).items():
+                leaf = '.'.join(path)
+                self._paths[leaf] = list(path)
+                image = (image * 127.5 + 128).clamp(0, 255).to(torch.uint8)
+                self._pending.setdefault(leaf, []).append(image.cpu())
+        self._pending_num += len(outputs)
+        self._batch_sizes.append(len(outputs))
+        if self._pending_num >= self.chunk_size:
+            self._flush()
+
+    def _flush(self) -> None:
+        """Save pending images to a new chunk."""
+        if self._pending_num == 0:
+            return
+        os.makedirs(self.cache_path, exist_ok=True)
+        chunk_idx = len(self._chunk_sizes)
+        for leaf, images in self._pending.items():
+            assert len(images) == self._pending_num, (
+                f'Field \'{leaf}\' is missing in some generated samples.')
+            np.save(
+                self._chunk_path(leaf, chunk_idx),
+                torch.stack(images, dim=0).numpy())
+        self._chunk_sizes.append(self._pending_num)
+        self._pending = dict()
+        self._pending_num = 0
+
+    def dump(self) -> None:
+        """Save the remaining images and the meta. The cache becomes complete
+        once the meta is saved."""
+        if self.is_complete:
+            return
+        self._flush()
+        if not self._chunk_sizes:
+            return
+        self.meta = dict(
+            paths=self._paths,
+            batch_sizes=self._batch_sizes,
+            chunk_sizes=self._chunk_sizes,
+            num_samples=sum(self._chunk_sizes))
+        tmp_path = f'{self.meta_path}.tmp-{os.getpid()}'
+        with open(tmp_path, 'w') as file:
+            json.dump(self.meta, file)
+        os.replace(tmp_path, self.meta_path)
+        print_log(
+            f'Save {self.meta["num_samples"]} generated samples to '
+            f'\'{self.cache_path}\'.', 'current')
+        if is_main_process():
+            self.manager.register(
+                self.name,
+                dict(
+                    num_samples=self.meta['num_samples'],
+                    world_size=self.world_size))
+
+    def _read(self, leaf: str, start: int, end: int) -> np.ndarray:
+        """Read images in [start, end) of a field across chunks."""
+        images = []
+        chunk_start = 0
+        for chunk, chunk_end in zip(self._chunks[leaf], self._chunk_ends):
+            if chunk_end > start and chunk_start < end:
+                chunk_slice = slice(
+                    max(start, chunk_start) - chunk_start,
+                    min(end, chunk_end) - chunk_start)
+                images.append(chunk[chunk_slice])
+            chunk_start = chunk_end
+        return np.concatenate(images, axis=0)
+
+    def load_batch(self) -> List[GenDataSample]:
+        """Load the next batch of cached outputs.
+
+        Returns:
+            List[GenDataSample]: The cached outputs.
+        """
+        assert self.is_complete, (
+            f'Sample cache \'{self.cache_path}\' is not complete.')
+        assert self._batch_idx < len(self), (
+            f'All batches of sample cache \'{self.cache_path}\' have been '
+            'loaded.')
+        start = self._batch_starts[self._batch_idx]
+        end = self._batch_starts[self._batch_idx + 1]
+        self._batch_idx += 1
+
+        images = dict()
+        for leaf, path in self.meta['paths'].items():
+            image = self._read(leaf, start, end)
+            image = torch.from_numpy(image).to(self.device)
+            # center of each quantization bin
+            images[tuple(path)] = (image.to(torch.float32) - 127.5) / 127.5
+        return [
+            _build_sample({path: image[idx]
+                           for path, image in images.items()})
+            for idx in range(end - start)
+        ]
@@ -1,32 +1,113 @@
 # Copyright (c) OpenMMLab. All rights reserved.
-from typing import Dict, List, Sequence, Union
+import threading
+from queue import Queue
+from typing import Dict, Iterator, List, Optional, Sequence, Union
 
 import torch
 from mmengine import Runner
+from mmengine.dist import get_world_size
 from mmengine.evaluator import BaseMetric, Evaluator
 from mmengine.registry import LOOPS
 from mmengine.runner import TestLoop, ValLoop
 from torch.utils.data import DataLoader
 
+from mmgen.core.evaluation.cache_manager import get_module_digest
+from mmgen.core.evaluation.sample_cache import (GenSampleCache,
+                                                get_sample_cache_name)
 from mmgen.typing import ValTestStepInputs
 
 
+class AsyncProcessor:
+    """Call ``evaluator.process`` in a background thread. Batches are
+    processed one by one in the order they are put, and at most `queue_size`
+    batches are waiting to be processed. If the queue is full, :meth:`put`
+    blocks until the worker catches up.
+
+    Errors raised in the worker are re-raised by the next :meth:`put` or
+    :meth:`close`, and the batches after the failed one are skipped.
+
+    Args:
+        evaluator (Evaluator): The evaluator to process batches.
+        queue_size (int): Maximum number of waiting batches. Defaults to 2.
+    """
+
+    def __init__(self, evaluator: Evaluator, queue_size: int = 2):
+        self.evaluator = evaluator
+        self.queue = Queue(maxsize=queue_size)
+        self.error: Optional[BaseException] = None
+        self.thread = threading.Thread(target=self._work, daemon=True)
+        self.thread.start()
+
+    def _work(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                return
+            if self.error is not None:
+                continue
+            try:
+                # grad mode is thread local
+                with torch.no_grad():
+                    self.evaluator.process(*item)
+            except BaseException as error:
+                self.error = error
+
+    def _check_error(self):
+        if self.error is not None:
+            raise self.error
+
+    def put(self, data_batch: ValTestStepInputs, outputs: Sequence,
+            metrics: Sequence[BaseMetric]):
+        """Put a batch to be processed.
+
+        Args:
+            data_batch (ValTestStepInputs): Batch of data from the sampler.
+            outputs (Sequence): Outputs of the model.
+            metrics (Sequence[BaseMetric]): Specific metrics to evaluate.
+        """
+        self._check_error()
+        self.queue.put((data_batch, outputs, metrics))
+
+    def close(self):
+        """Wait for all batches to be processed and stop the worker."""
+        self.queue.put(None)
+        self.thread.join()
+        self._check_error()
+
+
 @LOOPS.register_module()
 class GenValLoop(ValLoop):
     """Validation loop for generative models. This class support evaluate
     metrics with different sample mode.
 
+    If `async_process` is True, metrics process batch n in a background
+    thread (see :class:`AsyncProcessor`) while the model generates batch
+    n + 1. Python bookkeeping and device-to-host copies in metrics then
+    overlap with generation. Batches are still processed in order, therefore
+    the results are the same as the synchronous mode.
+
     Args:
         runner (Runner): A reference of runner.
         dataloader (Dataloader or dict): A dataloader object or a dict to
             build a dataloader.
         evaluator (Evaluator or dict or list): Used for computing metrics.
+        async_process (bool): Whether to process batches in a background
+            thread. Defaults to False.
+        queue_size (int): Maximum number of generated batches waiting to be
+            processed in async mode. Defaults to 2.
     """
 
-    def __init__(self, runner: Runner, dataloader: Union[DataLoader, Dict],
-                 evaluator: Union[Evaluator, Dict, List]) -> None:
+    def __init__(self,
+                 runner: Runner,
+                 dataloader: Union[DataLoader, Dict],
+                 evaluator: Union[Evaluator, Dict, List],
+                 async_process: bool = False,
+                 queue_size: int = 2) -> None:
 
         super().__init__(runner, dataloader, evaluator)
+        self.async_process = async_process
+        self.queue_size = queue_size
+        self.processor: Optional[AsyncProcessor] = None
 
     def run(self):
         """Launch validation. The evaluation process consists of four steps.
@@ -61,11 +142,18 @@ class GenValLoop(ValLoop):
         ])
 
         # 3. generate images
-        idx_counter = 0
-        for metrics, sampler in metrics_sampler_list:
-            for data in sampler:
-                self.run_iter(idx_counter, data, metrics)
-                idx_counter += 1
+        if self.async_process:
+            self.processor = AsyncProcessor(self.evaluator, self.queue_size)
+        try:
+            idx_counter = 0
+            for metrics, sampler in metrics_sampler_list:
+                for data in sampler:
+                    self.run_iter(idx_counter, data, metrics)
+                    idx_counter += 1
+        finally:
+            if self.processor is not None:
+                processor, self.processor = self.processor, None
+                processor.close()
 
         # 4. evaluate metrics
         metrics = self.evaluator.evaluate()
@@ -88,7 +176,10 @@ class GenValLoop(ValLoop):
         # outputs should be sequence of BaseDataElement
         outputs = self.runner.model.val_step(data_batch)
 
-        self.evaluator.process(data_batch, outputs, metrics)
+        if self.processor is not None:
+            self.processor.put(data_batch, outputs, metrics)
+        else:
+            self.evaluator.process(data_batch, outputs, metrics)
         self.runner.call_hook(
             'after_val_iter',
             batch_idx=idx,
@@ -101,17 +192,33 @@ class GenTestLoop(TestLoop):
     """Validation loop for generative models. This class support evaluate
     metrics with different sample mode.
 
+    If `sample_cache` is set, images generated for generative metrics (e.g.
+    FID, IS and PR) supporting it are cached (see
+    :class:`~mmgen.core.evaluation.sample_cache.GenSampleCache`) under a key
+    derived from the weights of the model, the sample model, the random seed
+    and the sampler config. Later test runs of the same checkpoint reuse the
+    cached images and skip the generator, even with a different set of
+    metrics in the same sampler group.
+
     Args:
         runner (Runner): A reference of runner.
         dataloader (Dataloader or dict): A dataloader object or a dict to
             build a dataloader.
         evaluator (Evaluator or dict or list): Used for computing metrics.
+        sample_cache (dict, optional): Config of the cache of generated
+            samples, e.g. ``dict(cache_dir='work_dirs/cache')``. ``dict()``
+            means using the default config. If None, the cache is disabled.
+            Defaults to None.
     """
 
-    def __init__(self, runner: Runner, dataloader: Union[DataLoader, Dict],
-                 evaluator: Union[Evaluator, Dict, List]) -> None:
+    def __init__(self,
+                 runner: Runner,
+                 dataloader: Union[DataLoader, Dict],
+                 evaluator: Union[Evaluator, Dict, List],
+                 sample_cache: Optional[dict] = None) -> None:
 
         super().__init__(runner, dataloader, evaluator)
+        self.sample_cache_cfg = sample_cache
 
     def run(self):
         """Launch validation. The evaluation process consists of four steps.
@@ -147,18 +254,62 @@ class GenTestLoop(TestLoop):
 
         idx_counter = 0
         for metrics, sampler in metrics_sampler_list:
+            sample_cache = self._build_sample_cache(module, metrics, sampler)
             for data in sampler:
-                self.run_iter(idx_counter, data, metrics)
+                self.run_iter(idx_counter, data, metrics, sample_cache)
                 idx_counter += 1
+            if sample_cache is not None:
+                sample_cache.dump()
 
         # 3. evaluate metrics
         metrics_output = self.evaluator.evaluate()
         self.runner.call_hook('after_test_epoch', metrics=metrics_output)
         self.runner.call_hook('after_test')
 
+    def _build_sample_cache(self, module: torch.nn.Module,
+                            metrics: Sequence[BaseMetric],
+                            sampler: Iterator) -> Optional[GenSampleCache]:
+        """Build the cache of generated samples for a metrics group. Only
+        groups of generative metrics, whose inputs only depend on the model
+        and random noise, are cached, and all metrics of the group must get
+        the same inputs from the quantized cache (see
+        :attr:`GenerativeMetric.supports_sample_cache`).
+
+        Args:
+            module (nn.Module): Model to evaluate.
+            metrics (Sequence[BaseMetric]): Metrics sharing the sampler.
+            sampler (Iterator): The sampler of the metrics. Its batch size
+                decides the generated samples.
+
+        Returns:
+            Optional[GenSampleCache]: The sample cache. Return None if the
+                cache is disabled or not supported by the metrics.
+        """
+        if self.sample_cache_cfg is None:
+            return None
+        if not all(metric.SAMPLER_MODE == 'Generative'
+                   and metric.supports_sample_cache for metric in metrics):
+            return None
+
+        cache_cfg = dict(self.sample_cache_cfg)
+        cache_cfg.setdefault('device', module.data_preprocessor.device)
+        key_args = dict(
+            weights=get_module_digest(module),
+            model=module.__class__.__name__,
+            sample_model=metrics[0].sample_model,
+            seed=getattr(self.runner, 'seed', None),
+            batch_size=getattr(sampler, 'batch_size',
+                               self.dataloader.batch_size),
+            num_samples=max(metric.fake_nums_per_device for metric in metrics),
+            world_size=get_world_size())
+        return GenSampleCache(get_sample_cache_name(key_args), **cache_cfg)
+
     @torch.no_grad()
-    def run_iter(self, idx, data_batch: ValTestStepInputs,
-                 metrics: Sequence[BaseMetric]):
+    def run_iter(self,
+                 idx,
+                 data_batch: ValTestStepInputs,
+                 metrics: Sequence[BaseMetric],
+                 sample_cache: Optional[GenSampleCache] = None):
         """Iterate one mini-batch and feed the output to corresponding
         `metrics`.
 
@@ -166,11 +317,20 @@ class GenTestLoop(TestLoop):
             idx (int): Current idx for the input data.
             data_batch (Sequence[dict]): Batch of data from dataloader.
             metrics (Sequence[BaseMetric]): Specific metrics to evaluate.
+            sample_cache (GenSampleCache, optional): The cache of generated
+                samples. If it is complete, outputs are loaded from it instead
+                of the model, otherwise outputs of the model are added to it.
+                Defaults to None.
         """
         self.runner.call_hook(
             'before_test_iter', batch_idx=idx, data_batch=data_batch)
 
-        outputs = self.runner.model.test_step(data_batch)
+        if sample_cache is not None and sample_cache.is_complete:
+            outputs = sample_cache.load_batch()
+        else:
+            outputs = self.runner.model.test_step(data_batch)
+            if sample_cache is not None:
+                sample_cache.add(outputs)
 
         self.evaluator.process(data_batch, outputs, metrics)
         self.runner.call_hook(
@@ -1,6 +1,8 @@
 # Copyright (c) OpenMMLab. All rights reserved.
 from .dataset_wrappers import RepeatDataset
-from .grow_scale_image_dataset import GrowScaleImgDataset
+from .grow_scale_image_dataset import GrowScaleImgDataset, build_image_pyramid
+from .memmap_image_dataset import MemmapImageDataset, build_memmap_images
+from .packed_image_dataset import PackedImageDataset, pack_images
 from .paired_image_dataset import PairedImageDataset
 from .pipelines import (FixedCrop, Flip, LoadImageFromFile, PackGenInputs,
                         Resize)
@@ -15,5 +17,6 @@ __all__ = [
     'DistributedSampler', 'UnconditionalImageDataset', 'Flip', 'Resize',
     'RepeatDataset', 'GrowScaleImgDataset', 'SinGANDataset',
     'PairedImageDataset', 'UnpairedImageDataset', 'QuickTestImageDataset',
-    'PackGenInputs', 'FixedCrop'
+    'PackGenInputs', 'FixedCrop', 'PackedImageDataset', 'pack_images',
+    'MemmapImageDataset', 'build_memmap_images', 'build_image_pyramid'
 ]
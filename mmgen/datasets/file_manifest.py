@@ -0,0 +1,199 @@
+# Copyright (c) OpenMMLab. All rights reserved.
+import hashlib
+import os
+import os.path as osp
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+from mmcv import FileClient
+from mmengine import print_log
+from mmengine.dist import broadcast_object_list, get_dist_info
+
+from mmgen.utils import MMGEN_CACHE_DIR
+from .utils import infer_io_backend
+
+MANIFEST_VERSION = 1
+MANIFEST_CACHE_DIR = osp.join(MMGEN_CACHE_DIR, 'manifests')
+# number of files whose size and mtime are checked in validation
+MANIFEST_NUM_CHECKS = 16
+
+
+def _encode_strs(strs: Sequence[str]) -> np.ndarray:
+    """Encode strs to a compact uint8 array, each str is terminated by
+    '\\0'."""
+    return np.frombuffer(
+        ''.join(f'{s}\0' for s in strs).encode('utf-8'), dtype=np.uint8)
+
+
+def _decode_strs(array: np.ndarray) -> List[str]:
+    return array.tobytes().decode('utf-8').split('\0')[:-1]
+
+
+def scan_files(root: str, suffix: Tuple[str]) -> dict:
+    """Recursively scan files with ``suffix`` under ``root``, and record the
+    sizes and mtimes of files and the mtimes of directories.
+
+    Args:
+        root (str): The root directory.
+        suffix (Tuple[str]): Suffixes of files to find.
+
+    Returns:
+        dict: The manifest of files.
+    """
+    paths, sizes, mtimes = [], [], []
+    dirs, dir_mtimes = [], []
+
+    def _scan(dir_path, rel_dir):
+        dirs.append(rel_dir)
+        dir_mtimes.append(os.stat(dir_path).st_mtime_ns)
+        for entry in os.scandir(dir_path):
+            rel_path = osp.join(rel_dir, entry.name) if rel_dir else entry.name
+            if entry.is_dir():
+                _scan(entry.path, rel_path)
+            elif entry.is_file() and rel_path.endswith(suffix):
+                stat = entry.stat()
+                paths.append(rel_path)
+                sizes.append(stat.st_size)
+                mtimes.append(stat.st_mtime_ns)
+
+    _scan(root, '')
+    order = sorted(range(len(paths)), key=paths.__getitem__)
+    return dict(
+        version=np.array(MANIFEST_VERSION),
+        root=_encode_strs([osp.abspath(root)]),
+        suffix=_encode_strs(suffix),
+        paths=_encode_strs([paths[idx] for idx in order]),
+        sizes=np.array([sizes[idx] for idx in order], dtype=np.int64),
+        mtimes=np.array([mtimes[idx] for idx in order], dtype=np.int64),
+        dirs=_encode_strs(dirs),
+        dir_mtimes=np.array(dir_mtimes, dtype=np.int64))
+
+
+def get_manifest_paths(root: str, suffix: Tuple[str]) -> List[str]:
+    """Get the candidate paths of the manifest of ``root``, i.e., the one
+    next to ``root`` and the one in the cache dir. Manifests are saved in the
+    cache dir, and can be copied next to ``root`` to share them among
+    machines. They are not put inside ``root``, otherwise the mtime of
+    ``root`` changes."""
+    root = osp.abspath(root)
+    key = hashlib.md5(repr((root, tuple(suffix))).encode('utf-8')).hexdigest()
+    parent, name = osp.split(root)
+    return [
+        osp.join(parent, f'.{name}.manifest-{key[:8]}.npz'),
+        osp.join(MANIFEST_CACHE_DIR, f'{key}.npz')
+    ]
+
+
+def is_valid_manifest(manifest: dict, root: str, suffix: Tuple[str]) -> bool:
+    """Check whether the manifest is up to date. Adding, removing and renaming
+    files change the mtimes of their directories, which are all checked.
+    Files modified in-place are detected by checking the sizes and mtimes of
+    a few randomly picked files."""
+    if (int(manifest['version']) != MANIFEST_VERSION
+            or _decode_strs(manifest['root']) != [osp.abspath(root)]
+            or tuple(_decode_strs(manifest['suffix'])) != tuple(suffix)):
+        return False
+    try:
+        for rel_dir, mtime in zip(
+                _decode_strs(manifest['dirs']), manifest['dir_mtimes']):
+            if os.stat(osp.join(root, rel_dir)).st_mtime_ns != mtime:
+                return False
+        paths = _decode_strs(manifest['paths'])
+        num_checks = min(len(paths), MANIFEST_NUM_CHECKS)
+        # only rank 0 checks the manifest, a local generator keeps the
+        # global random state of all ranks in sync
+        rng = np.random.RandomState()
+        for idx in rng.choice(len(paths), num_checks, replace=False):
+            stat = os.stat(osp.join(root, paths[idx]))
+            if (stat.st_size != manifest['sizes'][idx]
+                    or stat.st_mtime_ns != manifest['mtimes'][idx]):
+                return False
+    except OSError:
+        return False
+    return True
+
+
+def save_manifest(path: str, manifest: dict) -> None:
+    """Save the manifest to a temporary file and then rename it."""
+    os.makedirs(osp.dirname(path), exist_ok=True)
+    tmp_path = f'{path}.tmp{os.getpid()}'
+    with open(tmp_path, 'wb') as file:
+        np.savez(file, **manifest)
+    os.replace(tmp_path, path)
+
+
+def load_valid_manifest(root: str, suffix: Tuple[str]) -> Optional[dict]:
+    """Load the valid manifest of ``root``. Return None if no valid one is
+    found."""
+    for path in get_manifest_paths(root, suffix):
+        if not osp.exists(path):
+            continue
+        try:
+            with np.load(path) as data:
+                manifest = dict(data)
+        except (OSError, ValueError):
+            continue
+        if is_valid_manifest(manifest, root, suffix):
+            return manifest
+    return None
+
+
+def load_or_build_manifest(root: str, suffix: Tuple[str]) -> List[str]:
+    """Load the relative paths of files from the valid manifest of ``root``,
+    or scan ``root`` and save the manifest to the cache dir if no valid one
+    is found."""
+    manifest = load_valid_manifest(root, suffix)
+    if manifest is not None:
+        return _decode_strs(manifest['paths'])
+
+    manifest_paths = get_manifest_paths(root, suffix)
+    print_log(f'Scan files in \'{root}\' and build the manifest.', 'current')
+    manifest = scan_files(root, suffix)
+    try:
+        save_manifest(manifest_paths[-1], manifest)
+    except OSError as exp:
+        print_log(f'Fail to save the manifest of \'{root}\': {exp}', 'current')
+    return _decode_strs(manifest['paths'])
+
+
+def list_files_with_manifest(root: str,
+                             suffix: Sequence[str],
+                             io_backend: Optional[str] = None) -> List[str]:
+    """Recursively list files with ``suffix`` under ``root``.
+
+    Scanning a directory with millions of files takes minutes on network
+    filesystems. For files on disk, the listing is saved as a manifest
+    (paths, sizes and mtimes of files, and mtimes of directories, see
+    :func:`scan_files`) and reused as long as it is valid (see
+    :func:`is_valid_manifest`). In distributed environments, only rank 0
+    loads or builds the manifest, and broadcasts the listing to the other
+    ranks, therefore all ranks must call this function together.
+
+    Args:
+        root (str): The root directory.
+        suffix (Sequence[str]): Suffixes of files to find.
+        io_backend (str, optional): The storage backend of ``root``. Files
+            on other backends are listed directly without the manifest. If
+            not given, it is inferred from ``root``. Defaults to None.
+
+    Returns:
+        List[str]: Sorted paths of files relative to ``root``.
+    """
+    suffix = tuple(suffix)
+    if io_backend is None:
+        io_backend = infer_io_backend(root)
+    rank, world_size = get_dist_info()
+    files = None
+    if rank == 0:
+        if io_backend == 'disk':
+            files = load_or_build_manifest(root, suffix)
+        else:
+            file_client = FileClient(backend=io_backend)
+            files = sorted(
+                file_client.list_dir_or_file(
+                    root, list_dir=False, suffix=suffix, recursive=True))
+    if world_size > 1:
+        files = [files]
+        broadcast_object_list(files)
+        files = files[0]
+    return files
@@ -1,11 +1,145 @@
 # Copyright (c) OpenMMLab. All rights reserved.
-from typing import Optional, Union
+import json
+import os
+import os.path as osp
+from functools import partial
+from multiprocessing import Pool
+from typing import List, Optional, Sequence, Union
 
-from mmengine import BaseDataset, FileClient, print_log
+import mmcv
+import numpy as np
+from mmengine import BaseDataset, FileClient, list_from_file, print_log
 
 from mmgen.registry import DATASETS
+from .file_manifest import list_files_with_manifest
 from .utils import infer_io_backend
 
+PYRAMID_META_FILE = 'meta.json'
+PYRAMID_NAMES_FILE = 'names.txt'
+PYRAMID_VERSION = 1
+
+
+def get_pyramid_level_file(scale: int) -> str:
+    """Get the file name of the pyramid level of ``scale``."""
+    return f'level-{scale}.npy'
+
+
+def _load_image_pyramid(name: str, src_root: str, io_backend: str,
+                        scales: Sequence[int], interpolation: str,
+                        channel_order: str) -> List[np.ndarray]:
+    """Decode an image and resize it to ``scales`` in the descending order,
+    where each level is downsampled from the previous one."""
+    file_client = FileClient(backend=io_backend)
+    img_bytes = file_client.get(file_client.join_path(src_root, name))
+    img = mmcv.imfrombytes(img_bytes, channel_order=channel_order)
+    levels = []
+    for scale in scales:
+        img = mmcv.imresize(img, (scale, scale), interpolation=interpolation)
+        levels.append(img)
+    return levels
+
+
+def build_image_pyramid(src_root: str,
+                        out_dir: str,
+                        scales: Sequence[int],
+                        file_list: Optional[str] = None,
+                        interpolation: str = 'area',
+                        channel_order: str = 'bgr',
+                        num_workers: int = 0,
+                        suffix: Sequence[str] = ('.jpg', '.png', '.jpeg',
+                                                 '.JPEG'),
+                        io_backend: Optional[str] = None) -> int:
+    """Decode images under ``src_root`` once and build a mip-pyramid of
+    square images for :class:`GrowScaleImgDataset`.
+
+    The largest level is resized from the source images, and each smaller
+    level is downsampled from the previous one. Each level is saved as an
+    N×S×S×C uint8 array named 'level-{S}.npy', which can be memory-mapped.
+    Images are decoded and resized by ``num_workers`` background processes
+    while the main process writes the arrays. 'meta.json' is written at
+    last, therefore an interrupted building is never loaded.
+
+    Args:
+        src_root (str): Root path of images.
+        out_dir (str): Directory to save the pyramid.
+        scales (Sequence[int]): Scales of the pyramid levels.
+        file_list (str, optional): Path of the file listing the relative
+            paths of images. If not given, all images under ``src_root`` are
+            used in the sorted order. Defaults to None.
+        interpolation (str): Interpolation method of resizing, see
+            :func:`mmcv.imresize`. Defaults to 'area'.
+        channel_order (str): Order of channel, candidates are 'bgr' and
+            'rgb'. Defaults to 'bgr', the same as ``LoadImageFromFile``.
+        num_workers (int): Number of processes to decode images. If set to
+            0, images are decoded in the main process. Defaults to 0.
+        suffix (Sequence[str]): Suffixes of images to find under
+            ``src_root``. Defaults to ('.jpg', '.png', '.jpeg', '.JPEG').
+        io_backend (str, optional): The storage backend of ``src_root``. If
+            not given, it is inferred from ``src_root``. Defaults to None.
+
+    Returns:
+        int: The number of images.
+    """
+    if io_backend is None:
+        io_backend = infer_io_backend(src_root)
+    file_client = FileClient(backend=io_backend)
+    if file_list is None:
+        names = sorted(
+            file_client.list_dir_or_file(
+                src_root, list_dir=False, suffix=tuple(suffix),
+                recursive=True))
+    else:
+        names = list_from_file(
+            file_list,
+            file_client_args=dict(backend=infer_io_backend(file_list)))
+    assert names, f'No image is found in \'{src_root}\'.'
+    scales = sorted(set(int(scale) for scale in scales), reverse=True)
+
+    os.makedirs(out_dir, exist_ok=True)
+    meta_path = osp.join(out_dir, PYRAMID_META_FILE)
+    if osp.exists(meta_path):
+        os.remove(meta_path)
+
+    levels = [
+        np.lib.format.open_memmap(
+            osp.join(out_dir, get_pyramid_level_file(scale)),
+            mode='w+',
+            dtype=np.uint8,
+            shape=(len(names), scale, scale, 3)) for scale in scales
+    ]
+    load_fn = partial(
+        _load_image_pyramid,
+        src_root=src_root,
+        io_backend=io_backend,
+        scales=scales,
+        interpolation=interpolation,
+        channel_order=channel_order)
+
+    def write_levels(levels, imgs_iter):
+        for idx, imgs in enumerate(imgs_iter):
+            for level, img in zip(levels, imgs):
+                level[idx] = img
+
+    if num_workers > 0:
+        with Pool(num_workers) as pool:
+            write_levels(levels, pool.imap(load_fn, names, chunksize=16))
+    else:
+        write_levels(levels, map(load_fn, names))
+    for level in levels:
+        level.flush()
+    del levels
+
+    with open(osp.join(out_dir, PYRAMID_NAMES_FILE), 'w') as f:
+        f.writelines(f'{name}\n' for name in names)
+    with open(meta_path, 'w') as f:
+        json.dump(
+            dict(
+                version=PYRAMID_VERSION,
+                scales=sorted(scales),
+                num_items=len(names),
+                channel_order=channel_order), f)
+    return len(names)
+
 
 @DATASETS.register_module()
 class GrowScaleImgDataset(BaseDataset):
@@ -30,14 +164,27 @@ class GrowScaleImgDataset(BaseDataset):
     #. Offer ``samples_per_gpu`` according to different scales. In this
        dataset, ``self.samples_per_gpu`` will help runner to know the updated
        batch size.
+    #. Support the mip-pyramid built by :func:`build_image_pyramid` (see
+       `tools/utils/build_image_pyramid.py`) instead of ``data_roots``. All
+       scales are decoded once from one source set and saved as one
+       memory-mapped array per level, therefore no resized copy of the
+       dataset is needed, and changing the scale only switches the level
+       without listing files again. A writable copy of the image is passed
+       to the pipeline with the key ``'img'``, therefore in-place transforms
+       like ``Flip`` work as usual, and ``LoadImageFromFile`` should be
+       removed from the pipeline.
 
     Basically, This dataset contains raw images for training unconditional
     GANs. Given a root dir, we will recursively find all images in this root.
     The transformation on data is defined by the pipeline.
 
     Args:
-        imgs_root (str): Root path for unconditional images.
+        data_roots (dict, optional): Root paths of unconditional images for
+            each scale. Exactly one of ``data_roots`` and ``pyramid_root``
+            should be given. Defaults to None.
         pipeline (list[dict | callable]): A sequence of data transforms.
+            It is required, and defaults to None only because
+            ``data_roots`` before it is optional.
         len_per_stage (int, optional): The length of dataset for each scale.
             This args change the length dataset by concatenating or extracting
             subset. If given a value less than 0., the original length will be
@@ -53,26 +200,51 @@ class GrowScaleImgDataset(BaseDataset):
             Default: None.
         test_mode (bool, optional): If True, the dataset will work in test
             mode. Otherwise, in train mode. Default to False.
+        use_manifest (bool, optional): Whether to reuse the listing of each
+            data root saved in a manifest, see
+            :func:`list_files_with_manifest`. The manifests avoid scanning
+            the data root again when the scale changes. Default to True.
+        pyramid_root (str, optional): Directory of the pyramid built by
+            :func:`build_image_pyramid`. If given, ``data_roots``,
+            ``file_lists`` and ``use_manifest`` are ignored. Defaults to
+            None.
     """
 
     _VALID_IMG_SUFFIX = ('.jpg', '.png', '.jpeg', '.JPEG')
 
     def __init__(self,
-                 data_roots: dict,
-                 pipeline,
+                 data_roots: Optional[dict] = None,
+                 pipeline=None,
                  len_per_stage=int(1e6),
                  gpu_samples_per_scale=None,
                  gpu_samples_base=32,
                  io_backend: Optional[str] = None,
                  file_lists: Optional[Union[str, dict]] = None,
-                 test_mode=False):
-
-        assert isinstance(data_roots, dict)
+                 test_mode=False,
+                 use_manifest=True,
+                 pyramid_root: Optional[str] = None):
+
+        assert pipeline is not None, '\'pipeline\' should be given.'
+        assert (data_roots is None) != (pyramid_root is None), (
+            'Exactly one of \'data_roots\' and \'pyramid_root\' should be '
+            'given.')
+        self.pyramid_root = pyramid_root
+        self._pyramid_levels = dict()
+        if pyramid_root is not None:
+            assert infer_io_backend(pyramid_root) == 'disk', (
+                'Memory-mapped pyramids only support files on disk, but '
+                f'receive \'{pyramid_root}\'.')
+            self._img_scales = self.load_pyramid_meta()['scales']
+        else:
+            assert isinstance(data_roots, dict)
+            self._img_scales = sorted([int(x) for x in data_roots.keys()])
         self.data_roots = data_roots
-        self._img_scales = sorted([int(x) for x in data_roots.keys()])
         self._curr_scale = self._img_scales[0]
         self._actual_curr_scale = self._curr_scale
-        self.data_root = self.data_roots[str(self._curr_scale)]
+        if pyramid_root is not None:
+            self.data_root = pyramid_root
+        else:
+            self.data_root = self.data_roots[str(self._curr_scale)]
 
         # len_per_stage = -1, keep the original length
         self.len_per_stage = len_per_stage
@@ -85,9 +257,10 @@ class GrowScaleImgDataset(BaseDataset):
         self.gpu_samples_base = gpu_samples_base
 
         if io_backend is None:
-            data_root_ = list(data_roots.values())[0]
-            io_backend = infer_io_backend(data_root_)
+            io_backend = infer_io_backend(self.data_root)
+        self.io_backend = io_backend
         self.file_client = FileClient(backend=io_backend)
+        self.use_manifest = use_manifest
 
         # use current data root to initialize and do not support
         # `serialize_data`
@@ -100,17 +273,44 @@ class GrowScaleImgDataset(BaseDataset):
         # print basic dataset information to check the validity
         print_log(repr(self), 'current')
 
+    def load_pyramid_meta(self):
+        """Load the meta information of the pyramid."""
+        meta_path = osp.join(self.pyramid_root, PYRAMID_META_FILE)
+        if not osp.exists(meta_path):
+            raise FileNotFoundError(
+                f'\'{meta_path}\' is not found, please build the pyramid by '
+                '\'tools/utils/build_image_pyramid.py\' first.')
+        with open(meta_path) as f:
+            meta = json.load(f)
+        assert meta['version'] == PYRAMID_VERSION, (
+            f'Unsupported version of pyramid: {meta["version"]}.')
+        return meta
+
     def load_data_list(self):
         """Load annotations."""
-        # recursively find all of the valid images from imgs_root
-        data_list = self.file_client.list_dir_or_file(
-            self.data_root,
-            list_dir=False,
-            suffix=self._VALID_IMG_SUFFIX,
-            recursive=True)
-        self.data_list = [
-            self.file_client.join_path(self.data_root, x) for x in data_list
-        ]
+        if self.pyramid_root is not None:
+            # items are indexes of images in the pyramid levels
+            self.pyramid_img_paths = [
+                osp.join(self.pyramid_root, name) for name in list_from_file(
+                    osp.join(self.pyramid_root, PYRAMID_NAMES_FILE))
+            ]
+            self.data_list = list(range(len(self.pyramid_img_paths)))
+        else:
+            # recursively find all of the valid images from imgs_root
+            if self.use_manifest:
+                data_list = list_files_with_manifest(self.data_root,
+                                                     self._VALID_IMG_SUFFIX,
+                                                     self.io_backend)
+            else:
+                data_list = self.file_client.list_dir_or_file(
+                    self.data_root,
+                    list_dir=False,
+                    suffix=self._VALID_IMG_SUFFIX,
+                    recursive=True)
+            self.data_list = [
+                self.file_client.join_path(self.data_root, x)
+                for x in data_list
+            ]
 
         if self.len_per_stage > 0:
             self.concat_imgs_list_to(self.len_per_stage)
@@ -138,8 +338,14 @@ class GrowScaleImgDataset(BaseDataset):
                 assert RuntimeError(
                     f'Cannot find a suitable scale for {curr_scale}')
         self._actual_curr_scale = curr_scale
-        self.data_root = self.data_roots[str(self._curr_scale)]
-        self.load_data_list()
+        if self.pyramid_root is not None:
+            # the images of all scales are in the pyramid, only switch the
+            # level in `get_data_info`
+            self.samples_per_gpu = self.gpu_samples_per_scale.get(
+                str(self._actual_curr_scale), self.gpu_samples_base)
+        else:
+            self.data_root = self.data_roots[str(self._curr_scale)]
+            self.load_data_list()
         # print basic dataset information to check the validity
         print_log('Update Dataset: ' + repr(self), 'current')
         return True
@@ -159,6 +365,36 @@ class GrowScaleImgDataset(BaseDataset):
         imgs = self.data_list * concat_factor
         self.data_list = imgs[:num]
 
+    def get_pyramid_level(self, scale):
+        """Get the memory-mapped array of the pyramid level. Arrays are
+        opened lazily, therefore each dataloader worker maps the files by
+        itself."""
+        if scale not in self._pyramid_levels:
+            self._pyramid_levels[scale] = np.load(
+                osp.join(self.pyramid_root, get_pyramid_level_file(scale)),
+                mmap_mode='r')
+        return self._pyramid_levels[scale]
+
+    def get_data_info(self, idx):
+        """Get the information of the image for the pipeline.
+
+        Args:
+            idx (int): Index of the image.
+
+        Returns:
+            dict: The information of the image.
+        """
+        if self.pyramid_root is None:
+            return dict(img_path=self.data_list[idx])
+        img_idx = self.data_list[idx]
+        # copy the image out of the read-only memory map, otherwise in-place
+        # transforms in the pipeline, e.g., `Flip`, fail
+        img = np.array(self.get_pyramid_level(self._curr_scale)[img_idx])
+        return dict(
+            img_path=self.pyramid_img_paths[img_idx],
+            img=img,
+            img_ori_shape=img.shape)
+
     def prepare_train_data(self, idx):
         """Prepare training data.
 
@@ -168,7 +404,7 @@ class GrowScaleImgDataset(BaseDataset):
         Returns:
             dict: Prepared training data batch.
         """
-        results = dict(img_path=self.data_list[idx])
+        results = self.get_data_info(idx)
         return self.pipeline(results)
 
     def prepare_test_data(self, idx):
@@ -180,7 +416,7 @@ class GrowScaleImgDataset(BaseDataset):
         Returns:
             dict: Prepared training data batch.
         """
-        results = dict(img_path=self.data_list[idx])
+        results = self.get_data_info(idx)
         return self.pipeline(results)
 
     def __getitem__(self, idx):
@@ -189,6 +425,12 @@ class GrowScaleImgDataset(BaseDataset):
 
         return self.prepare_test_data(idx)
 
+    def __getstate__(self):
+        # do not pickle the content of the arrays to dataloader workers
+        state = self.__dict__.copy()
+        state['_pyramid_levels'] = dict()
+        return state
+
     def __repr__(self):
         dataset_name = self.__class__
         imgs_root = self.data_root
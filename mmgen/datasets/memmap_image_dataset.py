@@ -0,0 +1,213 @@
+# Copyright (c) OpenMMLab. All rights reserved.
+import json
+import os
+import os.path as osp
+from typing import Optional, Sequence, Tuple
+
+import mmcv
+import numpy as np
+from mmcv import FileClient
+from mmengine import list_from_file
+from mmengine.dataset import BaseDataset
+
+from mmgen.registry import DATASETS
+from .utils import infer_io_backend
+
+MEMMAP_META_FILE = 'meta.json'
+MEMMAP_IMAGES_FILE = 'images.npy'
+MEMMAP_LABELS_FILE = 'labels.npy'
+MEMMAP_NAMES_FILE = 'names.txt'
+MEMMAP_VERSION = 1
+
+
+def build_memmap_images(src_root: str,
+                        out_dir: str,
+                        file_list: Optional[str] = None,
+                        size: Optional[Tuple[int, int]] = None,
+                        interpolation: str = 'bilinear',
+                        channel_order: str = 'bgr',
+                        suffix: Sequence[str] = ('.jpg', '.png', '.jpeg',
+                                                 '.JPEG'),
+                        io_backend: Optional[str] = None) -> int:
+    """Decode images under ``src_root`` into one N×H×W×C uint8 array.
+
+    The array is saved as 'images.npy', which can be memory-mapped by
+    :class:`MemmapImageDataset`. If lines of ``file_list`` are
+    'path label', labels are saved as 'labels.npy'. 'meta.json' is written
+    at last, therefore an interrupted building is never loaded.
+
+    Args:
+        src_root (str): Root path of images.
+        out_dir (str): Directory to save the array.
+        file_list (str, optional): Path of the file listing the relative
+            paths (and optionally labels) of images. If not given, all images
+            under ``src_root`` are decoded in the sorted order. Defaults to
+            None.
+        size (Tuple[int, int], optional): Images are resized to (w, h) if
+            given. Otherwise, all images should have the same shape.
+            Defaults to None.
+        interpolation (str): Interpolation method of resizing, see
+            :func:`mmcv.imresize`. Defaults to 'bilinear'.
+        channel_order (str): Order of channel, candidates are 'bgr' and
+            'rgb'. Defaults to 'bgr', the same as ``LoadImageFromFile``.
+        suffix (Sequence[str]): Suffixes of images to find under
+            ``src_root``. Defaults to ('.jpg', '.png', '.jpeg', '.JPEG').
+        io_backend (str, optional): The storage backend of ``src_root``. If
+            not given, it is inferred from ``src_root``. Defaults to None.
+
+    Returns:
+        int: The number of images.
+    """
+    if io_backend is None:
+        io_backend = infer_io_backend(src_root)
+    file_client = FileClient(backend=io_backend)
+    labels = None
+    if file_list is None:
+        names = sorted(
+            file_client.list_dir_or_file(
+                src_root, list_dir=False, suffix=tuple(suffix),
+                recursive=True))
+    else:
+        lines = [
+            line.split() for line in list_from_file(
+                file_list,
+                file_client_args=dict(backend=infer_io_backend(file_list)))
+        ]
+        names = [line[0] for line in lines]
+        if lines and len(lines[0]) > 1:
+            labels = np.array([int(line[1]) for line in lines], dtype=np.int64)
+    assert names, f'No image is found in \'{src_root}\'.'
+
+    def load(name):
+        img_bytes = file_client.get(file_client.join_path(src_root, name))
+        img = mmcv.imfrombytes(img_bytes, channel_order=channel_order)
+        if size is not None:
+            img = mmcv.imresize(img, tuple(size), interpolation=interpolation)
+        return img
+
+    os.makedirs(out_dir, exist_ok=True)
+    meta_path = osp.join(out_dir, MEMMAP_META_FILE)
+    if osp.exists(meta_path):
+        os.remove(meta_path)
+
+    img = load(names[0])
+    images = np.lib.format.open_memmap(
+        osp.join(out_dir, MEMMAP_IMAGES_FILE),
+        mode='w+',
+        dtype=np.uint8,
+        shape=(len(names), ) + img.shape)
+    for idx, name in enumerate(names):
+        if idx > 0:
+            img = load(name)
+        if img.shape != images.shape[1:]:
+            raise ValueError(
+                f'The shape of \'{name}\' is {img.shape}, but the shape of '
+                f'previous images is {images.shape[1:]}. Please set '
+                '\'size\' to resize images.')
+        images[idx] = img
+    images.flush()
+    shape = images.shape
+    del images
+
+    if labels is not None:
+        np.save(osp.join(out_dir, MEMMAP_LABELS_FILE), labels)
+    with open(osp.join(out_dir, MEMMAP_NAMES_FILE), 'w') as f:
+        f.writelines(f'{name}\n' for name in names)
+    with open(meta_path, 'w') as f:
+        json.dump(
+            dict(
+                version=MEMMAP_VERSION,
+                shape=list(shape),
+                channel_order=channel_order,
+                with_labels=labels is not None), f)
+    return len(names)
+
+
+@DATASETS.register_module()
+class MemmapImageDataset(BaseDataset):
+    """Unconditional (or labeled) image dataset backed by a pre-decoded
+    uint8 array.
+
+    For low resolution datasets, decoding images costs more than the other
+    transforms. This dataset memory-maps the N×H×W×C uint8 array built by
+    :func:`build_memmap_images` (see `tools/utils/build_memmap_images.py`),
+    and passes a writable copy of each image to the pipeline with the key
+    ``'img'``, therefore ``LoadImageFromFile`` should be removed from the
+    pipeline. If labels are saved, they are passed with the key
+    ``'gt_label'`` and packed by ``PackGenInputs``. ``'img_path'`` is set to
+    the virtual path of the image under ``data_root``.
+
+    Args:
+        data_root (str): Directory of the array.
+        pipeline (list[dict | callable]): A sequence of data transforms.
+        test_mode (bool, optional): If True, the dataset will work in test
+            mode. Otherwise, in train mode. Default to False.
+    """
+
+    def __init__(self, data_root, pipeline, test_mode=False):
+        assert infer_io_backend(data_root) == 'disk', (
+            'Memory-mapped arrays only support files on disk, but receive '
+            f'\'{data_root}\'.')
+        self._images = None
+        super().__init__(
+            data_root=data_root, pipeline=pipeline, test_mode=test_mode)
+
+    def load_data_list(self):
+        """Load the names and labels of images."""
+        meta_path = osp.join(self.data_root, MEMMAP_META_FILE)
+        if not osp.exists(meta_path):
+            raise FileNotFoundError(
+                f'\'{meta_path}\' is not found, please build the array by '
+                '\'tools/utils/build_memmap_images.py\' first.')
+        with open(meta_path) as f:
+            meta = json.load(f)
+        assert meta['version'] == MEMMAP_VERSION, (
+            f'Unsupported version of memory-mapped array: {meta["version"]}.')
+        names = list_from_file(osp.join(self.data_root, MEMMAP_NAMES_FILE))
+        assert len(names) == meta['shape'][0]
+
+        images_path = osp.join(self.data_root, MEMMAP_IMAGES_FILE)
+        data_list = [
+            dict(
+                img_path=osp.join(self.data_root, name),
+                memmap_path=images_path,
+                memmap_idx=idx) for idx, name in enumerate(names)
+        ]
+        if meta['with_labels']:
+            labels = np.load(osp.join(self.data_root, MEMMAP_LABELS_FILE))
+            for data_info, label in zip(data_list, labels):
+                data_info['gt_label'] = int(label)
+        return data_list
+
+    @property
+    def images(self) -> np.ndarray:
+        """The memory-mapped array of images. It is opened lazily, therefore
+        each dataloader worker maps the file by itself."""
+        if self._images is None:
+            self._images = np.load(
+                osp.join(self.data_root, MEMMAP_IMAGES_FILE), mmap_mode='r')
+        return self._images
+
+    def prepare_data(self, idx):
+        """Pass the copy of the image to the pipeline."""
+        data_info = self.get_data_info(idx)
+        data_info.pop('memmap_path')
+        # copy the image out of the read-only memory map, otherwise in-place
+        # transforms in the pipeline, e.g., `Flip`, fail
+        img = np.array(self.images[data_info.pop('memmap_idx')])
+        data_info['img'] = img
+        data_info['img_ori_shape'] = img.shape
+        return self.pipeline(data_info)
+
+    def __getstate__(self):
+        # do not pickle the content of the array to dataloader workers
+        state = self.__dict__.copy()
+        state['_images'] = None
+        return state
+
+    def __repr__(self):
+        dataset_name = self.__class__
+        data_root = self.data_root
+        num_imgs = len(self)
+        return (f'dataset_name: {dataset_name}, total {num_imgs} images in '
+                f'data_root: {data_root}')
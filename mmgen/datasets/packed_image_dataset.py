@@ -0,0 +1,192 @@
+# Copyright (c) OpenMMLab. All rights reserved.
+import json
+import os
+import os.path as osp
+from typing import Optional, Sequence
+
+import numpy as np
+from mmcv import FileClient
+from mmengine import list_from_file
+from mmengine.dataset import BaseDataset
+
+from mmgen.registry import DATASETS
+from .utils import infer_io_backend
+
+PACK_META_FILE = 'meta.json'
+PACK_INDEX_FILE = 'index.npy'
+PACK_NAMES_FILE = 'names.txt'
+PACK_VERSION = 1
+
+
+def pack_images(src_root: str,
+                out_dir: str,
+                file_list: Optional[str] = None,
+                shard_size: int = 1 << 30,
+                suffix: Sequence[str] = ('.jpg', '.png', '.jpeg', '.JPEG'),
+                io_backend: Optional[str] = None) -> int:
+    """Pack images under ``src_root`` into large shard files.
+
+    The encoded bytes of images are concatenated into 'shard-xxxxx.bin'
+    without re-encoding, and a new shard is started once the current one
+    exceeds ``shard_size`` bytes. The shard, offset and length of each image
+    are saved in 'index.npy', and the relative paths of images are saved in
+    'names.txt'. 'meta.json' is written at last, therefore an interrupted
+    packing is never loaded by :class:`PackedImageDataset`.
+
+    Args:
+        src_root (str): Root path of images.
+        out_dir (str): Directory to save the shards.
+        file_list (str, optional): Path of the file listing the relative
+            paths of images to pack. If not given, all images under
+            ``src_root`` are packed in the sorted order. Defaults to None.
+        shard_size (int): Approximate size of each shard in bytes. Defaults
+            to 1GB.
+        suffix (Sequence[str]): Suffixes of images to find under
+            ``src_root``. Defaults to ('.jpg', '.png', '.jpeg', '.JPEG').
+        io_backend (str, optional): The storage backend of ``src_root``. If
+            not given, it is inferred from ``src_root``. Defaults to None.
+
+    Returns:
+        int: The number of packed images.
+    """
+    if io_backend is None:
+        io_backend = infer_io_backend(src_root)
+    file_client = FileClient(backend=io_backend)
+    if file_list is None:
+        names = sorted(
+            file_client.list_dir_or_file(
+                src_root, list_dir=False, suffix=tuple(suffix),
+                recursive=True))
+    else:
+        names = list_from_file(
+            file_list,
+            file_client_args=dict(backend=infer_io_backend(file_list)))
+
+    os.makedirs(out_dir, exist_ok=True)
+    meta_path = osp.join(out_dir, PACK_META_FILE)
+    if osp.exists(meta_path):
+        os.remove(meta_path)
+
+    shards, index = [], np.zeros((len(names), 3), dtype=np.int64)
+    shard_file, offset = None, 0
+    try:
+        for idx, name in enumerate(names):
+            if shard_file is None or offset >= shard_size:
+                if shard_file is not None:
+                    shard_file.close()
+                shards.append(f'shard-{len(shards):05d}.bin')
+                shard_file = open(osp.join(out_dir, shards[-1]), 'wb')
+                offset = 0
+            img_bytes = file_client.get(file_client.join_path(src_root, name))
+            shard_file.write(img_bytes)
+            index[idx] = (len(shards) - 1, offset, len(img_bytes))
+            offset += len(img_bytes)
+    finally:
+        if shard_file is not None:
+            shard_file.close()
+
+    np.save(osp.join(out_dir, PACK_INDEX_FILE), index)
+    with open(osp.join(out_dir, PACK_NAMES_FILE), 'w') as f:
+        f.writelines(f'{name}\n' for name in names)
+    with open(meta_path, 'w') as f:
+        json.dump(
+            dict(version=PACK_VERSION, shards=shards, num_items=len(names)), f)
+    return len(names)
+
+
+@DATASETS.register_module()
+class PackedImageDataset(BaseDataset):
+    """Unconditional image dataset stored in packed shards.
+
+    Reading one small file per image is bound by the metadata operations and
+    IOPS of network filesystems. This dataset reads images packed by
+    :func:`pack_images` (see `tools/utils/pack_images.py`), where encoded
+    images are concatenated into a few large shard files. Each image is
+    fetched with a single range read from the shard, and the shards are
+    opened once in each dataloader worker, therefore images in the same
+    shard are read sequentially when the dataset is not shuffled.
+
+    The encoded bytes are passed to the pipeline with the key
+    ``'img_bytes'``, and decoded by ``LoadImageFromFile(key='img')``.
+    Therefore, the pipelines of :class:`UnconditionalImageDataset` can be
+    used directly. ``'img_path'`` is set to the virtual path of the image
+    under ``data_root``.
+
+    Args:
+        data_root (str): Directory of the packed shards.
+        pipeline (list[dict | callable]): A sequence of data transforms.
+        test_mode (bool, optional): If True, the dataset will work in test
+            mode. Otherwise, in train mode. Default to False.
+    """
+
+    def __init__(self, data_root, pipeline, test_mode=False):
+        assert infer_io_backend(data_root) == 'disk', (
+            'Packed shards only support files on disk or mounted '
+            f'filesystems, but receive \'{data_root}\'.')
+        self._shard_files = dict()
+        self._shard_pid = None
+        super().__init__(
+            data_root=data_root, pipeline=pipeline, test_mode=test_mode)
+
+    def load_data_list(self):
+        """Load the index of packed shards."""
+        meta_path = osp.join(self.data_root, PACK_META_FILE)
+        if not osp.exists(meta_path):
+            raise FileNotFoundError(
+                f'\'{meta_path}\' is not found, please pack images by '
+                '\'tools/utils/pack_images.py\' first.')
+        with open(meta_path) as f:
+            meta = json.load(f)
+        assert meta['version'] == PACK_VERSION, (
+            f'Unsupported version of packed shards: {meta["version"]}.')
+        index = np.load(osp.join(self.data_root, PACK_INDEX_FILE))
+        names = list_from_file(osp.join(self.data_root, PACK_NAMES_FILE))
+        assert len(names) == index.shape[0] == meta['num_items']
+
+        shard_paths = [osp.join(self.data_root, s) for s in meta['shards']]
+        data_list = [
+            dict(
+                img_path=osp.join(self.data_root, name),
+                shard_path=shard_paths[shard],
+                offset=int(offset),
+                length=int(length))
+            for name, (shard, offset, length) in zip(names, index)
+        ]
+        return data_list
+
+    def _read_bytes(self, shard_path: str, offset: int, length: int) -> bytes:
+        """Read bytes of an image from the shard with a range read."""
+        # file handles can not be shared by forked dataloader workers
+        if self._shard_pid != os.getpid():
+            self._shard_files = dict()
+            self._shard_pid = os.getpid()
+        shard_file = self._shard_files.get(shard_path)
+        if shard_file is None:
+            shard_file = open(shard_path, 'rb')
+            self._shard_files[shard_path] = shard_file
+        shard_file.seek(offset)
+        img_bytes = shard_file.read(length)
+        assert len(img_bytes) == length, (
+            f'\'{shard_path}\' is truncated, please pack images again.')
+        return img_bytes
+
+    def prepare_data(self, idx):
+        """Read the encoded image and pass it to the pipeline."""
+        data_info = self.get_data_info(idx)
+        data_info['img_bytes'] = self._read_bytes(
+            data_info.pop('shard_path'), data_info.pop('offset'),
+            data_info.pop('length'))
+        return self.pipeline(data_info)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_shard_files'] = dict()
+        state['_shard_pid'] = None
+        return state
+
+    def __repr__(self):
+        dataset_name = self.__class__
+        data_root = self.data_root
+        num_imgs = len(self)
+        return (f'dataset_name: {dataset_name}, total {num_imgs} images in '
+                f'data_root: {data_root}')
@@ -6,6 +6,7 @@ from mmcv import scandir
 from mmengine.dataset import BaseDataset
 
 from mmgen.registry import DATASETS
+from .file_manifest import list_files_with_manifest
 
 IMG_EXTENSIONS = ('.jpg', '.JPG', '.jpeg', '.JPEG', '.png', '.PNG', '.ppm',
                   '.PPM', '.bmp', '.BMP', '.tif', '.TIF', '.tiff', '.TIFF')
@@ -27,10 +28,18 @@ class PairedImageDataset(BaseDataset):
             Default: `False`.
         testdir (str): Subfolder of dataroot which contain test images.
             Default: 'test'.
+        use_manifest (bool): Whether to reuse the listing of images saved in
+            a manifest, see :func:`list_files_with_manifest`. Default: True.
     """
 
-    def __init__(self, data_root, pipeline, test_mode=False, testdir='test'):
+    def __init__(self,
+                 data_root,
+                 pipeline,
+                 test_mode=False,
+                 testdir='test',
+                 use_manifest=True):
         phase = testdir if test_mode else 'train'
+        self.use_manifest = use_manifest
         self.data_root = osp.join(str(data_root), phase)
         super().__init__(
             data_root=self.data_root, pipeline=pipeline, test_mode=test_mode)
@@ -43,18 +52,21 @@ class PairedImageDataset(BaseDataset):
             list[dict]: List that contains paired image paths.
         """
         data_infos = []
-        pair_paths = sorted(self.scan_folder(self.data_root))
+        pair_paths = sorted(
+            self.scan_folder(self.data_root, self.use_manifest))
         for pair_path in pair_paths:
             data_infos.append(dict(pair_path=pair_path))
 
         return data_infos
 
     @staticmethod
-    def scan_folder(path):
+    def scan_folder(path, use_manifest=False):
         """Obtain image path list (including sub-folders) from a given folder.
 
         Args:
             path (str | :obj:`Path`): Folder path.
+            use_manifest (bool): Whether to reuse the listing saved in a
+                manifest. Defaults to False.
 
         Returns:
             list[str]: Image list obtained from the given folder.
@@ -66,7 +78,10 @@ class PairedImageDataset(BaseDataset):
             raise TypeError("'path' must be a str or a Path object, "
                             f'but received {type(path)}.')
 
-        images = scandir(path, suffix=IMG_EXTENSIONS, recursive=True)
+        if use_manifest:
+            images = list_files_with_manifest(path, IMG_EXTENSIONS)
+        else:
+            images = scandir(path, suffix=IMG_EXTENSIONS, recursive=True)
         images = [osp.join(path, v) for v in images]
         assert images, f'{path} has no valid image file.'
         return images
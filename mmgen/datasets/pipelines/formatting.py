@@ -11,7 +11,8 @@ from mmgen.registry import TRANSFORMS
 
 @TRANSFORMS.register_module()
 class PackGenInputs(BaseTransform):
-    """Pack the inputs data for the image generation.
+    """Pack the inputs data for the image generation. If ``'gt_label'`` is
+    in the results, it will be set as the label of the data sample.
 
     Args:
         keys (str): Target keys to pack. Defaults to 'img'.
@@ -61,6 +62,8 @@ class PackGenInputs(BaseTransform):
                 packed_results['inputs'][key] = to_tensor(img)
 
         data_sample = GenDataSample()
+        if 'gt_label' in results:
+            data_sample.set_gt_label(results['gt_label'])
 
         img_meta = {}
         for key in self.meta_keys:
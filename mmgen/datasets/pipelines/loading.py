@@ -13,6 +13,10 @@ from ..utils import infer_io_backend
 class LoadImageFromFile:
     """Load image from file.
 
+    If the encoded bytes of the image are already read by the dataset (e.g.
+    :class:`PackedImageDataset`) and given by ``f'{key}_bytes'``, they are
+    decoded directly and the file will not be read.
+
     Args:
         io_backend (Optional[str]): io backend where images are store. If not
             passed, try to infer the io backend by file path. Default: None.
@@ -57,11 +61,13 @@ class LoadImageFromFile:
             dict: A dict containing the processed data and information.
         """
         filepath = str(results[f'{self.key}_path'])
-        if self.file_client is None:
-            if self.io_backend is None:
-                self.io_backend = infer_io_backend(filepath)
-            self.file_client = FileClient(self.io_backend, **self.kwargs)
-        img_bytes = self.file_client.get(filepath)
+        img_bytes = results.pop(f'{self.key}_bytes', None)
+        if img_bytes is None:
+            if self.file_client is None:
+                if self.io_backend is None:
+                    self.io_backend = infer_io_backend(filepath)
+                self.file_client = FileClient(self.io_backend, **self.kwargs)
+            img_bytes = self.file_client.get(filepath)
         img = mmcv.imfrombytes(
             img_bytes,
             flag=self.flag,
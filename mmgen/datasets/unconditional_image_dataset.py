@@ -6,6 +6,7 @@ from mmengine import list_from_file
 from mmengine.dataset import BaseDataset
 
 from mmgen.registry import DATASETS
+from .file_manifest import list_files_with_manifest
 from .utils import infer_io_backend
 
 
@@ -23,8 +24,14 @@ class UnconditionalImageDataset(BaseDataset):
         io_backend (str, optional): The storage backend type. Options are
             "disk", "ceph", "memcached", "lmdb", "http" and "petrel".
             Default: None.
+        file_list (str, optional): Path of the file listing the relative
+            paths of images. If not given, images are found recursively in
+            ``data_root``. Default: None.
         test_mode (bool, optional): If True, the dataset will work in test
             mode. Otherwise, in train mode. Default to False.
+        use_manifest (bool, optional): Whether to reuse the listing of
+            ``data_root`` saved in a manifest, see
+            :func:`list_files_with_manifest`. Default to True.
     """
 
     _VALID_IMG_SUFFIX = ('.jpg', '.png', '.jpeg', '.JPEG')
@@ -34,11 +41,14 @@ class UnconditionalImageDataset(BaseDataset):
                  pipeline,
                  io_backend: Optional[str] = None,
                  file_list: Optional[str] = None,
-                 test_mode=False):
+                 test_mode=False,
+                 use_manifest=True):
         if io_backend is None:
             io_backend = infer_io_backend(data_root)
+        self.io_backend = io_backend
         self.file_client = FileClient(backend=io_backend)
         self.file_list = file_list
+        self.use_manifest = use_manifest
         super().__init__(
             data_root=data_root, pipeline=pipeline, test_mode=test_mode)
 
@@ -46,7 +56,11 @@ class UnconditionalImageDataset(BaseDataset):
         """Load annotations."""
         # recursively find all of the valid images from data_root
         data_list = []
-        if self.file_list is None:
+        if self.file_list is None and self.use_manifest:
+            imgs_list = list_files_with_manifest(self.data_root,
+                                                 self._VALID_IMG_SUFFIX,
+                                                 self.io_backend)
+        elif self.file_list is None:
             imgs_list = self.file_client.list_dir_or_file(
                 self.data_root,
                 list_dir=False,
@@ -7,6 +7,7 @@ from mmcv import scandir
 from mmengine.dataset import BaseDataset
 
 from mmgen.registry import DATASETS
+from .file_manifest import list_files_with_manifest
 
 IMG_EXTENSIONS = ('.jpg', '.JPG', '.jpeg', '.JPEG', '.png', '.PNG', '.ppm',
                   '.PPM', '.bmp', '.BMP', '.tif', '.TIF', '.tiff', '.TIFF')
@@ -32,6 +33,8 @@ class UnpairedImageDataset(BaseDataset):
             Defaults to None.
         domain_b (str, optional): Domain of images in trainB / testB.
             Defaults to None.
+        use_manifest (bool): Whether to reuse the listing of images saved in
+            a manifest, see :func:`list_files_with_manifest`. Default: True.
     """
 
     def __init__(self,
@@ -39,8 +42,10 @@ class UnpairedImageDataset(BaseDataset):
                  pipeline,
                  test_mode=False,
                  domain_a=None,
-                 domain_b=None):
+                 domain_b=None,
+                 use_manifest=True):
         phase = 'test' if test_mode else 'train'
+        self.use_manifest = use_manifest
         self.dataroot_a = osp.join(str(data_root), phase + 'A')
         self.dataroot_b = osp.join(str(data_root), phase + 'B')
         super().__init__(
@@ -72,7 +77,7 @@ class UnpairedImageDataset(BaseDataset):
             list[dict]: List that contains unpaired image paths of one domain.
         """
         data_infos = []
-        paths = sorted(self.scan_folder(dataroot))
+        paths = sorted(self.scan_folder(dataroot, self.use_manifest))
         for path in paths:
             data_infos.append(dict(path=path))
         return data_infos
@@ -114,11 +119,13 @@ class UnpairedImageDataset(BaseDataset):
         return max(self.len_a, self.len_b)
 
     @staticmethod
-    def scan_folder(path):
+    def scan_folder(path, use_manifest=False):
         """Obtain image path list (including sub-folders) from a given folder.
 
         Args:
             path (str | :obj:`Path`): Folder path.
+            use_manifest (bool): Whether to reuse the listing saved in a
+                manifest. Defaults to False.
 
         Returns:
             list[str]: Image list obtained from the given folder.
@@ -130,7 +137,10 @@ class UnpairedImageDataset(BaseDataset):
             raise TypeError("'path' must be a str or a Path object, "
                             f'but received {type(path)}.')
 
-        images = scandir(path, suffix=IMG_EXTENSIONS, recursive=True)
+        if use_manifest:
+            images = list_files_with_manifest(path, IMG_EXTENSIONS)
+        else:
+            images = scandir(path, suffix=IMG_EXTENSIONS, recursive=True)
         images = [osp.join(path, v) for v in images]
         assert images, f'{path} has no valid image file.'
         return images
@@ -1,4 +1,6 @@
 # Copyright (c) OpenMMLab. All rights reserved.
+from functools import lru_cache
+
 import numpy as np
 import torch
 
@@ -134,14 +136,15 @@ def apply_fractional_translation(x, tx, ty, a=3):
               max(b - ix, 0):W + b + a + min(-ix - a, 0)]
         z[:, :, zy0:zy1, zx0:zx1] = y
 
-    m = torch.zeros_like(x)
+    # the mask is the same for all samples and channels
+    m = x.new_zeros(1, 1, H, W)
     mx0 = max(ix + a, 0)
     my0 = max(iy + a, 0)
     mx1 = min(ix - b, 0) + W
     my1 = min(iy - b, 0) + H
     if mx0 < mx1 and my0 < my1:
         m[:, :, my0:my1, mx0:mx1] = 1
-    return z, m
+    return z, m.expand_as(x)
 
 
 def rotation_matrix(angle):
@@ -159,6 +162,24 @@ def lanczos_window(x, a):
     return torch.where(x < 1, sinc(x), torch.zeros_like(x))
 
 
+# Number of cached filters of each kind. Filters are keyed by their
+# arguments, see `construct_affine_bandlimit_filter`.
+FILTER_CACHE_SIZE = 128
+
+
+@lru_cache(maxsize=8)
+def _input_filter_spectra(a, aflt, up, cutoff_in, device):
+    """Taps in the input coordinate space and the spectra of the input sinc
+    filter and Lanczos window, which do not depend on the transformation."""
+    # Construct 2D filter taps in input coordinate space.
+    taps = ((torch.arange(aflt * up * 2 - 1, device=device) + 1) / up -
+            aflt).roll(1 - aflt * up)
+    yi, xi = torch.meshgrid(taps, taps)
+    fin = sinc(xi * cutoff_in) * sinc(yi * cutoff_in)
+    wi = lanczos_window(xi, a) * lanczos_window(yi, a)
+    return xi, yi, torch.fft.fftn(fin), torch.fft.fftn(wi)
+
+
 def construct_affine_bandlimit_filter(mat,
                                       a=3,
                                       amax=16,
@@ -166,24 +187,39 @@ def construct_affine_bandlimit_filter(mat,
                                       up=4,
                                       cutoff_in=1,
                                       cutoff_out=1):
+    """Construct the band-limited filter of an affine transformation.
+
+    The filter only depends on the linear part of `mat` and the other
+    arguments, therefore constructed filters are kept in a LRU cache of
+    `FILTER_CACHE_SIZE` filters, and the input-space parts shared by all
+    transformations are only computed once. The returned filter is shared
+    between calls and should not be modified in place.
+    """
     assert a <= amax < aflt
     mat = torch.as_tensor(mat).to(torch.float32)
+    mat_key = tuple(mat[:2, :2].flatten().tolist())
+    return _construct_affine_bandlimit_filter(mat_key, a, amax, aflt, up,
+                                              cutoff_in, cutoff_out,
+                                              mat.device)
+
+
+@lru_cache(maxsize=FILTER_CACHE_SIZE)
+def _construct_affine_bandlimit_filter(mat_key, a, amax, aflt, up, cutoff_in,
+                                       cutoff_out, device):
+    mat = torch.tensor(mat_key, device=device).reshape(2, 2)
 
     # Construct 2D filter taps in input & output coordinate spaces.
-    taps = ((torch.arange(aflt * up * 2 - 1, device=mat.device) + 1) / up -
-            aflt).roll(1 - aflt * up)
-    yi, xi = torch.meshgrid(taps, taps)
-    xo, yo = (torch.stack([xi, yi], dim=2) @ mat[:2, :2].t()).unbind(2)
+    xi, yi, fin_fft, wi_fft = _input_filter_spectra(a, aflt, up, cutoff_in,
+                                                    device)
+    xo, yo = (torch.stack([xi, yi], dim=2) @ mat.t()).unbind(2)
 
     # Convolution of two oriented 2D sinc filters.
-    fin = sinc(xi * cutoff_in) * sinc(yi * cutoff_in)
     fout = sinc(xo * cutoff_out) * sinc(yo * cutoff_out)
-    f = torch.fft.ifftn(torch.fft.fftn(fin) * torch.fft.fftn(fout)).real
+    f = torch.fft.ifftn(fin_fft * torch.fft.fftn(fout)).real
 
     # Convolution of two oriented 2D Lanczos windows.
-    wi = lanczos_window(xi, a) * lanczos_window(yi, a)
     wo = lanczos_window(xo, a) * lanczos_window(yo, a)
-    w = torch.fft.ifftn(torch.fft.fftn(wi) * torch.fft.fftn(wo)).real
+    w = torch.fft.ifftn(wi_fft * torch.fft.fftn(wo)).real
 
     # Construct windowed FIR filter.
     f = f * w
@@ -223,13 +259,13 @@ def apply_affine_transformation(x, mat, up=4, **filter_kwargs):
     z = torch.nn.functional.grid_sample(
         y, g, mode='bilinear', padding_mode='zeros', align_corners=False)
 
-    # Form mask.
-    m = torch.zeros_like(y)
+    # Form mask. The mask is the same for all samples and channels.
+    m = y.new_zeros(1, 1, *y.shape[2:])
     c = p * 2 + 1
     m[:, :, c:-c, c:-c] = 1
     m = torch.nn.functional.grid_sample(
-        m, g, mode='nearest', padding_mode='zeros', align_corners=False)
-    return z, m
+        m, g[:1], mode='nearest', padding_mode='zeros', align_corners=False)
+    return z, m.expand_as(z)
 
 
 def apply_fractional_rotation(x, angle, a=3, **filter_kwargs):
@@ -245,7 +281,7 @@ def apply_fractional_pseudo_rotation(x, angle, a=3, **filter_kwargs):
     f = construct_affine_bandlimit_filter(
         mat, a=a, amax=a * 2, up=1, **filter_kwargs)
     y = upfirdn2d.filter2d(x=x, f=f)
-    m = torch.zeros_like(y)
+    m = y.new_zeros(1, 1, *y.shape[2:])
     c = f.shape[0] // 2
     m[:, :, c:-c, c:-c] = 1
-    return y, m
+    return y, m.expand_as(y)
@@ -1,5 +1,7 @@
 # Copyright (c) OpenMMLab. All rights reserved.
 from .base_gan import BaseConditionalGAN, BaseGAN
+from .batch_augments import (BatchCrop, BatchFixedCrop, BatchFlip,
+                             BatchRandomCropLongEdge, BatchResize)
 from .biggan import BigGAN
 from .dcgan import DCGAN
 from .gan_data_processer import GANDataPreprocessor
@@ -18,5 +20,6 @@ __all__ = [
     'BaseGAN', 'BaseConditionalGAN', 'ProgressiveGrowingGAN', 'SinGAN',
     'MSPIEStyleGAN2', 'PESinGAN', 'SAGAN', 'GANDataPreprocessor', 'LSGAN',
     'StyleGAN2', 'BigGAN', 'StyleGAN3', 'DCGAN', 'WGANGP', 'GGAN', 'BigGAN',
-    'StyleGANv1'
+    'StyleGANv1', 'BatchFlip', 'BatchCrop', 'BatchFixedCrop',
+    'BatchRandomCropLongEdge', 'BatchResize'
 ]
@@ -0,0 +1,322 @@
+# Copyright (c) OpenMMLab. All rights reserved.
+from typing import Dict, Optional, Tuple
+
+import mmcv
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+from torch import Tensor
+
+from mmgen.registry import MODELS
+
+
+def _check_batch_shapes(inputs: Dict[str, Tensor]) -> Tuple[int, int, int]:
+    """Check all image batches have the same batch size and spatial size,
+    and return them."""
+    shapes = {(img.shape[0], ) + tuple(img.shape[2:])
+              for img in inputs.values()}
+    assert len(shapes) == 1, (
+        'All images should have the same batch size and spatial size in '
+        f'batch augmentation, but receive {shapes}.')
+    return shapes.pop()
+
+
+def _random_offsets(num_batches: int, size: int, crop_size: int,
+                    device: torch.device) -> Tensor:
+    """Sample offsets in [0, size - crop_size] for each sample."""
+    return torch.randint(
+        0, size - crop_size + 1, (num_batches, ), device=device)
+
+
+def batch_crop(inputs: Dict[str, Tensor], y_offsets: Tensor, x_offsets: Tensor,
+               crop_h: int, crop_w: int) -> Dict[str, Tensor]:
+    """Crop each sample of the image batches at its own offset by gathering
+    rows and columns, therefore no Python loop over samples is needed.
+
+    Args:
+        inputs (Dict[str, Tensor]): Image batches in shape (N, C, H, W).
+        y_offsets (Tensor): Offsets of rows in shape (N, ).
+        x_offsets (Tensor): Offsets of columns in shape (N, ).
+        crop_h (int): Height of the cropped images.
+        crop_w (int): Width of the cropped images.
+
+    Returns:
+        Dict[str, Tensor]: Cropped image batches.
+    """
+    outputs = dict()
+    for k, img in inputs.items():
+        num_batches, channels, _, width = img.shape
+        rows = y_offsets[:, None] + torch.arange(crop_h, device=img.device)
+        cols = x_offsets[:, None] + torch.arange(crop_w, device=img.device)
+        img = img.gather(
+            2, rows[:, None, :, None].expand(num_batches, channels, crop_h,
+                                             width))
+        img = img.gather(
+            3, cols[:, None, None, :].expand(num_batches, channels, crop_h,
+                                             crop_w))
+        outputs[k] = img
+    return outputs
+
+
+@MODELS.register_module()
+class BatchFlip(nn.Module):
+    """Flip image batches with a probability in
+    :class:`~mmgen.models.GANDataPreprocessor`.
+
+    The batched version of :class:`~mmgen.datasets.Flip`. Each sample is
+    flipped independently, and images of different keys in the same sample
+    share the same flip.
+
+    Args:
+        flip_ratio (float): The propability to flip the images.
+        direction (str): Flip images horizontally or vertically. Options are
+            "horizontal" | "vertical". Default: "horizontal".
+    """
+    _directions = ['horizontal', 'vertical']
+
+    def __init__(self, flip_ratio=0.5, direction='horizontal'):
+        super().__init__()
+        if direction not in self._directions:
+            raise ValueError(f'Direction {direction} is not supported.'
+                             f'Currently support ones are {self._directions}')
+        self.flip_ratio = flip_ratio
+        self.direction = direction
+
+    def forward(self, inputs: Dict[str, Tensor]) -> Dict[str, Tensor]:
+        """Flip image batches.
+
+        Args:
+            inputs (Dict[str, Tensor]): Image batches in shape (N, C, H, W).
+
+        Returns:
+            Dict[str, Tensor]: Flipped image batches.
+        """
+        num_batches = _check_batch_shapes(inputs)[0]
+        device = next(iter(inputs.values())).device
+        flip = torch.rand(num_batches, device=device) < self.flip_ratio
+        flip = flip[:, None, None, None]
+        dim = 3 if self.direction == 'horizontal' else 2
+        return {
+            k: torch.where(flip, img.flip(dim), img)
+            for k, img in inputs.items()
+        }
+
+    def __repr__(self):
+        repr_str = self.__class__.__name__
+        repr_str += (f'(flip_ratio={self.flip_ratio}, '
+                     f'direction={self.direction})')
+        return repr_str
+
+
+@MODELS.register_module()
+class BatchCrop(nn.Module):
+    """Crop image batches to specific size in
+    :class:`~mmgen.models.GANDataPreprocessor`.
+
+    The batched version of :class:`~mmgen.datasets.Crop`. In random crop,
+    each sample is cropped at its own position, and images of different keys
+    in the same sample share the same position.
+
+    Args:
+        crop_size (Tuple[int]): Target spatial size (h, w).
+        random_crop (bool): If set to True, it will random crop
+            image. Otherwise, it will work as center crop.
+    """
+
+    def __init__(self, crop_size, random_crop=True):
+        super().__init__()
+        if not mmcv.is_tuple_of(crop_size, int):
+            raise TypeError(
+                'Elements of crop_size must be int and crop_size must be'
+                f' tuple, but got {type(crop_size[0])} in {type(crop_size)}')
+        self.crop_size = crop_size
+        self.random_crop = random_crop
+
+    def forward(self, inputs: Dict[str, Tensor]) -> Dict[str, Tensor]:
+        """Crop image batches.
+
+        Args:
+            inputs (Dict[str, Tensor]): Image batches in shape (N, C, H, W).
+
+        Returns:
+            Dict[str, Tensor]: Cropped image batches.
+        """
+        num_batches, data_h, data_w = _check_batch_shapes(inputs)
+        crop_h = min(data_h, self.crop_size[0])
+        crop_w = min(data_w, self.crop_size[1])
+        if not self.random_crop:
+            y_offset = (data_h - crop_h) // 2
+            x_offset = (data_w - crop_w) // 2
+            return {
+                k: img[..., y_offset:y_offset + crop_h,
+                       x_offset:x_offset + crop_w]
+                for k, img in inputs.items()
+            }
+        device = next(iter(inputs.values())).device
+        y_offsets = _random_offsets(num_batches, data_h, crop_h, device)
+        x_offsets = _random_offsets(num_batches, data_w, crop_w, device)
+        return batch_crop(inputs, y_offsets, x_offsets, crop_h, crop_w)
+
+    def __repr__(self):
+        repr_str = self.__class__.__name__
+        repr_str += (f'(crop_size={self.crop_size}, '
+                     f'random_crop={self.random_crop})')
+        return repr_str
+
+
+@MODELS.register_module()
+class BatchFixedCrop(nn.Module):
+    """Crop image batches at a specific position in
+    :class:`~mmgen.models.GANDataPreprocessor`.
+
+    The batched version of :class:`~mmgen.datasets.FixedCrop`. Images of
+    different keys in the same sample, e.g., paired images, are cropped at
+    the same position.
+
+    Args:
+        crop_size (Tuple[int]): Target spatial size (h, w).
+        crop_pos (Tuple[int]): Specific position (x, y). If set to None,
+            each sample is cropped at a random position.
+    """
+
+    def __init__(self, crop_size, crop_pos: Optional[Tuple[int]] = None):
+        super().__init__()
+        if not mmcv.is_tuple_of(crop_size, int):
+            raise TypeError(
+                'Elements of crop_size must be int and crop_size must be'
+                f' tuple, but got {type(crop_size[0])} in {type(crop_size)}')
+        if not mmcv.is_tuple_of(crop_pos, int) and (crop_pos is not None):
+            raise TypeError(
+                'Elements of crop_pos must be int and crop_pos must be'
+                f' tuple or None, but got {type(crop_pos[0])} in '
+                f'{type(crop_pos)}')
+        self.crop_size = crop_size
+        self.crop_pos = crop_pos
+
+    def forward(self, inputs: Dict[str, Tensor]) -> Dict[str, Tensor]:
+        """Crop image batches.
+
+        Args:
+            inputs (Dict[str, Tensor]): Image batches in shape (N, C, H, W).
+
+        Returns:
+            Dict[str, Tensor]: Cropped image batches.
+        """
+        num_batches, data_h, data_w = _check_batch_shapes(inputs)
+        crop_h = min(data_h, self.crop_size[0])
+        crop_w = min(data_w, self.crop_size[1])
+        if self.crop_pos is not None:
+            x_offset, y_offset = self.crop_pos
+            crop_w = min(data_w - x_offset, crop_w)
+            crop_h = min(data_h - y_offset, crop_h)
+            return {
+                k: img[..., y_offset:y_offset + crop_h,
+                       x_offset:x_offset + crop_w]
+                for k, img in inputs.items()
+            }
+        device = next(iter(inputs.values())).device
+        y_offsets = _random_offsets(num_batches, data_h, crop_h, device)
+        x_offsets = _random_offsets(num_batches, data_w, crop_w, device)
+        return batch_crop(inputs, y_offsets, x_offsets, crop_h, crop_w)
+
+    def __repr__(self):
+        repr_str = self.__class__.__name__
+        repr_str += (f'(crop_size={self.crop_size}, '
+                     f'crop_pos={self.crop_pos})')
+        return repr_str
+
+
+@MODELS.register_module()
+class BatchRandomCropLongEdge(nn.Module):
+    """Random crop image batches by the long edge in
+    :class:`~mmgen.models.GANDataPreprocessor`.
+
+    The batched version of :class:`~mmgen.datasets.RandomCropLongEdge`.
+    Images are cropped to squares of the short edge, and each sample is
+    cropped at its own position.
+    """
+
+    def forward(self, inputs: Dict[str, Tensor]) -> Dict[str, Tensor]:
+        """Crop image batches.
+
+        Args:
+            inputs (Dict[str, Tensor]): Image batches in shape (N, C, H, W).
+
+        Returns:
+            Dict[str, Tensor]: Cropped image batches.
+        """
+        num_batches, data_h, data_w = _check_batch_shapes(inputs)
+        crop_size = min(data_h, data_w)
+        device = next(iter(inputs.values())).device
+        y_offsets = _random_offsets(num_batches, data_h, crop_size, device)
+        x_offsets = _random_offsets(num_batches, data_w, crop_size, device)
+        return batch_crop(inputs, y_offsets, x_offsets, crop_size, crop_size)
+
+    def __repr__(self):
+        return self.__class__.__name__
+
+
+@MODELS.register_module()
+class BatchResize(nn.Module):
+    """Resize image batches in :class:`~mmgen.models.GANDataPreprocessor`.
+
+    The batched version of :class:`~mmgen.datasets.Resize`, where all
+    samples are resized by a single call of :func:`F.interpolate`. Note that
+    the resized images are float tensors, which are not rounded to integers.
+
+    Args:
+        scale (Tuple[int]): Target size (w, h). If ``keep_ratio`` is True,
+            images are rescaled as large as possible within the long edge
+            ``max(scale)`` and the short edge ``min(scale)``.
+        keep_ratio (bool): Whether to keep the aspect ratio. Defaults to
+            False.
+        interpolation (str): Interpolation method, see
+            :func:`F.interpolate`. Defaults to 'bilinear'.
+    """
+
+    def __init__(self, scale, keep_ratio=False, interpolation='bilinear'):
+        super().__init__()
+        self.scale = tuple(scale)
+        self.keep_ratio = keep_ratio
+        self.interpolation = interpolation
+
+    def _get_target_size(self, data_h: int, data_w: int) -> Tuple[int, int]:
+        """Get the target size (h, w)."""
+        if not self.keep_ratio:
+            return self.scale[1], self.scale[0]
+        scale_factor = min(
+            max(self.scale) / max(data_h, data_w),
+            min(self.scale) / min(data_h, data_w))
+        return (int(data_h * scale_factor + 0.5),
+                int(data_w * scale_factor + 0.5))
+
+    def forward(self, inputs: Dict[str, Tensor]) -> Dict[str, Tensor]:
+        """Resize image batches.
+
+        Args:
+            inputs (Dict[str, Tensor]): Image batches in shape (N, C, H, W).
+
+        Returns:
+            Dict[str, Tensor]: Resized image batches.
+        """
+        _, data_h, data_w = _check_batch_shapes(inputs)
+        size = self._get_target_size(data_h, data_w)
+        if size == (data_h, data_w):
+            return inputs
+        align_corners = None
+        if self.interpolation in ['bilinear', 'bicubic']:
+            align_corners = False
+        return {
+            k: F.interpolate(
+                img.float(),
+                size=size,
+                mode=self.interpolation,
+                align_corners=align_corners)
+            for k, img in inputs.items()
+        }
+
+    def __repr__(self):
+        repr_str = self.__class__.__name__
+        repr_str += (f'(scale={self.scale}, keep_ratio={self.keep_ratio}, '
+                     f'interpolation={self.interpolation})')
+        return repr_str
@@ -2,6 +2,7 @@
 from typing import Dict, List, Optional, Sequence, Tuple, Union
 
 import torch
+import torch.nn as nn
 from mmengine import BaseDataElement
 from mmengine.model import ImgDataPreprocessor, stack_batch
 from torch import Tensor
@@ -41,6 +42,19 @@ class GANDataPreprocessor(ImgDataPreprocessor):
             Defaults to False.
         rgb_to_bgr (bool): whether to convert image from RGB to RGB.
             Defaults to False.
+        non_image_keys (str | List[str], optional): Extra keys of
+            :attr:`_NON_IMAGE_KEYS`. Defaults to None.
+        non_concentate_keys (str | List[str], optional): Extra keys of
+            :attr:`_NON_CONCENTATE_KEYS`. Defaults to None.
+        batch_augments (List[dict], optional): Configs of batched
+            augmentations applied to the stacked images in training, e.g.,
+            ``[dict(type='BatchFlip'), dict(type='BatchCrop', crop_size=(64,
+            64))]``. They run on the device of the preprocessor before
+            normalization, replacing per-sample transforms such as ``Flip``
+            and ``Crop`` in the pipeline of dataloader workers. Images of
+            different keys in the same sample share the same random
+            parameters, and all images of a key should have the same shape.
+            Defaults to None.
     """
     _NON_IMAGE_KEYS = ['noise']
     _NON_CONCENTATE_KEYS = ['num_batches', 'mode', 'sample_kwargs', 'eq_cfg']
@@ -53,7 +67,8 @@ class GANDataPreprocessor(ImgDataPreprocessor):
                  bgr_to_rgb: bool = False,
                  rgb_to_bgr: bool = False,
                  non_image_keys: Optional[Tuple[str, List[str]]] = None,
-                 non_concentate_keys: Optional[Tuple[str, List[str]]] = None):
+                 non_concentate_keys: Optional[Tuple[str, List[str]]] = None,
+                 batch_augments: Optional[List[dict]] = None):
 
         super().__init__(mean, std, pad_size_divisor, pad_value, bgr_to_rgb,
                          rgb_to_bgr)
@@ -78,6 +93,12 @@ class GANDataPreprocessor(ImgDataPreprocessor):
                 non_concentate_keys = [non_concentate_keys]
             self._NON_CONCENTATE_KEYS += non_concentate_keys
 
+        if batch_augments is not None:
+            self.batch_augments = nn.ModuleList(
+                [MODELS.build(aug) for aug in batch_augments])
+        else:
+            self.batch_augments = None
+
     def _check_keys_consistency(self, data) -> None:
         """Ensure keys in all inputs are consistency."""
         first_data_keys = data[0].keys()
@@ -152,15 +173,53 @@ class GANDataPreprocessor(ImgDataPreprocessor):
         ]
         return batch_inputs, batch_data_samples
 
-    def _preprocess_image_tensor(self, inputs: List[Tensor]) -> Tensor:
+    def _batch_augment(
+            self, inputs: Union[List[Tensor], dict]) -> Union[Tensor, dict]:
+        """Stack images and apply batched augmentations.
+
+        Args:
+            inputs (List[Tensor] | dict): List of image tensor, or dict of
+                collated inputs.
+
+        Returns:
+            Tensor | dict: The augmented image batch, or dict of collated
+                inputs with augmented image batches.
+        """
+        if isinstance(inputs, list):
+            imgs = dict(img=torch.stack(inputs))
+        else:
+            imgs = {
+                k: torch.stack(v)
+                for k, v in inputs.items() if k not in self._NON_IMAGE_KEYS
+                and k not in self._NON_CONCENTATE_KEYS
+            }
+        for aug in self.batch_augments:
+            imgs = aug(imgs)
+        if isinstance(inputs, list):
+            return imgs['img']
+        return {**inputs, **imgs}
+
+    def _preprocess_image_tensor(
+            self, inputs: Union[List[Tensor], Tensor]) -> Tensor:
         """Process image tensor.
 
         Args:
-            inputs (List[Tensor]): List of image tensor to process.
+            inputs (List[Tensor] | Tensor): List of image tensor, or image
+                batch stacked by batched augmentations to process.
 
         Returns:
             Tensor: Processed and stacked image tensor.
         """
+        if isinstance(inputs, Tensor):
+            # bgr to rgb if need
+            if self.channel_conversion and inputs.size(1) == 3:
+                inputs = inputs[:, [2, 1, 0], ...]
+            # Normalization.
+            inputs = (inputs - self.mean) / self.std
+            if self.pad_size_divisor > 1:
+                inputs = stack_batch(
+                    list(inputs), self.pad_size_divisor, self.pad_value)
+            return inputs
         # bgr to rgb if need
         if self.channel_conversion and inputs[0].size(0) == 3:
             inputs = [_input[[2, 1, 0], ...] for _input in inputs]
@@ -179,9 +238,8 @@ class GANDataPreprocessor(ImgDataPreprocessor):
 
         Args:
             data (PreprocessInputs): Input data to process.
-            training (bool): Whether to enable training time augmentation.
-                This is ignored for :class:`GANDataPreprocessor`. Defaults to
-                False.
+            training (bool): Whether to enable training time augmentation,
+                i.e., ``batch_augments``. Defaults to False.
         Returns:
             PreprocessOutputs: Data in the same format as the model input.
         """
@@ -190,8 +248,11 @@ class GANDataPreprocessor(ImgDataPreprocessor):
             return data, []
 
         inputs, batch_data_samples = self.collate_data(data)
+        if training and self.batch_augments is not None:
+            inputs = self._batch_augment(inputs)
 
-        if isinstance(inputs, list):
+        # list of images are stacked to `Tensor` by batch augmentations
+        if isinstance(inputs, (list, Tensor)):
             batch_inputs = self._preprocess_image_tensor(inputs)
         else:  # inputs is `dict`
             batch_inputs = dict()
@@ -118,7 +118,7 @@ class StyleGAN3(StyleGAN2):
             for idx in range(batch_size):
                 data_sample = batch_sample[idx]
                 setattr(data_sample, 'eqt_int',
-                        GenDataSample(diff=diff, mask=mask))
+                        GenDataSample(diff=diff[idx], mask=mask[idx]))
 
         # Fractional translation (EQ-T_frac).
         if eq_cfg['compute_eqt_frac']:
@@ -133,7 +133,7 @@ class StyleGAN3(StyleGAN2):
             for idx in range(batch_size):
                 data_sample = batch_sample[idx]
                 setattr(data_sample, 'eqt_frac',
-                        GenDataSample(diff=diff, mask=mask))
+                        GenDataSample(diff=diff[idx], mask=mask[idx]))
 
         # Rotation (EQ-R).
         if eq_cfg['compute_eqr']:
@@ -149,6 +149,6 @@ class StyleGAN3(StyleGAN2):
             for idx in range(batch_size):
                 data_sample = batch_sample[idx]
                 setattr(data_sample, 'eqr',
-                        GenDataSample(diff=diff, mask=mask))
+                        GenDataSample(diff=diff[idx], mask=mask[idx]))
 
         return batch_sample
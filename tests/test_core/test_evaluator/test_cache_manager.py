@@ -0,0 +1,238 @@
+import os
+import os.path as osp
+import time
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+from unittest.mock import patch
+
+import numpy as np
+import torch.nn as nn
+
+from mmgen.core.evaluation import cache_manager
+from mmgen.core.evaluation.cache_manager import (FeatureCacheManager,
+                                                 get_file_list_digest,
+                                                 get_module_digest,
+                                                 get_pipeline_digest,
+                                                 parse_size)
+from mmgen.datasets import file_manifest
+from mmgen.datasets.file_manifest import list_files_with_manifest
+
+
+class ToyDataset:
+
+    def __init__(self, data_root, files):
+        self.data_root = data_root
+        self.files = files
+
+    def __len__(self):
+        return len(self.files)
+
+    def get_data_info(self, idx):
+        return dict(img_path=osp.join(self.data_root, self.files[idx]))
+
+
+class ToyMemmapDataset(ToyDataset):
+
+    def get_data_info(self, idx):
+        return dict(
+            img_path=osp.join(self.data_root, self.files[idx]),
+            memmap_path=osp.join(self.data_root, 'images.npy'))
+
+
+class ToyManifestDataset(ToyDataset):
+    _VALID_IMG_SUFFIX = ('.png', )
+    use_manifest = True
+
+
+class ToyTransform:
+
+    def __init__(self, scale):
+        self.scale = scale
+
+    def __repr__(self):
+        return f'ToyTransform(id={id(self)})'
+
+
+class ToyCompose:
+
+    def __init__(self, transforms):
+        self.transforms = transforms
+
+
+def _save_file(path, size):
+    with open(path, 'wb') as file:
+        file.write(b'0' * size)
+
+
+class TestCacheDigest(TestCase):
+
+    def test_file_list_digest(self):
+        with TemporaryDirectory() as tmp_dir:
+            for name in ['a.png', 'b.png']:
+                _save_file(osp.join(tmp_dir, name), 4)
+            digest = get_file_list_digest(ToyDataset(tmp_dir, ['a.png']))
+            self.assertEqual(
+                digest, get_file_list_digest(ToyDataset(tmp_dir, ['a.png'])))
+            self.assertNotEqual(
+                digest, get_file_list_digest(ToyDataset(tmp_dir, ['b.png'])))
+
+            # file content changes
+            _save_file(osp.join(tmp_dir, 'a.png'), 8)
+            self.assertNotEqual(
+                digest, get_file_list_digest(ToyDataset(tmp_dir, ['a.png'])))
+
+    def test_file_list_digest_stat(self):
+        with TemporaryDirectory() as tmp_dir:
+            files = [f'{idx:03d}.png' for idx in range(100)]
+            for name in files + ['images.npy']:
+                _save_file(osp.join(tmp_dir, name), 4)
+            dataset = ToyMemmapDataset(tmp_dir, files)
+            with patch.object(
+                    cache_manager.os, 'stat', wraps=os.stat) as mock_stat:
+                digest = get_file_list_digest(dataset)
+            # only the directory and a few files are statted once
+            stat_paths = [call[0][0] for call in mock_stat.call_args_list]
+            self.assertEqual(len(stat_paths), len(set(stat_paths)))
+            self.assertIn(tmp_dir, stat_paths)
+            self.assertLessEqual(
+                len(stat_paths), cache_manager.FILE_LIST_NUM_CHECKS + 2)
+
+            # adding files changes the mtime of the directory
+            time.sleep(0.01)
+            _save_file(osp.join(tmp_dir, 'new.png'), 4)
+            self.assertNotEqual(
+                digest, get_file_list_digest(ToyMemmapDataset(tmp_dir, files)))
+
+    def test_file_list_digest_manifest(self):
+        with TemporaryDirectory() as tmp_dir:
+            root = osp.join(tmp_dir, 'data')
+            os.makedirs(root)
+            for name in ['a.png', 'b.png']:
+                _save_file(osp.join(root, name), 4)
+            with patch.object(file_manifest, 'MANIFEST_CACHE_DIR',
+                              osp.join(tmp_dir, 'cache')):
+                list_files_with_manifest(root, ('.png', ))
+                dataset = ToyManifestDataset(root, ['a.png', 'b.png'])
+                # the state of files is taken from the manifest
+                with patch.object(
+                        file_manifest,
+                        'load_valid_manifest',
+                        wraps=file_manifest.load_valid_manifest) as mock_load:
+                    digest = get_file_list_digest(dataset)
+                mock_load.assert_called_once_with(root, ('.png', ))
+                self.assertNotEqual(
+                    digest,
+                    get_file_list_digest(ToyDataset(root, ['a.png', 'b.png'])))
+
+                # the manifest is rebuilt after files change
+                _save_file(osp.join(root, 'a.png'), 8)
+                list_files_with_manifest(root, ('.png', ))
+                self.assertNotEqual(
+                    digest,
+                    get_file_list_digest(
+                        ToyManifestDataset(root, ['a.png', 'b.png'])))
+
+    def test_pipeline_digest(self):
+        # not influenced by `__repr__`
+        self.assertEqual(
+            get_pipeline_digest(ToyCompose([ToyTransform(2)])),
+            get_pipeline_digest(ToyCompose([ToyTransform(2)])))
+        self.assertNotEqual(
+            get_pipeline_digest(ToyCompose([ToyTransform(2)])),
+            get_pipeline_digest(ToyCompose([ToyTransform(3)])))
+        self.assertNotEqual(
+            get_pipeline_digest(ToyCompose([ToyTransform(np.ones(2))])),
+            get_pipeline_digest(ToyCompose([ToyTransform(np.zeros(2))])))
+
+    def test_module_digest(self):
+        module = nn.Linear(2, 2)
+        digest = get_module_digest(module)
+        self.assertEqual(digest, get_module_digest(module))
+        module_copy = nn.Linear(2, 2)
+        module_copy.load_state_dict(module.state_dict())
+        self.assertEqual(digest, get_module_digest(module_copy))
+        self.assertNotEqual(digest, get_module_digest(nn.Linear(2, 2)))
+
+
+class TestFeatureCacheManager(TestCase):
+
+    def test_parse_size(self):
+        self.assertIsNone(parse_size(None))
+        self.assertEqual(parse_size(10), 10)
+        self.assertEqual(parse_size('10'), 10)
+        self.assertEqual(parse_size('2K'), 2048)
+        self.assertEqual(parse_size('1.5mb'), int(1.5 * 1024**2))
+
+    def test_register_and_evict(self):
+        with TemporaryDirectory() as tmp_dir:
+            manager = FeatureCacheManager(tmp_dir, max_size='30')
+            for idx in range(3):
+                name = f'inception_state-{idx}'
+                os.makedirs(osp.join(tmp_dir, name))
+                _save_file(osp.join(tmp_dir, name, 'feat.npy'), 10)
+                manager.register(name, dict(real_nums=idx))
+                time.sleep(0.01)
+            self.assertEqual(len(manager.list_entries()), 3)
+
+            # access the oldest one, then the second one is evicted
+            manager.touch('inception_state-0')
+            os.makedirs(osp.join(tmp_dir, 'inception_state-3'))
+            _save_file(osp.join(tmp_dir, 'inception_state-3', 'feat.npy'), 10)
+            manager.register('inception_state-3')
+            names = [entry['name'] for entry in manager.list_entries()]
+            self.assertEqual(names, [
+                'inception_state-2', 'inception_state-0', 'inception_state-3'
+            ])
+            self.assertFalse(
+                osp.exists(osp.join(tmp_dir, 'inception_state-1')))
+
+            # evict with the new budget
+            removed = manager.evict(max_size=10)
+            self.assertEqual(removed,
+                             ['inception_state-2', 'inception_state-0'])
+
+    def test_list_and_prune(self):
+        with TemporaryDirectory() as tmp_dir:
+            manager = FeatureCacheManager(tmp_dir)
+            self.assertIsNone(manager.max_size)
+            _save_file(osp.join(tmp_dir, 'inception_state-old.pkl'), 10)
+            _save_file(osp.join(tmp_dir, 'other_file.pt'), 10)
+            os.makedirs(osp.join(tmp_dir, 'vgg_state-0'))
+            manager.register('vgg_state-0')
+
+            # caches being written are not listed as untracked
+            os.makedirs(osp.join(tmp_dir, 'inception_state-new.pkl.chunks'))
+            _save_file(osp.join(tmp_dir, 'inception_state-0.tmp-123'), 10)
+            os.makedirs(osp.join(tmp_dir, 'gen_samples-0'))
+            _save_file(
+                osp.join(tmp_dir, 'gen_samples-0', 'rank0-img-00000.npy'), 10)
+
+            entries = manager.list_entries()
+            self.assertEqual([entry['name'] for entry in entries],
+                             ['inception_state-old.pkl', 'vgg_state-0'])
+            self.assertFalse(entries[0]['tracked'])
+            self.assertTrue(entries[1]['tracked'])
+
+            # not accessed for a long time
+            self.assertEqual(manager.prune(older_than=3600), [])
+            removed = manager.prune(untracked=True)
+            self.assertEqual(removed, ['inception_state-old.pkl'])
+            removed = manager.prune(older_than=0)
+            self.assertEqual(removed, ['vgg_state-0'])
+            self.assertEqual(manager.list_entries(), [])
+            self.assertTrue(osp.exists(osp.join(tmp_dir, 'other_file.pt')))
+            self.assertTrue(
+                osp.exists(
+                    osp.join(tmp_dir, 'inception_state-new.pkl.chunks')))
+            self.assertTrue(
+                osp.exists(osp.join(tmp_dir, 'inception_state-0.tmp-123')))
+
+            # complete sample caches can be pruned
+            _save_file(osp.join(tmp_dir, 'gen_samples-0', 'rank0.json'), 10)
+            removed = manager.prune(untracked=True)
+            self.assertEqual(removed, ['gen_samples-0'])
+
+            # broken index is rebuilt
+            with open(manager.index_path, 'w') as file:
+                file.write('{')
+            self.assertEqual(manager.load_index(), dict())
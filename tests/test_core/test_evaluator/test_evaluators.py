@@ -2,9 +2,10 @@ from typing import Optional, Sequence
 from unittest import TestCase
 from unittest.mock import MagicMock
 
+import torch
 from mmengine.registry import METRICS
 
-from mmgen.core import GenEvaluator
+from mmgen.core import GenDataSample, GenEvaluator, PixelData
 from mmgen.core.evaluation.metrics import GenerativeMetric, GenMetric
 
 
@@ -77,6 +78,34 @@ class MockMetric(GenMetric):
         return dict(mock=3)
 
 
+@METRICS.register_module()
+class ToyFeatMetric(GenerativeMetric):
+    name = 'toy_feat'
+
+    def __init__(self,
+                 fake_nums: int,
+                 real_nums: int = 0,
+                 fake_key: Optional[str] = None,
+                 real_key: Optional[str] = 'img',
+                 sample_mode: str = 'ema',
+                 collect_device: str = 'cpu',
+                 prefix: Optional[str] = None) -> None:
+        super().__init__(fake_nums, real_nums, fake_key, real_key, sample_mode,
+                         collect_device, prefix)
+        self.extractor = None
+
+    def process(self, data_batch: Sequence[dict],
+                predictions: Sequence[dict]) -> None:
+        fake_imgs = torch.stack(
+            [pred['fake_img']['data'] for pred in predictions])
+        feat = self.forward_with_cache(('toy_feat', id(self.extractor)),
+                                       self.extractor, fake_imgs)
+        self.fake_results.append(feat)
+
+    def compute_metrics(self, results_fake) -> dict:
+        return dict(feat=1)
+
+
 class TestEvaluator(TestCase):
 
     def test_prepare(self):
@@ -106,3 +135,33 @@ class TestEvaluator(TestCase):
             metric = metrics[0]
             if metric.name == 'toy_normal':
                 self.assertEqual(sampler.dataset, dataloader.dataset)
+
+    def test_process_with_feature_cache(self):
+        evaluator = GenEvaluator(metrics=[
+            dict(type='ToyFeatMetric', fake_nums=2, prefix='a'),
+            dict(type='ToyFeatMetric', fake_nums=2, prefix='b'),
+        ])
+        extractor = MagicMock(return_value=torch.ones(2, 4))
+        for metric in evaluator.metrics:
+            metric.extractor = extractor
+            self.assertIs(metric.feature_cache, evaluator.feature_cache)
+
+        predictions = [
+            GenDataSample(fake_img=PixelData(data=torch.randn(3, 2, 2)))
+            for _ in range(2)
+        ]
+        evaluator.process(None, predictions, evaluator.metrics)
+        self.assertEqual(extractor.call_count, 1)
+        self.assertEqual(len(evaluator.feature_cache), 0)
+        for metric in evaluator.metrics:
+            self.assertEqual(len(metric.fake_results), 1)
+
+        # outputs are not shared across batches
+        evaluator.process(None, predictions, evaluator.metrics)
+        self.assertEqual(extractor.call_count, 2)
+
+        # metrics not in an evaluator do not use cache
+        metric = ToyFeatMetric(fake_nums=2)
+        metric.extractor = extractor
+        metric.process(None, [pred.to_dict() for pred in predictions])
+        self.assertEqual(extractor.call_count, 3)
@@ -0,0 +1,243 @@
+import os.path as osp
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+import numpy as np
+import pytest
+import torch
+import torch.nn as nn
+from torch.utils.data import DataLoader, Dataset
+
+from mmgen.core.evaluation.cache_manager import get_module_digest
+# yapf: disable
+from mmgen.core.evaluation.inception_utils import (is_feature_cache,
+                                                   load_feature_cache,
+                                                   optimize_inception_for_cpu,
+                                                   prepare_inception_feat,
+                                                   prepare_vgg_feat,
+                                                   save_feature_cache)
+
+# yapf: enable
+
+
+class ToyDataset(Dataset):
+
+    def __len__(self):
+        return 10
+
+    def __getitem__(self, idx):
+        return dict(inputs=torch.full((3, 2, 2), float(idx)))
+
+
+class ToyInception(nn.Module):
+
+    def __init__(self):
+        super().__init__()
+        self.conv = nn.Conv2d(3, 4, 3)
+        self.bn = nn.BatchNorm2d(4)
+        self.fc = nn.Linear(4, 5)
+
+    def forward(self, x, return_features: bool = False):
+        feat = self.bn(self.conv(x)).mean(dim=(2, 3))
+        if return_features:
+            return feat
+        return self.fc(feat)
+
+
+class TestOptimizeInception(TestCase):
+
+    def test_frozen(self):
+        model = torch.jit.script(ToyInception().eval())
+        frozen = optimize_inception_for_cpu(model)
+        self.assertIsNot(frozen, model)
+        self.assertNotEqual(
+            get_module_digest(frozen), get_module_digest(model))
+        x = torch.randn(2, 3, 8, 8)
+        with torch.no_grad():
+            self.assertTrue(
+                torch.allclose(
+                    frozen(x, return_features=True),
+                    model(x, return_features=True),
+                    atol=1e-5))
+        # TorchScript networks are not quantized
+        self.assertNotEqual(
+            get_module_digest(optimize_inception_for_cpu(model, True)),
+            get_module_digest(model))
+
+    def test_quantize(self):
+        model = ToyInception()
+        # eager networks are not changed without quantization
+        self.assertIs(optimize_inception_for_cpu(model), model)
+        quantized = optimize_inception_for_cpu(model, quantize=True)
+        self.assertIsInstance(quantized.conv, nn.Conv2d)
+        self.assertNotIsInstance(quantized.fc, nn.Linear)
+        self.assertNotEqual(
+            get_module_digest(quantized), get_module_digest(model))
+        x = torch.randn(2, 3, 8, 8)
+        with torch.no_grad():
+            self.assertTrue(torch.allclose(quantized(x), model(x), atol=1e-1))
+
+
+class TestFeatureCache(TestCase):
+
+    def test_save_and_load(self):
+        with TemporaryDirectory() as tmp_dir:
+            cache_dir = osp.join(tmp_dir, 'inception_state-test')
+            feat = np.random.rand(10, 16).astype(np.float32)
+            save_feature_cache(
+                cache_dir, dict(raw_feature=feat, real_mean=torch.ones(16)),
+                dict(data_root='data', real_nums=10))
+            self.assertTrue(is_feature_cache(cache_dir))
+            self.assertFalse(is_feature_cache(osp.join(tmp_dir, 'not_exist')))
+
+            state = load_feature_cache(cache_dir)
+            self.assertEqual(state['data_root'], 'data')
+            self.assertEqual(state['real_nums'], 10)
+            self.assertIsInstance(state['raw_feature'], np.memmap)
+            np.testing.assert_array_equal(state['raw_feature'], feat)
+            np.testing.assert_array_equal(state['real_mean'], np.ones(16))
+
+            state = load_feature_cache(cache_dir, mmap=False)
+            self.assertNotIsInstance(state['raw_feature'], np.memmap)
+
+            # overwrite the existing cache
+            save_feature_cache(cache_dir, dict(raw_feature=feat[:5]))
+            state = load_feature_cache(cache_dir)
+            self.assertEqual(state['raw_feature'].shape, (5, 16))
+
+    def test_prepare_feat_from_cache(self):
+        with TemporaryDirectory() as tmp_dir:
+            cache_dir = osp.join(tmp_dir, 'inception_state')
+            feat = np.random.rand(10, 16)
+            save_feature_cache(
+                cache_dir,
+                dict(
+                    real_mean=np.mean(feat, 0),
+                    real_cov=np.cov(feat, rowvar=False)))
+            metric = MagicMock()
+            metric.inception_pkl = cache_dir
+            state = prepare_inception_feat(
+                MagicMock(), metric, capture_mean_cov=True)
+            np.testing.assert_allclose(state['real_mean'], np.mean(feat, 0))
+
+            vgg_dir = osp.join(tmp_dir, 'vgg_state')
+            save_feature_cache(vgg_dir, dict(vgg_feat=torch.randn(10, 16)))
+            metric = MagicMock()
+            metric.vgg16_pkl = vgg_dir
+            vgg_feat = prepare_vgg_feat(MagicMock(), metric)
+            self.assertIsInstance(vgg_feat, torch.Tensor)
+            self.assertEqual(vgg_feat.shape, (10, 16))
+
+    def test_vgg_kth_radii(self):
+        with TemporaryDirectory() as tmp_dir:
+            vgg_dir = osp.join(tmp_dir, 'vgg_state')
+            feat = torch.randn(20, 4)
+            save_feature_cache(vgg_dir, dict(vgg_feat=feat))
+            metric = MagicMock()
+            metric.vgg16_pkl = vgg_dir
+            metric.row_batch_size = 8
+            metric.col_batch_size = 8
+            vgg_feat, kth = prepare_vgg_feat(MagicMock(), metric, knn_k=3)
+            self.assertEqual(vgg_feat.shape, (20, 4))
+            kth_exact = torch.cdist(feat, feat).kthvalue(4).values
+            np.testing.assert_allclose(
+                kth.float().numpy(), kth_exact.numpy(), rtol=1e-3)
+
+            # radii are saved to the cache
+            state = load_feature_cache(vgg_dir)
+            np.testing.assert_array_equal(state['kth_radii_k3'], kth.numpy())
+            _, kth_cached = prepare_vgg_feat(MagicMock(), metric, knn_k=3)
+            np.testing.assert_array_equal(kth_cached.numpy(), kth.numpy())
+
+            # radii are not saved without `auto_save`
+            prepare_vgg_feat(MagicMock(), metric, auto_save=False, knn_k=2)
+            self.assertNotIn('kth_radii_k2', load_feature_cache(vgg_dir))
+
+    def test_resume_from_chunks(self):
+        dataloader = DataLoader(ToyDataset(), batch_size=2)
+
+        def data_preprocessor(data):
+            return torch.stack(data['inputs']), None
+
+        num_calls = []
+        interrupt = [True]
+
+        def forward_inception(img):
+            num_calls.append(img.shape[0])
+            if interrupt[0] and len(num_calls) == 3:
+                raise RuntimeError('interrupted')
+            return img.mean(dim=(2, 3))
+
+        with TemporaryDirectory() as tmp_dir:
+            metric = MagicMock()
+            metric.inception_pkl = osp.join(tmp_dir, 'inception_state')
+            metric.real_nums = -1
+            metric.real_key = None
+            metric.device = 'cpu'
+            metric.forward_inception = forward_inception
+
+            with pytest.raises(RuntimeError):
+                prepare_inception_feat(
+                    dataloader,
+                    metric,
+                    data_preprocessor,
+                    capture_mean_cov=True,
+                    chunk_size=3)
+            # one chunk with 3 images is finished
+            chunk_dir = osp.join(f'{metric.inception_pkl}.chunks',
+                                 '1gpus-3items')
+            self.assertTrue(
+                osp.exists(osp.join(chunk_dir, 'rank0-000000.npy')))
+
+            num_calls.clear()
+            interrupt[0] = False
+            state = prepare_inception_feat(
+                dataloader,
+                metric,
+                data_preprocessor,
+                capture_mean_cov=True,
+                chunk_size=3)
+            # the remaining 7 images are extracted in 4 batches
+            self.assertEqual(num_calls, [2, 2, 2, 1])
+            self.assertFalse(osp.exists(f'{metric.inception_pkl}.chunks'))
+            self.assertTrue(is_feature_cache(metric.inception_pkl))
+
+            feat = np.stack([np.full(3, idx / 127.5 - 1) for idx in range(10)])
+            np.testing.assert_allclose(
+                state['real_mean'], np.mean(feat, 0), rtol=1e-5)
+            np.testing.assert_allclose(
+                state['real_cov'], np.cov(feat, rowvar=False), rtol=1e-4)
+
+    def test_feature_batch_size(self):
+        dataloader = DataLoader(ToyDataset(), batch_size=3)
+
+        def data_preprocessor(data):
+            return torch.stack(data['inputs']), None
+
+        num_calls = []
+
+        class ToyMetric:
+            real_nums = -1
+            real_key = None
+            device = 'cpu'
+
+            def __init__(self, inception_pkl):
+                self.inception_pkl = inception_pkl
+
+            def get_feature_batch_size(self, image, forward_fn):
+                return 4
+
+            def forward_inception(self, img):
+                num_calls.append(img.shape[0])
+                return img.mean(dim=(2, 3))
+
+        with TemporaryDirectory() as tmp_dir:
+            metric = ToyMetric(osp.join(tmp_dir, 'inception_state'))
+            state = prepare_inception_feat(
+                dataloader, metric, data_preprocessor, capture_mean_cov=True)
+            # images loaded in batches of 3 are regrouped into batches of 4
+            self.assertEqual(num_calls, [4, 4, 2])
+            feat = np.stack([np.full(3, idx / 127.5 - 1) for idx in range(10)])
+            np.testing.assert_allclose(
+                state['real_mean'], np.mean(feat, 0), rtol=1e-5)
@@ -16,13 +16,18 @@ from mmengine.runner import Runner
 from mmengine.utils import TORCH_VERSION, digit_version
 from torch.utils.data.dataloader import DataLoader
 
-from mmgen.core import (FrechetInceptionDistance, GenDataSample,
+from mmgen.core import (FrechetInceptionDistance,
+                        FrechetInceptionDistanceInfinity, GenDataSample,
                         InceptionScore, MultiScaleStructureSimilarity,
                         PixelData, PrecisionAndRecall,
                         SlicedWassersteinDistance)
+from mmgen.core.evaluation.metric_utils import (
+    ImageAccumulator, find_max_batch_size, frechet_distance_sym, ms_ssim,
+    ms_ssim_torch, poly_mmd2, sliced_wasserstein_from_histograms, sqrtm_psd)
 from mmgen.core.evaluation.metrics import (Equivariance, GenMetric,
-                                           PerceptualPathLength, TransFID,
-                                           TransIS)
+                                           KernelInceptionDistance,
+                                           PerceptualPathLength, ResultBuffer,
+                                           TransFID, TransIS)
 from mmgen.datasets import (PackGenInputs, PairedImageDataset,
                             UnconditionalImageDataset)
 from mmgen.models import (LSGAN, DCGANGenerator, GANDataPreprocessor, Pix2Pix,
@@ -142,6 +147,80 @@ class TestBaseMetric(TestCase):
 
         toy_metric = ToyMetric(fake_nums=10, real_nums=20)
 
+    def test_result_buffer(self):
+        toy_metric = ToyMetric(fake_nums=5, real_nums=0)
+        toy_metric.fake_results = ResultBuffer(toy_metric.fake_nums_per_device)
+        feats = torch.randn(8, 3)
+        toy_metric.fake_results.add(feats[:4])
+        self.assertEqual(len(toy_metric.fake_results), 4)
+        # results beyond the capacity are dropped
+        toy_metric.fake_results.add(feats[4:])
+        self.assertEqual(len(toy_metric.fake_results), 5)
+        storage = toy_metric.fake_results.data
+
+        results = toy_metric._collect_target_results('fake')
+        self.assertEqual(len(results), 1)
+        self.assertTrue((results[0] == feats[:5]).all())
+        self.assertTrue(
+            (GenMetric._concat_results(results) == feats[:5]).all())
+        self.assertTrue((GenMetric._concat_results(
+            toy_metric.fake_results) == feats[:5]).all())
+
+        # storage is reused after clear
+        toy_metric.fake_results.clear()
+        self.assertEqual(len(toy_metric.fake_results), 0)
+        toy_metric.fake_results.add(feats[5:7])
+        self.assertEqual(toy_metric.fake_results.data.data_ptr(),
+                         storage.data_ptr())
+
+        # grow without capacity
+        buffer = ResultBuffer(dtype=torch.float64)
+        for idx in range(4):
+            buffer.add(feats[idx * 2:(idx + 1) * 2])
+        self.assertEqual(buffer.data.dtype, torch.float64)
+        self.assertTrue((buffer.data == feats.to(torch.float64)).all())
+
+    def test_image_accumulator(self):
+        images = torch.randn(7, 3, 2, 2)
+        accumulator = ImageAccumulator(batch_size=3)
+        self.assertEqual(accumulator.add(images[:2]), [])
+        self.assertEqual(len(accumulator), 2)
+        batches = accumulator.add(images[2:7])
+        self.assertEqual([start for start, _ in batches], [0, 3])
+        self.assertTrue(
+            (torch.cat([batch for _, batch in batches]) == images[:6]).all())
+        self.assertEqual(len(accumulator), 1)
+        start, batch = accumulator.flush()
+        self.assertEqual(start, 6)
+        self.assertTrue((batch == images[6:]).all())
+        self.assertIsNone(accumulator.flush())
+
+        # images are returned as they are without batch size
+        accumulator = ImageAccumulator()
+        batches = accumulator.add(images[:2]) + accumulator.add(images[2:])
+        self.assertEqual([start for start, _ in batches], [0, 2])
+        self.assertEqual(len(accumulator), 0)
+
+    def test_find_max_batch_size(self):
+
+        def forward_fn(batch):
+            if batch.shape[0] > 20:
+                raise RuntimeError('CUDA out of memory.')
+            return batch
+
+        image = torch.randn(3, 2, 2)
+        self.assertEqual(find_max_batch_size(forward_fn, image), 16)
+        self.assertEqual(
+            find_max_batch_size(forward_fn, image, max_batch_size=8), 8)
+        with pytest.raises(RuntimeError):
+            find_max_batch_size(forward_fn, image, min_batch_size=32)
+
+        def error_fn(batch):
+            raise RuntimeError('other errors')
+
+        with pytest.raises(RuntimeError, match='other errors'):
+            find_max_batch_size(error_fn, image)
+
 
 class TestFID(TestCase):
 
@@ -168,6 +247,11 @@ class TestFID(TestCase):
 
             self.assertIsNone(fid.real_mean)
             self.assertIsNone(fid.real_cov)
+            # only the StyleGAN style Inception quantizes the inputs
+            self.assertTrue(fid.supports_sample_cache)
+            fid.inception_style = 'PyTorch'
+            self.assertFalse(fid.supports_sample_cache)
+            fid.inception_style = 'StyleGAN'
 
         module = MagicMock()
         module.data_preprocessor = MagicMock()
@@ -263,6 +347,296 @@ class TestFID(TestCase):
         self.assertTrue('mean' in metric)
         self.assertTrue('cov' in metric)
 
+    def test_streaming(self):
+        gen_samples = [
+            GenDataSample(fake_img=PixelData(
+                data=torch.randn(3, 2, 2))).to_dict() for _ in range(4)
+        ]
+        mean_cov_list = []
+        for streaming in [False, True]:
+            with patch.object(FrechetInceptionDistance, '_load_inception',
+                              self.mock_inception_stylegan):
+                fid = FrechetInceptionDistance(
+                    fake_nums=6,
+                    inception_pkl=self.inception_pkl,
+                    streaming=streaming)
+            torch.manual_seed(42)
+            fid.process(None, gen_samples)
+            fid.process(None, gen_samples)
+            fid.process(None, gen_samples)
+            fake_results = fid._collect_target_results('fake')
+            if streaming:
+                # extra features are dropped
+                self.assertEqual(fid._feat_num, 0)
+                mean_cov_list.append(fake_results)
+            else:
+                feats = torch.cat(fake_results, dim=0).numpy()
+                mean_cov_list.append(
+                    [np.mean(feats, 0),
+                     np.cov(feats, rowvar=False)])
+
+        np.testing.assert_allclose(
+            mean_cov_list[0][0], mean_cov_list[1][0], rtol=1e-5, atol=1e-5)
+        np.testing.assert_allclose(
+            mean_cov_list[0][1], mean_cov_list[1][1], rtol=1e-5, atol=1e-5)
+
+        # test evaluate
+        with patch.object(FrechetInceptionDistance, '_load_inception',
+                          self.mock_inception_stylegan):
+            fid = FrechetInceptionDistance(
+                fake_nums=4, inception_pkl=self.inception_pkl, streaming=True)
+        module = MagicMock()
+        module.data_preprocessor = MagicMock()
+        module.data_preprocessor.device = 'cpu'
+        fid.prepare(module, MagicMock())
+        fid.process(None, gen_samples)
+        metric = fid.evaluate()
+        self.assertTrue('fid' in metric)
+        self.assertIsNone(fid._feat_sum)
+
+    def test_streaming_empty_rank(self):
+        # fake_nums=9 on 4 ranks gives 3/3/3/0 samples, the last rank should
+        # still join the all-reduce with zero statistics
+        with patch.object(FrechetInceptionDistance, '_load_inception',
+                          self.mock_inception_stylegan):
+            fid = FrechetInceptionDistance(
+                fake_nums=9, inception_pkl=self.inception_pkl, streaming=True)
+        gen_samples = [
+            GenDataSample(fake_img=PixelData(
+                data=torch.randn(3, 2, 2))).to_dict() for _ in range(4)
+        ]
+        reduced = []
+
+        def mock_all_reduce(data, op='sum'):
+            reduced.append((data.clone(), op))
+            if op == 'max':
+                data.fill_(8)
+
+        metrics_module = 'mmgen.core.evaluation.metrics'
+        with patch(f'{metrics_module}.get_dist_info', return_value=(3, 4)), \
+                patch(f'{metrics_module}.get_world_size', return_value=4), \
+                patch(f'{metrics_module}.is_main_process',
+                      return_value=False), \
+                patch(f'{metrics_module}.all_reduce', mock_all_reduce):
+            self.assertEqual(fid._stream_nums_per_device, 0)
+            fid.process(None, gen_samples)
+            self.assertIsNone(fid._feat_sum)
+            fid._collect_target_results('fake')
+
+        self.assertEqual(len(reduced), 4)
+        self.assertEqual(reduced[0][1], 'max')
+        feat_num, feat_sum, feat_outer_sum = [data for data, _ in reduced[1:]]
+        self.assertEqual(int(feat_num), 0)
+        self.assertEqual(feat_sum.shape, (8, ))
+        self.assertEqual(feat_outer_sum.shape, (8, 8))
+        self.assertEqual(feat_sum.dtype, torch.float64)
+        self.assertTrue((feat_sum == 0).all())
+        self.assertTrue((feat_outer_sum == 0).all())
+        self.assertIsNone(fid._feat_sum)
+
+    def test_feature_batch_size(self):
+        with patch.object(FrechetInceptionDistance, '_load_inception',
+                          self.mock_inception_stylegan):
+            fid = FrechetInceptionDistance(
+                fake_nums=6,
+                inception_pkl=self.inception_pkl,
+                gen_batch_size=3,
+                feature_batch_size=4)
+        # generator batch size is decoupled from the dataloader
+        dataloader = DataLoader(list(range(10)), batch_size=2)
+        sampler = fid.get_metric_sampler(MagicMock(), dataloader, [fid])
+        self.assertEqual(sampler.batch_size, 3)
+        self.assertEqual(len(sampler), 2)
+
+        batch_sizes = []
+
+        def forward_inception(image):
+            batch_sizes.append(image.shape[0])
+            return image.flatten(1)
+
+        fid.forward_inception = forward_inception
+        images = torch.randn(9, 3, 2, 2)
+        for idx in range(3):
+            fid.process(None, [
+                GenDataSample(fake_img=PixelData(data=img)).to_dict()
+                for img in images[idx * 3:(idx + 1) * 3]
+            ])
+        # 6 images are enough, the last batch is skipped
+        self.assertEqual(batch_sizes, [4])
+        self.assertEqual(fid._num_pending_fakes, 2)
+        fid.process_pending()
+        self.assertEqual(batch_sizes, [4, 2])
+        self.assertTrue((fid.fake_results.data == images[:6].flatten(1)).all())
+
+        # 'auto' is only tuned on CUDA devices
+        with patch.object(FrechetInceptionDistance, '_load_inception',
+                          self.mock_inception_stylegan):
+            fid = FrechetInceptionDistance(
+                fake_nums=6,
+                inception_pkl=self.inception_pkl,
+                feature_batch_size='auto')
+        self.assertIsNone(
+            fid.get_feature_batch_size(images[0], forward_inception))
+
+        with pytest.raises(AssertionError):
+            with patch.object(FrechetInceptionDistance, '_load_inception',
+                              self.mock_inception_stylegan):
+                FrechetInceptionDistance(fake_nums=6, feature_batch_size=0)
+
+    def test_eigh_solver(self):
+        rng = np.random.RandomState(0)
+        real_feat = rng.randn(200, 16)
+        fake_feat = rng.randn(150, 16) * 1.5 + 0.2
+        real_mean, real_cov = np.mean(real_feat, 0), np.cov(
+            real_feat, rowvar=False)
+        fake_mean, fake_cov = np.mean(fake_feat, 0), np.cov(
+            fake_feat, rowvar=False)
+        scipy_res = FrechetInceptionDistance._calc_fid(fake_mean, fake_cov,
+                                                       real_mean, real_cov)
+        eigh_res = frechet_distance_sym(fake_mean, fake_cov, real_mean,
+                                        real_cov)
+        np.testing.assert_allclose(scipy_res, eigh_res, rtol=1e-6)
+        eigh_res = frechet_distance_sym(fake_mean, fake_cov, real_mean,
+                                        real_cov, sqrtm_psd(real_cov))
+        np.testing.assert_allclose(scipy_res, eigh_res, rtol=1e-6)
+
+        with pytest.raises(AssertionError):
+            with patch.object(FrechetInceptionDistance, '_load_inception',
+                              self.mock_inception_stylegan):
+                FrechetInceptionDistance(fake_nums=4, fid_solver='svd')
+
+        metrics = []
+        for fid_solver in ['scipy', 'eigh']:
+            with patch.object(FrechetInceptionDistance, '_load_inception',
+                              self.mock_inception_stylegan):
+                fid = FrechetInceptionDistance(
+                    fake_nums=4,
+                    inception_pkl=self.inception_pkl,
+                    fid_solver=fid_solver)
+            module = MagicMock()
+            module.data_preprocessor = MagicMock()
+            module.data_preprocessor.device = 'cpu'
+            fid.prepare(module, MagicMock())
+            torch.manual_seed(42)
+            gen_samples = [
+                GenDataSample(fake_img=PixelData(
+                    data=torch.randn(3, 2, 2))).to_dict() for _ in range(4)
+            ]
+            fid.process(None, gen_samples)
+            metrics.append(fid.evaluate())
+        # the square root of real covariance is cached
+        self.assertIsNotNone(fid._real_cov_sqrt)
+        # covariances of few samples are singular, which is ill-conditioned
+        # for `scipy.linalg.sqrtm`
+        np.testing.assert_allclose(
+            metrics[0]['fid'], metrics[1]['fid'], rtol=1e-2)
+
+
+class TestKID(TestCase):
+
+    inception_pkl = osp.join(
+        osp.dirname(__file__), '..', '..',
+        'data/inception_pkl/inception_feat.pkl')
+
+    mock_inception_stylegan = MagicMock(
+        return_value=(inception_mock('StyleGAN'), 'StyleGAN'))
+
+    def test_poly_mmd2(self):
+        x = torch.randn(7, 4, dtype=torch.float64)
+        y = torch.randn(7, 4, dtype=torch.float64) + 1
+        kxx = (x @ x.t() / 4 + 1)**3
+        kyy = (y @ y.t() / 4 + 1)**3
+        kxy = (x @ y.t() / 4 + 1)**3
+        mmd2 = ((kxx.sum() - kxx.diag().sum() + kyy.sum() - kyy.diag().sum()) /
+                (7 * 6) - 2 * kxy.sum() / 49)
+        self.assertAlmostEqual(poly_mmd2(x, y, block_size=3), float(mmd2))
+        self.assertAlmostEqual(poly_mmd2(x, y), float(mmd2))
+        with pytest.raises(AssertionError):
+            poly_mmd2(x, y[:5])
+
+    def test_process_and_compute(self):
+        construct_inception_pkl(self.inception_pkl)
+        with patch.object(KernelInceptionDistance, '_load_inception',
+                          self.mock_inception_stylegan):
+            kid = KernelInceptionDistance(
+                fake_nums=4,
+                num_subsets=3,
+                subset_size=3,
+                block_size=2,
+                inception_pkl=self.inception_pkl)
+        self.assertIsNone(kid.real_feats)
+        module = MagicMock()
+        module.data_preprocessor = MagicMock()
+        module.data_preprocessor.device = 'cpu'
+        kid.prepare(module, MagicMock())
+        self.assertEqual(kid.real_feats.shape, (10, 2048))
+
+        gen_samples = [
+            GenDataSample(fake_img=PixelData(
+                data=torch.randn(3, 2, 2))).to_dict() for _ in range(4)
+        ]
+        kid.process(None, gen_samples)
+        metric = kid.evaluate()
+        self.assertIn('kid', metric)
+        self.assertIn('std', metric)
+        self.assertEqual(len(kid.fake_results), 0)
+
+
+class TestFIDInfinity(TestCase):
+
+    inception_pkl = osp.join(
+        osp.dirname(__file__), '..', '..',
+        'data/inception_pkl/inception_feat.pkl')
+
+    mock_inception_stylegan = MagicMock(
+        return_value=(inception_mock('StyleGAN'), 'StyleGAN'))
+
+    def test_extrapolation(self):
+        with patch.object(FrechetInceptionDistanceInfinity, '_load_inception',
+                          self.mock_inception_stylegan):
+            fid_inf = FrechetInceptionDistanceInfinity(
+                fake_nums=2000, num_points=10)
+        fid_inf.real_mean = np.zeros(16)
+        fid_inf.real_cov = np.eye(16)
+        torch.manual_seed(0)
+        fake_feats = torch.randn(2000, 16, dtype=torch.float64)
+        metric = fid_inf.compute_metrics([fake_feats])
+
+        # samples from the real distribution, FID of finite samples is
+        # positively biased and the extrapolation reduces the bias
+        feats_np = fake_feats.numpy()
+        fid, _, _ = frechet_distance_sym(
+            np.mean(feats_np, 0), np.cov(feats_np, rowvar=False), np.zeros(16),
+            np.eye(16))
+        self.assertAlmostEqual(metric['fid'], fid)
+        self.assertLess(metric['fid_inf'], metric['fid'])
+
+    def test_process_and_compute(self):
+        construct_inception_pkl(self.inception_pkl)
+        with patch.object(FrechetInceptionDistanceInfinity, '_load_inception',
+                          self.mock_inception_stylegan):
+            fid_inf = FrechetInceptionDistanceInfinity(
+                fake_nums=8,
+                num_points=3,
+                min_fake_nums=4,
+                inception_pkl=self.inception_pkl)
+        with pytest.raises(AssertionError):
+            FrechetInceptionDistanceInfinity(fake_nums=8, num_points=1)
+        module = MagicMock()
+        module.data_preprocessor = MagicMock()
+        module.data_preprocessor.device = 'cpu'
+        fid_inf.prepare(module, MagicMock())
+
+        gen_samples = [
+            GenDataSample(fake_img=PixelData(
+                data=torch.randn(3, 2, 2))).to_dict() for _ in range(4)
+        ]
+        fid_inf.process(None, gen_samples)
+        fid_inf.process(None, gen_samples)
+        metric = fid_inf.evaluate()
+        self.assertIn('fid_inf', metric)
+        self.assertIn('fid', metric)
+
 
 class TestIS(TestCase):
 
@@ -279,12 +653,15 @@ class TestIS(TestCase):
         self.assertEqual(IS.resize, True)
         self.assertEqual(IS.splits, 10)
         self.assertEqual(IS.resize_method, 'bicubic')
+        self.assertTrue(IS.supports_sample_cache)
 
         with patch.object(InceptionScore, '_load_inception',
                           self.mock_inception_stylegan):
             IS = InceptionScore(
                 fake_nums=2, fake_key='fake', use_pillow_resize=False)
         self.assertEqual(IS.use_pillow_resize, False)
+        # float images are interpolated before quantization
+        self.assertFalse(IS.supports_sample_cache)
 
         module = MagicMock()
         module.data_preprocessor = MagicMock()
@@ -409,6 +786,42 @@ class TestPR:
         print(pr_score)
         assert pr_score['precision'] >= 0 and pr_score['recall'] >= 0
 
+    def test_pr_ivf(self):
+        torch.manual_seed(0)
+        real_feats = torch.randn(60, 8)
+        fake_feats = torch.randn(40, 8) + 0.5
+
+        # exact results in float32
+        exact = dict()
+        for name, manifold, probes in [('precision', real_feats, fake_feats),
+                                       ('recall', fake_feats, real_feats)]:
+            kth = torch.cdist(manifold, manifold).kthvalue(4).values
+            pred = (torch.cdist(probes, manifold) <= kth).any(dim=1)
+            exact[name] = float(pred.float().mean())
+
+        for nprobe in [1, 100]:
+            with patch.object(PrecisionAndRecall, '_load_vgg',
+                              self.mock_vgg_pytorch):
+                pr = PrecisionAndRecall(
+                    40,
+                    k=3,
+                    knn_backend='ivf',
+                    ann_cfg=dict(num_lists=4, nprobe=nprobe))
+            assert pr.ann_cfg['num_iters'] == 10
+            pr.results_real = real_feats
+            pr_score = pr.compute_metrics(list(torch.split(fake_feats, 1)))
+            for name in ['precision', 'recall']:
+                err_bound = pr_score[f'{name}_err_bound']
+                assert abs(pr_score[name] - exact[name]) <= err_bound + 1e-6
+                if nprobe == 100:
+                    # all lists are probed, which is exact
+                    assert err_bound == 0
+
+        with pytest.raises(AssertionError):
+            with patch.object(PrecisionAndRecall, '_load_vgg',
+                              self.mock_vgg_pytorch):
+                PrecisionAndRecall(40, knn_backend='faiss')
+
 
 class TestMS_SSIM(TestCase):
 
@@ -416,6 +829,8 @@ class TestMS_SSIM(TestCase):
         MS_SSIM = MultiScaleStructureSimilarity(
             fake_nums=10, fake_key='fake', sample_model='ema')
         self.assertEqual(MS_SSIM.num_pairs, 5)
+        # images are quantized as `(img + 1) / 2 * 255`
+        self.assertFalse(MS_SSIM.supports_sample_cache)
 
         with self.assertRaises(AssertionError):
             MultiScaleStructureSimilarity(fake_nums=9)
@@ -466,6 +881,28 @@ class TestMS_SSIM(TestCase):
         MS_SSIM = MultiScaleStructureSimilarity(
             fake_nums=4, fake_key='fake', sample_model='ema', prefix='ms-ssim')
 
+    def test_torch_ms_ssim(self):
+        torch.manual_seed(0)
+        img1 = torch.randint(0, 256, (4, 3, 32, 32), dtype=torch.uint8)
+        # correlated pairs
+        img2 = (img1.float() * 0.7 + torch.rand(4, 3, 32, 32) * 76).to(
+            torch.uint8)
+        ref = ms_ssim(
+            img1.permute(0, 2, 3, 1).numpy(),
+            img2.permute(0, 2, 3, 1).numpy(),
+            reduce_mean=False)
+        scores = ms_ssim_torch(img1, img2, reduce_mean=False)
+        np.testing.assert_allclose(scores.numpy(), ref, rtol=1e-4, atol=1e-5)
+        score = ms_ssim_torch(img1, img2, filter_size=4)
+        ref = ms_ssim(
+            img1.permute(0, 2, 3, 1).numpy(),
+            img2.permute(0, 2, 3, 1).numpy(),
+            filter_size=4)
+        np.testing.assert_allclose(score.item(), ref, rtol=1e-4, atol=1e-5)
+
+        with self.assertRaises(RuntimeError):
+            ms_ssim_torch(img1, img2[:2])
+
 
 class TestSWD(TestCase):
 
@@ -513,6 +950,70 @@ class TestSWD(TestCase):
             for _ in range(2)
         ]
 
+    def test_streaming(self):
+        model = MagicMock()
+        model.data_preprocessor = GANDataPreprocessor()
+        torch.random.manual_seed(42)
+        real_samples = [
+            dict(inputs=torch.rand(3, 32, 32) * 255.) for _ in range(100)
+        ]
+        fake_samples = [
+            GenDataSample(
+                fake_img=PixelData(data=torch.rand(3, 32, 32) * 2 -
+                                   1)).to_dict() for _ in range(100)
+        ]
+
+        outputs = []
+        for streaming in [False, True]:
+            swd = SlicedWassersteinDistance(
+                fake_nums=100, image_shape=(3, 32, 32), streaming=streaming)
+            swd.prepare(model, None)
+            swd.process(real_samples[:50], fake_samples[:50])
+            swd.process(real_samples[50:], fake_samples[50:])
+            if streaming:
+                # only histograms are kept
+                self.assertEqual(swd.real_results, [[], []])
+                self.assertEqual(swd._sketches[0]['real_hist'].shape,
+                                 (512, 4096))
+                self.assertEqual(swd._sketches[0]['real_hist'].sum(),
+                                 100 * 128 * 512)
+            outputs.append(list(swd.evaluate().values()))
+        self.assertIsNone(swd._sketches)
+        self.assertEqual(len(outputs[0]), len(outputs[1]))
+        self.assertTrue(all([d >= 0 for d in outputs[1]]))
+
+        # projections out of the range of the first batch are counted
+        swd = SlicedWassersteinDistance(
+            fake_nums=100, image_shape=(3, 32, 32), streaming=True)
+        swd.prepare(model, None)
+        swd.process(real_samples[:50], fake_samples[:50])
+        self.assertEqual(swd._sketches[0]['fake_clamped'], 0)
+        outlier_samples = [
+            GenDataSample(
+                fake_img=PixelData(data=torch.rand(3, 32, 32) * 200 -
+                                   100)).to_dict() for _ in range(50)
+        ]
+        swd.process(real_samples[50:], outlier_samples)
+        self.assertGreater(swd._sketches[0]['fake_clamped'], 0)
+        with self.assertWarnsRegex(UserWarning, 'clamped'):
+            swd.evaluate()
+
+        # compare with the exact distance of the projections
+        proj_a = torch.randn(1000, 8, dtype=torch.float64)
+        proj_b = torch.randn(1000, 8, dtype=torch.float64) * 1.2 + 0.3
+        exact = (proj_a.sort(dim=0).values -
+                 proj_b.sort(dim=0).values).abs().mean().item()
+        low, num_bins = -8., 4096
+        bin_width = torch.full((8, ), 16. / num_bins, dtype=torch.float64)
+        hists = []
+        for proj in [proj_a, proj_b]:
+            bins = ((proj - low) / bin_width).long().clamp(0, num_bins - 1)
+            hist = torch.zeros(8, num_bins, dtype=torch.float64)
+            hist.scatter_add_(1, bins.t(), torch.ones_like(hist[:, :1000]))
+            hists.append(hist)
+        approx = sliced_wasserstein_from_histograms(*hists, bin_width)
+        self.assertAlmostEqual(approx, exact, delta=16. / num_bins)
+
 
 @pytest.mark.skipif(
     digit_version(TORCH_VERSION) <= digit_version('1.6.0'),
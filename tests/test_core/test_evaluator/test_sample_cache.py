@@ -0,0 +1,92 @@
+import os.path as osp
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+import torch
+
+from mmgen.core import GenDataSample, PixelData
+from mmgen.core.evaluation.cache_manager import FeatureCacheManager
+from mmgen.core.evaluation.sample_cache import (GenSampleCache,
+                                                get_sample_cache_name)
+
+
+def _get_outputs(images, nested=False):
+    outputs = []
+    for image in images:
+        if nested:
+            sample = GenDataSample(
+                ema=GenDataSample(fake_img=PixelData(data=image)),
+                orig=GenDataSample(fake_img=PixelData(data=-image)))
+        else:
+            sample = GenDataSample(fake_img=PixelData(data=image))
+        sample.noise = torch.randn(4)
+        outputs.append(sample)
+    return outputs
+
+
+class TestGenSampleCache(TestCase):
+
+    def test_cache_name(self):
+        key_args = dict(weights='abc', sample_model='ema', seed=0)
+        name = get_sample_cache_name(key_args)
+        self.assertTrue(name.startswith('gen_samples-'))
+        self.assertEqual(name, get_sample_cache_name(dict(key_args)))
+        key_args['seed'] = 1
+        self.assertNotEqual(name, get_sample_cache_name(key_args))
+
+    def test_save_and_load(self):
+        images = torch.rand(7, 3, 4, 4) * 2 - 1
+        batch_sizes = [3, 3, 1]
+        for nested in [False, True]:
+            with TemporaryDirectory() as tmp_dir:
+                cache = GenSampleCache(
+                    'gen_samples-toy', tmp_dir, chunk_size=2)
+                self.assertFalse(cache.is_complete)
+                start = 0
+                for batch_size in batch_sizes:
+                    cache.add(
+                        _get_outputs(images[start:start + batch_size], nested))
+                    start += batch_size
+                cache.dump()
+                self.assertIn('gen_samples-toy', [
+                    e['name']
+                    for e in FeatureCacheManager(tmp_dir).list_entries()
+                ])
+
+                cache = GenSampleCache('gen_samples-toy', tmp_dir)
+                self.assertTrue(cache.is_complete)
+                self.assertEqual(len(cache), 3)
+                loaded = []
+                for batch_size in batch_sizes:
+                    outputs = cache.load_batch()
+                    self.assertEqual(len(outputs), batch_size)
+                    loaded += [out.to_dict() for out in outputs]
+                with self.assertRaises(AssertionError):
+                    cache.load_batch()
+
+            for image, out in zip(images, loaded):
+                self.assertNotIn('noise', out)
+                if nested:
+                    cached = out['ema']['fake_img']['data']
+                    self.assertTrue(
+                        torch.allclose(
+                            out['orig']['fake_img']['data'],
+                            -image,
+                            atol=1 / 127.5))
+                else:
+                    cached = out['fake_img']['data']
+                # metrics quantize images to the same uint8 values
+                quant = (image * 127.5 + 128).clamp(0, 255).to(torch.uint8)
+                quant_cached = (cached * 127.5 + 128).clamp(0, 255).to(
+                    torch.uint8)
+                self.assertTrue((quant == quant_cached).all())
+
+    def test_incomplete(self):
+        with TemporaryDirectory() as tmp_dir:
+            cache = GenSampleCache('gen_samples-toy', tmp_dir, chunk_size=2)
+            cache.add(_get_outputs(torch.rand(3, 3, 4, 4)))
+            # meta is not saved until `dump`
+            self.assertTrue(osp.exists(osp.join(tmp_dir, 'gen_samples-toy')))
+            cache = GenSampleCache('gen_samples-toy', tmp_dir)
+            self.assertFalse(cache.is_complete)
+            self.assertEqual(len(cache), 0)
@@ -0,0 +1,48 @@
+import time
+from unittest import TestCase
+
+import torch
+
+from mmgen.core.runners.loops import AsyncProcessor
+
+
+class ToyEvaluator:
+
+    def __init__(self):
+        self.processed = []
+        self.grad_enabled = []
+
+    def process(self, data_batch, outputs, metrics):
+        # slow consumer
+        time.sleep(0.001)
+        if data_batch == 'error':
+            raise RuntimeError('process failed')
+        self.processed.append((data_batch, outputs))
+        self.grad_enabled.append(torch.is_grad_enabled())
+
+
+class TestAsyncProcessor(TestCase):
+
+    def test_order(self):
+        evaluator = ToyEvaluator()
+        processor = AsyncProcessor(evaluator, queue_size=2)
+        for idx in range(20):
+            processor.put(idx, idx * 2, None)
+        processor.close()
+        self.assertEqual(evaluator.processed,
+                         [(idx, idx * 2) for idx in range(20)])
+        self.assertFalse(any(evaluator.grad_enabled))
+
+    def test_error(self):
+        evaluator = ToyEvaluator()
+        processor = AsyncProcessor(evaluator, queue_size=1)
+        processor.put(0, 0, None)
+        processor.put('error', 1, None)
+        with self.assertRaises(RuntimeError):
+            try:
+                # raised by `put` if the worker has failed already
+                processor.put(2, 2, None)
+            finally:
+                processor.close()
+        # batches after the failed one are skipped
+        self.assertEqual(evaluator.processed, [(0, 0)])
@@ -0,0 +1,81 @@
+# Copyright (c) OpenMMLab. All rights reserved.
+import os
+import os.path as osp
+from tempfile import TemporaryDirectory
+from unittest.mock import patch
+
+from mmgen.datasets import UnconditionalImageDataset, file_manifest
+from mmgen.datasets.file_manifest import (get_manifest_paths,
+                                          list_files_with_manifest)
+from mmgen.utils import register_all_modules
+
+register_all_modules()
+
+
+def _touch(path, content=b'0'):
+    os.makedirs(osp.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(content)
+
+
+def test_list_files_with_manifest():
+    with TemporaryDirectory() as tmp_dir, patch.object(
+            file_manifest, 'MANIFEST_CACHE_DIR', osp.join(tmp_dir, 'cache')):
+        root = osp.join(tmp_dir, 'data')
+        for name in ['b.png', 'a.jpg', 'sub/c.png', 'sub/d.txt']:
+            _touch(osp.join(root, name))
+        suffix = ('.jpg', '.png')
+        manifest_path = get_manifest_paths(root, suffix)[-1]
+        assert not osp.exists(manifest_path)
+
+        files = list_files_with_manifest(root, suffix)
+        assert files == ['a.jpg', 'b.png', osp.join('sub', 'c.png')]
+        assert osp.exists(manifest_path)
+        # nothing is written into the root
+        assert sorted(os.listdir(root)) == ['a.jpg', 'b.png', 'sub']
+
+        # the valid manifest is reused without scanning
+        with patch.object(file_manifest, 'scan_files') as scan_files:
+            assert list_files_with_manifest(root, suffix) == files
+            scan_files.assert_not_called()
+
+        # adding files invalidates the manifest
+        _touch(osp.join(root, 'sub', 'e.png'))
+        files = list_files_with_manifest(root, suffix)
+        assert files == [
+            'a.jpg', 'b.png',
+            osp.join('sub', 'c.png'),
+            osp.join('sub', 'e.png')
+        ]
+
+        # modifying files invalidates the manifest
+        _touch(osp.join(root, 'a.jpg'), b'01')
+        with patch.object(
+                file_manifest, 'scan_files',
+                wraps=file_manifest.scan_files) as scan_files:
+            assert list_files_with_manifest(root, suffix) == files
+            scan_files.assert_called_once()
+
+        # the manifest of different suffix is separated
+        txt_files = list_files_with_manifest(root, ('.txt', ))
+        assert txt_files == [osp.join('sub', 'd.txt')]
+
+
+def test_dataset_with_manifest():
+    imgs_root = osp.join(osp.dirname(__file__), '..', 'data/image')
+    with TemporaryDirectory() as tmp_dir, \
+            patch.object(file_manifest, 'MANIFEST_CACHE_DIR', tmp_dir):
+        dataset = UnconditionalImageDataset(imgs_root, pipeline=[])
+        assert os.listdir(tmp_dir)
+        ref_dataset = UnconditionalImageDataset(
+            imgs_root, pipeline=[], use_manifest=False)
+        assert len(dataset) == len(ref_dataset)
+        img_paths = [
+            dataset.get_data_info(idx)['img_path']
+            for idx in range(len(dataset))
+        ]
+        ref_img_paths = [
+            ref_dataset.get_data_info(idx)['img_path']
+            for idx in range(len(ref_dataset))
+        ]
+        assert img_paths == sorted(ref_img_paths)
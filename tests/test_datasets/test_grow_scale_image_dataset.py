@@ -1,9 +1,12 @@
 # Copyright (c) OpenMMLab. All rights reserved.
 import os.path as osp
+import pickle
+from tempfile import TemporaryDirectory
 
+import numpy as np
 import pytest
 
-from mmgen.datasets import GrowScaleImgDataset
+from mmgen.datasets import GrowScaleImgDataset, build_image_pyramid
 
 
 class TestGrowScaleImgDataset:
@@ -97,3 +100,85 @@ class TestGrowScaleImgDataset:
 
         with pytest.raises(AssertionError):
             _ = GrowScaleImgDataset(10, self.default_pipeline, 10.)
+
+    def test_pyramid(self):
+        with TemporaryDirectory() as tmp_dir:
+            with pytest.raises(FileNotFoundError):
+                GrowScaleImgDataset(
+                    pipeline=self.default_pipeline, pyramid_root=tmp_dir)
+
+            num_imgs = build_image_pyramid(self.imgs_root, tmp_dir, [32, 4, 8])
+            assert num_imgs == 6
+            # images decoded by workers are the same
+            build_image_pyramid(
+                self.imgs_root,
+                osp.join(tmp_dir, 'workers'), [32, 4, 8],
+                num_workers=2)
+            for scale in [4, 8, 32]:
+                level_file = f'level-{scale}.npy'
+                np.testing.assert_array_equal(
+                    np.load(osp.join(tmp_dir, level_file)),
+                    np.load(osp.join(tmp_dir, 'workers', level_file)))
+
+            with pytest.raises(AssertionError):
+                GrowScaleImgDataset(
+                    self.imgs_roots,
+                    self.default_pipeline,
+                    pyramid_root=tmp_dir)
+            with pytest.raises(AssertionError):
+                GrowScaleImgDataset(pipeline=self.default_pipeline)
+            with pytest.raises(AssertionError):
+                GrowScaleImgDataset(pyramid_root=tmp_dir)
+
+            dataset = GrowScaleImgDataset(
+                pipeline=[dict(type='PackGenInputs', meta_keys=[])],
+                len_per_stage=10,
+                gpu_samples_base=self.gpu_samples_base,
+                gpu_samples_per_scale={'16': 13},
+                pyramid_root=tmp_dir)
+            assert len(dataset) == 10
+            assert dataset.samples_per_gpu == 2
+            data = dataset[7]
+            assert data['inputs']['img'].shape == (3, 4, 4)
+            assert repr(dataset) == (
+                f'dataset_name: {dataset.__class__}, '
+                f'total {10} images in imgs_root: {tmp_dir}')
+            # items are concatenated to `len_per_stage`
+            img_path = dataset.get_data_info(7)['img_path']
+            assert img_path == dataset.get_data_info(1)['img_path']
+
+            # switch the level without listing files again
+            assert dataset.update_annotations(16)
+            assert not dataset.update_annotations(16)
+            assert len(dataset) == 10
+            assert dataset.samples_per_gpu == 13
+            data_info = dataset.get_data_info(7)
+            assert data_info['img_path'] == img_path
+            assert data_info['img'].shape == (32, 32, 3)
+            # images are copied out of the read-only memory map
+            assert data_info['img'].flags.writeable
+            np.testing.assert_array_equal(
+                data_info['img'],
+                dataset.get_pyramid_level(32)[dataset.data_list[7]])
+
+            # the arrays are not pickled to dataloader workers
+            dataset = pickle.loads(pickle.dumps(dataset))
+            assert dataset._pyramid_levels == dict()
+            assert dataset[0]['inputs']['img'].shape == (3, 32, 32)
+
+            # in-place transforms work on images of the pyramid
+            dataset = GrowScaleImgDataset(
+                pipeline=[
+                    dict(type='Flip', keys=['img'], flip_ratio=1),
+                    dict(type='PackGenInputs', meta_keys=[])
+                ],
+                len_per_stage=-1,
+                pyramid_root=tmp_dir)
+            level = dataset.get_pyramid_level(4)
+            for idx in range(len(dataset)):
+                img = dataset[idx]['inputs']['img']
+                target = level[idx][:, ::-1].transpose(2, 0, 1)
+                np.testing.assert_array_equal(img.numpy(), target)
+            # the memory-mapped level is left untouched
+            np.testing.assert_array_equal(
+                level, np.load(osp.join(tmp_dir, 'level-4.npy')))
@@ -0,0 +1,88 @@
+# Copyright (c) OpenMMLab. All rights reserved.
+import os.path as osp
+import pickle
+from tempfile import TemporaryDirectory
+
+import numpy as np
+import pytest
+
+from mmgen.datasets import (MemmapImageDataset, UnconditionalImageDataset,
+                            build_memmap_images)
+from mmgen.utils import register_all_modules
+
+register_all_modules()
+
+
+class TestMemmapImageDataset(object):
+
+    @classmethod
+    def setup_class(cls):
+        cls.imgs_root = osp.join(osp.dirname(__file__), '..', 'data/image')
+
+    def test_memmap_imgs_dataset(self):
+        ref_dataset = UnconditionalImageDataset(
+            self.imgs_root,
+            pipeline=[
+                dict(type='LoadImageFromFile', io_backend='disk', key='img'),
+                dict(type='Resize', scale=(32, 24), keep_ratio=False)
+            ])
+        ref_imgs = dict()
+        for idx in range(len(ref_dataset)):
+            data = ref_dataset[idx]
+            ref_imgs[osp.relpath(data['img_path'],
+                                 self.imgs_root)] = data['img']
+
+        with TemporaryDirectory() as tmp_dir:
+            with pytest.raises(FileNotFoundError):
+                MemmapImageDataset(tmp_dir, pipeline=[])
+            # images have different shapes
+            with pytest.raises(ValueError):
+                build_memmap_images(self.imgs_root, tmp_dir)
+
+            num_imgs = build_memmap_images(
+                self.imgs_root, tmp_dir, size=(32, 24))
+            assert num_imgs == 6
+            dataset = MemmapImageDataset(tmp_dir, pipeline=[])
+            assert len(dataset) == 6
+            assert dataset.images.shape == (6, 24, 32, 3)
+            for idx in range(len(dataset)):
+                data = dataset[idx]
+                assert 'gt_label' not in data
+                name = osp.relpath(data['img_path'], tmp_dir)
+                np.testing.assert_array_equal(data['img'], ref_imgs[name])
+                # copies of the memory-mapped array
+                assert data['img'].flags.writeable
+                assert not np.shares_memory(data['img'], dataset.images)
+
+            # the array is not pickled to dataloader workers
+            dataset = pickle.loads(pickle.dumps(dataset))
+            assert dataset._images is None
+            assert dataset[0]['img'].shape == (24, 32, 3)
+
+            # in-place transforms work on images of the array
+            dataset = MemmapImageDataset(
+                tmp_dir,
+                pipeline=[dict(type='Flip', keys=['img'], flip_ratio=1)])
+            for idx in range(len(dataset)):
+                data = dataset[idx]
+                name = osp.relpath(data['img_path'], tmp_dir)
+                np.testing.assert_array_equal(data['img'],
+                                              ref_imgs[name][:, ::-1])
+            # the memory-mapped array is left untouched
+            np.testing.assert_array_equal(
+                dataset.images, np.load(osp.join(tmp_dir, 'images.npy')))
+
+    def test_labels(self):
+        with TemporaryDirectory() as tmp_dir:
+            file_list = osp.join(tmp_dir, 'file_list.txt')
+            with open(file_list, 'w') as f:
+                f.write('baboon.png 3\nimg_root/baboon.png 5\n')
+            build_memmap_images(self.imgs_root, osp.join(tmp_dir, 'array'),
+                                file_list)
+            dataset = MemmapImageDataset(
+                osp.join(tmp_dir, 'array'),
+                pipeline=[dict(type='PackGenInputs', meta_keys=[])])
+            assert len(dataset) == 2
+            data = dataset[1]
+            assert data['inputs']['img'].shape == (3, 480, 500)
+            assert data['data_sample'].gt_label.label.item() == 5
@@ -0,0 +1,64 @@
+# Copyright (c) OpenMMLab. All rights reserved.
+import os.path as osp
+import pickle
+from tempfile import TemporaryDirectory
+
+import numpy as np
+import pytest
+
+from mmgen.datasets import (PackedImageDataset, UnconditionalImageDataset,
+                            pack_images)
+from mmgen.utils import register_all_modules
+
+register_all_modules()
+
+
+class TestPackedImageDataset(object):
+
+    @classmethod
+    def setup_class(cls):
+        cls.imgs_root = osp.join(osp.dirname(__file__), '..', 'data/image')
+        cls.default_pipeline = [
+            dict(type='LoadImageFromFile', io_backend='disk', key='img')
+        ]
+
+    def test_packed_imgs_dataset(self):
+        ref_dataset = UnconditionalImageDataset(
+            self.imgs_root, pipeline=self.default_pipeline)
+        ref_imgs = {
+            osp.relpath(data['img_path'], self.imgs_root): data['img']
+            for data in [ref_dataset[i] for i in range(len(ref_dataset))]
+        }
+
+        with TemporaryDirectory() as tmp_dir:
+            with pytest.raises(FileNotFoundError):
+                PackedImageDataset(tmp_dir, pipeline=self.default_pipeline)
+
+            # small shards to pack images into multiple files
+            num_imgs = pack_images(self.imgs_root, tmp_dir, shard_size=1)
+            assert num_imgs == 6
+            dataset = PackedImageDataset(
+                tmp_dir, pipeline=self.default_pipeline)
+            assert len(dataset) == 6
+            assert len(set(info['shard_path']
+                           for info in dataset.data_list)) == 6
+            for idx in range(len(dataset)):
+                data = dataset[idx]
+                assert 'img_bytes' not in data
+                name = osp.relpath(data['img_path'], tmp_dir)
+                np.testing.assert_array_equal(data['img'], ref_imgs[name])
+
+            # pickled datasets (e.g. in dataloader workers) reopen shards
+            dataset = pickle.loads(pickle.dumps(dataset))
+            np.testing.assert_array_equal(
+                dataset[0]['img'],
+                ref_imgs[osp.relpath(dataset[0]['img_path'], tmp_dir)])
+
+            pack_images(self.imgs_root, tmp_dir)
+            dataset = PackedImageDataset(
+                tmp_dir, pipeline=self.default_pipeline)
+            assert len(set(info['shard_path']
+                           for info in dataset.data_list)) == 1
+            assert repr(dataset) == (
+                f'dataset_name: {dataset.__class__}, '
+                f'total {6} images in data_root: {tmp_dir}')
@@ -0,0 +1,88 @@
+# Copyright (c) OpenMMLab. All rights reserved.
+import numpy as np
+import pytest
+import torch
+from mmengine.testing import assert_allclose
+
+from mmgen.datasets.pipelines import Crop, FixedCrop, Flip
+from mmgen.models.gans import (BatchCrop, BatchFixedCrop, BatchFlip,
+                               BatchRandomCropLongEdge, BatchResize)
+from mmgen.models.gans.batch_augments import batch_crop
+
+
+def _to_numpy(img):
+    return img.permute(1, 2, 0).numpy().copy()
+
+
+def test_batch_flip():
+    imgs = torch.randint(0, 256, (4, 3, 8, 6), dtype=torch.uint8)
+    pairs = imgs.clone()
+    with pytest.raises(ValueError):
+        BatchFlip(direction='diagonal')
+
+    for direction in ['horizontal', 'vertical']:
+        results = BatchFlip(1, direction)(dict(img=imgs))
+        assert results['img'].dtype == torch.uint8
+        for img, flipped in zip(imgs, results['img']):
+            target = Flip(['img'], 1, direction)(dict(img=_to_numpy(img)))
+            np.testing.assert_array_equal(_to_numpy(flipped), target['img'])
+    results = BatchFlip(0)(dict(img=imgs))
+    assert_allclose(results['img'], imgs)
+
+    # paired images share the same flip
+    results = BatchFlip()(dict(img_a=imgs, img_b=pairs))
+    assert_allclose(results['img_a'], results['img_b'])
+
+    with pytest.raises(AssertionError):
+        BatchFlip()(dict(img_a=imgs, img_b=imgs[:2]))
+    repr_str = 'BatchFlip(flip_ratio=0.5, direction=horizontal)'
+    assert repr(BatchFlip()) == repr_str
+
+
+def test_batch_crop():
+    imgs = torch.randint(0, 256, (4, 3, 8, 6), dtype=torch.uint8)
+    y_offsets = torch.LongTensor([0, 1, 3, 2])
+    x_offsets = torch.LongTensor([2, 0, 1, 0])
+    results = batch_crop(dict(img=imgs), y_offsets, x_offsets, 5, 4)
+    for img, y, x, cropped in zip(imgs, y_offsets, x_offsets, results['img']):
+        assert_allclose(cropped, img[:, y:y + 5, x:x + 4])
+
+    with pytest.raises(TypeError):
+        BatchCrop([4, 4])
+    results = BatchCrop((4, 4))(dict(img=imgs, pair=imgs.clone()))
+    assert results['img'].shape == (4, 3, 4, 4)
+    assert_allclose(results['img'], results['pair'])
+    results = BatchCrop((4, 10), random_crop=False)(dict(img=imgs))
+    for img, cropped in zip(imgs, results['img']):
+        target = Crop(['img'], (4, 10), random_crop=False)(
+            dict(img=_to_numpy(img)))
+        np.testing.assert_array_equal(_to_numpy(cropped), target['img'])
+
+    with pytest.raises(TypeError):
+        BatchFixedCrop((4, 4), crop_pos=[1, 1])
+    results = BatchFixedCrop((4, 4), crop_pos=(1, 3))(dict(img=imgs))
+    for img, cropped in zip(imgs, results['img']):
+        target = FixedCrop((4, 4), crop_pos=(1, 3))(dict(img=_to_numpy(img)))
+        np.testing.assert_array_equal(_to_numpy(cropped), target['img'])
+    results = BatchFixedCrop((4, 4))(dict(img=imgs))
+    assert results['img'].shape == (4, 3, 4, 4)
+
+    results = BatchRandomCropLongEdge()(dict(img=imgs))
+    assert results['img'].shape == (4, 3, 6, 6)
+    assert repr(BatchRandomCropLongEdge()) == 'BatchRandomCropLongEdge'
+
+
+def test_batch_resize():
+    imgs = torch.randint(0, 256, (4, 3, 8, 6), dtype=torch.uint8)
+    results = BatchResize((12, 4))(dict(img=imgs))
+    assert results['img'].shape == (4, 3, 4, 12)
+    assert results['img'].dtype == torch.float32
+    results = BatchResize((6, 8))(dict(img=imgs))
+    assert results['img'] is imgs
+
+    # rescale within the long edge 16 and the short edge 9
+    results = BatchResize((16, 9), keep_ratio=True)(dict(img=imgs))
+    assert results['img'].shape == (4, 3, 12, 9)
+    batch_resize = BatchResize((3, 4), interpolation='nearest')
+    results = batch_resize(dict(img=imgs.float()))
+    assert_allclose(results['img'], imgs[..., ::2, ::2].float())
@@ -104,3 +104,36 @@ class TestBaseDataPreprocessor(TestCase):
         batch_inputs, batch_labels = data_preprocessor(sampler_results)
         self.assertEqual(batch_inputs, sampler_results)
         self.assertEqual(batch_labels, [])
+
+    def test_batch_augments(self):
+        data_preprocessor = GANDataPreprocessor(
+            bgr_to_rgb=True,
+            batch_augments=[
+                dict(type='BatchFlip', flip_ratio=1),
+                dict(type='BatchCrop', crop_size=(2, 4), random_crop=False)
+            ])
+        self.assertEqual(len(data_preprocessor.batch_augments), 2)
+        img1 = torch.randint(0, 256, (3, 4, 4), dtype=torch.uint8)
+        img2 = torch.randint(0, 256, (3, 4, 4), dtype=torch.uint8)
+        data = [dict(inputs=img1), dict(inputs=img2)]
+
+        # batch augments are only applied in training
+        batch_inputs, _ = data_preprocessor(data)
+        self.assertEqual(batch_inputs.shape, (2, 3, 4, 4))
+
+        batch_inputs, _ = data_preprocessor(data, True)
+        self.assertEqual(batch_inputs.shape, (2, 3, 2, 4))
+        for img, output in zip([img1, img2], batch_inputs):
+            target = img[[2, 1, 0], 1:3].flip(2).float()
+            assert_allclose(output, (target - 127.5) / 127.5)
+
+        # paired images share the same random parameters
+        data_preprocessor = GANDataPreprocessor(
+            batch_augments=[dict(type='BatchFlip')])
+        data = [
+            dict(inputs=dict(imgA=img1, imgB=img1.clone(), mode='ema')),
+            dict(inputs=dict(imgA=img2, imgB=img2.clone(), mode='ema'))
+        ]
+        batch_inputs, _ = data_preprocessor(data, True)
+        assert_allclose(batch_inputs['imgA'], batch_inputs['imgB'])
+        self.assertEqual(batch_inputs['mode'], 'ema')
@@ -9,6 +9,9 @@ from mmgen.models.architectures.stylegan.modules import (MappingNetwork,
                                                          SynthesisInput,
                                                          SynthesisLayer,
                                                          SynthesisNetwork)
+from mmgen.models.architectures.stylegan.utils import (
+    apply_fractional_rotation, apply_fractional_translation,
+    construct_affine_bandlimit_filter, lanczos_window, rotation_matrix, sinc)
 
 
 class TestMappingNetwork:
@@ -295,3 +298,54 @@ class TestStyleGAN3Generator:
 
         res = generator(torch.randn, num_batches=1)
         assert res.shape == (1, 3, 16, 16)
+
+
+def _reference_bandlimit_filter(mat, a, amax, aflt, up):
+    taps = (torch.arange(aflt * up * 2 - 1) + 1) / up - aflt
+    taps = taps.roll(1 - aflt * up)
+    yi, xi = torch.meshgrid(taps, taps)
+    xo, yo = (torch.stack([xi, yi], dim=2) @ mat[:2, :2].t()).unbind(2)
+    fin = sinc(xi) * sinc(yi)
+    fout = sinc(xo) * sinc(yo)
+    f = torch.fft.ifftn(torch.fft.fftn(fin) * torch.fft.fftn(fout)).real
+    wi = lanczos_window(xi, a) * lanczos_window(yi, a)
+    wo = lanczos_window(xo, a) * lanczos_window(yo, a)
+    w = torch.fft.ifftn(torch.fft.fftn(wi) * torch.fft.fftn(wo)).real
+    f = f * w
+    c = (aflt - amax) * up
+    f = f.roll([aflt * up - 1] * 2, dims=[0, 1])[c:-c, c:-c]
+    f = torch.nn.functional.pad(f, [0, 1, 0, 1])
+    f = f.reshape(amax * 2, up, amax * 2, up)
+    f = f / f.sum([0, 2], keepdim=True) / (up**2)
+    return f.reshape(amax * 2 * up, amax * 2 * up)[:-1, :-1]
+
+
+class TestEquivarianceTransforms:
+
+    def test_filter_cache(self):
+        mat = rotation_matrix(0.3)
+        filt = construct_affine_bandlimit_filter(mat, a=3, amax=6, up=4)
+        ref = _reference_bandlimit_filter(mat, a=3, amax=6, aflt=64, up=4)
+        assert torch.allclose(filt, ref, atol=1e-6)
+
+        # filters only depend on the linear part of the matrix
+        mat_translate = mat.clone()
+        mat_translate[:2, 2] = 0.5
+        assert construct_affine_bandlimit_filter(
+            mat_translate, a=3, amax=6, up=4) is filt
+
+        mat = rotation_matrix(-0.3)
+        filt = construct_affine_bandlimit_filter(mat, a=3, amax=6, up=1)
+        ref = _reference_bandlimit_filter(mat, a=3, amax=6, aflt=64, up=1)
+        assert torch.allclose(filt, ref, atol=1e-6)
+
+    def test_shared_mask(self):
+        x = torch.randn(2, 3, 16, 16)
+        for z, m in [
+                apply_fractional_translation(x, 0.1, -0.05),
+                apply_fractional_rotation(x, 0.2)
+        ]:
+            assert z.shape == m.shape == x.shape
+            # the mask is the same for all samples and channels
+            assert (m == m[:1, :1]).all()
+            assert 0 < m.sum() < m.numel()
@@ -30,6 +30,16 @@ def parse_args():
         'It also allows nested list/tuple values, e.g. key="[(a,b),(c,d)]" '
         'Note that the quotation marks are necessary and that no white space '
         'is allowed.')
+    parser.add_argument(
+        '--sample-cache',
+        action='store_true',
+        help='cache the generated images of generative metrics (e.g. FID, IS '
+        'and PR with the StyleGAN style feature extractors) and reuse them '
+        'in later tests of the same checkpoint')
+    parser.add_argument(
+        '--sample-cache-dir',
+        help='the directory to save generated images. If not set, the '
+        'default cache directory of mmgen will be used')
     parser.add_argument(
         '--launcher',
         choices=['none', 'pytorch', 'slurm', 'mpi'],
@@ -66,6 +76,12 @@ def main():
 
     cfg.load_from = args.checkpoint
 
+    if args.sample_cache:
+        sample_cache = dict()
+        if args.sample_cache_dir is not None:
+            sample_cache['cache_dir'] = args.sample_cache_dir
+        cfg.test_cfg['sample_cache'] = sample_cache
+
     # build the runner from config
     runner = Runner.from_cfg(cfg)
 
@@ -0,0 +1,55 @@
+# Copyright (c) OpenMMLab. All rights reserved.
+import argparse
+import os.path as osp
+import sys
+
+# yapf: disable
+sys.path.append(osp.abspath(osp.join(__file__, '../../..')))  # isort:skip  # noqa
+
+from mmgen.datasets import build_image_pyramid  # isort:skip  # noqa
+# yapf: enable
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Build the multi-scale image pyramid for '
+        'GrowScaleImgDataset')
+    parser.add_argument('src', type=str, help='the dir containing images')
+    parser.add_argument('out', type=str, help='the dir to save the pyramid')
+    parser.add_argument(
+        '--scales',
+        type=int,
+        nargs='+',
+        default=[4, 8, 16, 32, 64, 128, 256, 512, 1024],
+        help='scales of the pyramid levels')
+    parser.add_argument(
+        '--file-list',
+        type=str,
+        default=None,
+        help='file listing the relative paths of images. If not given, all '
+        'images in the dir are used')
+    parser.add_argument(
+        '--interpolation',
+        type=str,
+        default='area',
+        help='interpolation method of resizing')
+    parser.add_argument(
+        '--channel-order',
+        choices=['bgr', 'rgb'],
+        default='bgr',
+        help='channel order of the saved images')
+    parser.add_argument(
+        '--num-workers',
+        type=int,
+        default=8,
+        help='number of processes to decode images')
+    args = parser.parse_args()
+
+    num_images = build_image_pyramid(
+        args.src,
+        args.out,
+        args.scales,
+        file_list=args.file_list,
+        interpolation=args.interpolation,
+        channel_order=args.channel_order,
+        num_workers=args.num_workers)
+    print(f'{num_images} images are saved into \'{args.out}\'.')
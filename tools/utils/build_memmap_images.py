@@ -0,0 +1,52 @@
+# Copyright (c) OpenMMLab. All rights reserved.
+import argparse
+import os.path as osp
+import sys
+
+# yapf: disable
+sys.path.append(osp.abspath(osp.join(__file__, '../../..')))  # isort:skip  # noqa
+
+from mmgen.datasets import build_memmap_images  # isort:skip  # noqa
+# yapf: enable
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Decode images into a memory-mappable uint8 array for '
+        'MemmapImageDataset')
+    parser.add_argument('src', type=str, help='the dir containing images')
+    parser.add_argument('out', type=str, help='the dir to save the array')
+    parser.add_argument(
+        '--file-list',
+        type=str,
+        default=None,
+        help='file listing the relative paths of images, each line can be '
+        'followed by a label. If not given, all images in the dir are used')
+    parser.add_argument(
+        '--size',
+        type=int,
+        nargs='+',
+        default=None,
+        help='resize images to the size (w, h) if given')
+    parser.add_argument(
+        '--interpolation',
+        type=str,
+        default='bilinear',
+        help='interpolation method of resizing')
+    parser.add_argument(
+        '--channel-order',
+        choices=['bgr', 'rgb'],
+        default='bgr',
+        help='channel order of the saved images')
+    args = parser.parse_args()
+
+    size = args.size
+    if size is not None and len(size) == 1:
+        size = (size[0], size[0])
+    num_images = build_memmap_images(
+        args.src,
+        args.out,
+        file_list=args.file_list,
+        size=size,
+        interpolation=args.interpolation,
+        channel_order=args.channel_order)
+    print(f'{num_images} images are saved into \'{args.out}\'.')
@@ -0,0 +1,99 @@
+# Copyright (c) OpenMMLab. All rights reserved.
+import argparse
+import os.path as osp
+import sys
+import time
+
+# yapf: disable
+sys.path.append(osp.abspath(osp.join(__file__, '../../..')))  # isort:skip  # noqa
+
+from mmgen.core.evaluation.cache_manager import FeatureCacheManager, parse_size  # isort:skip  # noqa
+from mmgen.utils import MMGEN_CACHE_DIR  # isort:skip  # noqa
+# yapf: enable
+
+_TIME_UNITS = dict(s=1, m=60, h=3600, d=86400, w=604800)
+
+
+def parse_duration(duration):
+    """Parse duration in seconds from str like '30m' and '7d'."""
+    if duration is None:
+        return None
+    if duration[-1] in _TIME_UNITS:
+        return float(duration[:-1]) * _TIME_UNITS[duration[-1]]
+    return float(duration)
+
+
+def format_size(size):
+    """Format size in bytes to a human readable str."""
+    for unit in ['B', 'K', 'M', 'G']:
+        if size < 1024:
+            return f'{size:.1f}{unit}'
+        size /= 1024
+    return f'{size:.1f}T'
+
+
+def list_caches(manager):
+    entries = manager.list_entries()
+    total_size = 0
+    print(f'{"LAST ACCESS":<20}{"SIZE":>10}  {"TRACKED":<9}NAME')
+    for entry in entries[::-1]:
+        last_access = time.strftime('%Y-%m-%d %H:%M:%S',
+                                    time.localtime(entry['last_access']))
+        tracked = 'yes' if entry['tracked'] else 'no'
+        print(f'{last_access:<20}{format_size(entry["size"]):>10}  '
+              f'{tracked:<9}{entry["name"]}')
+        total_size += entry['size']
+    budget = 'unlimited' if manager.max_size is None else format_size(
+        manager.max_size)
+    print(f'{len(entries)} caches, {format_size(total_size)} in total, '
+          f'budget: {budget}.')
+
+
+def prune_caches(manager, args):
+    max_size = parse_size(args.max_size)
+    older_than = parse_duration(args.older_than)
+    if max_size is None and older_than is None and not args.untracked:
+        max_size = manager.max_size
+        if max_size is None:
+            print('Nothing to prune. Please set \'--max-size\', '
+                  '\'--older-than\' or \'--untracked\'.')
+            return
+    removed = manager.prune(
+        max_size=max_size, older_than=older_than, untracked=args.untracked)
+    print(f'{len(removed)} caches are removed.')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='List and prune the feature caches of metrics')
+    parser.add_argument(
+        '--cache-dir',
+        type=str,
+        default=MMGEN_CACHE_DIR,
+        help='the directory of feature caches')
+    subparsers = parser.add_subparsers(dest='command')
+    subparsers.add_parser('list', help='list caches by last access time')
+    prune_parser = subparsers.add_parser('prune', help='remove stale caches')
+    prune_parser.add_argument(
+        '--max-size',
+        type=str,
+        default=None,
+        help=('remove least recently used caches until the total size is no '
+              'more than it, e.g. \'20G\'. If no option is set, '
+              '`MMGEN_CACHE_MAX_SIZE` will be used'))
+    prune_parser.add_argument(
+        '--older-than',
+        type=str,
+        default=None,
+        help='remove caches not accessed in the duration, e.g. \'7d\'')
+    prune_parser.add_argument(
+        '--untracked',
+        action='store_true',
+        help='remove caches not in the cache index, e.g. old pkl caches')
+    args = parser.parse_args()
+
+    manager = FeatureCacheManager(args.cache_dir)
+    if args.command == 'prune':
+        prune_caches(manager, args)
+    else:
+        list_caches(manager)
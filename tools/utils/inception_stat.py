@@ -1,25 +1,333 @@
 # Copyright (c) OpenMMLab. All rights reserved.
+"""Pre-calculate the inception statistics of real images for FID.
+
+The statistics can be calculated in one process, or in shards by multiple
+processes (or machines). Each shard saves the sufficient statistics, i.e.
+the number of features, the sum of features and the sum of outer products
+of features, of a disjoint subset of images. Then the shards are merged into
+the mean and covariance by the ``merge`` command:
+
+.. code-block:: bash
+
+    # 8 processes on one machine
+    python tools/utils/inception_stat.py --imgsdir data/ffhq \
+        --pklname ffhq.pkl --num-shards 8 --shard-dir work_dirs/ffhq_shards
+    # or shards on different machines, and merge them afterwards
+    python tools/utils/inception_stat.py --imgsdir data/ffhq \
+        --pklname ffhq.pkl --num-shards 64 --shard-ids 0 1 2 3 \
+        --shard-dir work_dirs/ffhq_shards
+    python tools/utils/inception_stat.py merge \
+        --shard-dir work_dirs/ffhq_shards --pklname ffhq.pkl
+
+The saved pickle can be used as ``inception_pkl`` of
+``FrechetInceptionDistance``.
+"""
 import argparse
+import glob
+import os
 import os.path as osp
 import pickle
 import sys
+import time
 
-import mmcv
 import numpy as np
 import torch
-import torch.nn as nn
-from mmcv import Config, print_log
+import torch.multiprocessing as mp
+from mmengine import Config, print_log
+from mmengine.data import pseudo_collate
+from torch.utils.data import DataLoader, Subset
 
 # yapf: disable
 sys.path.append(osp.abspath(osp.join(__file__, '../../..')))  # isort:skip  # noqa
 
-from mmgen.core.evaluation.metric_utils import extract_inception_features  # isort:skip  # noqa
-from mmgen.datasets import (UnconditionalImageDataset, build_dataloader,  # isort:skip  # noqa
-                            build_dataset)  # isort:skip  # noqa
-from mmgen.models.architectures import InceptionV3  # isort:skip  # noqa
+from mmgen.core.evaluation.inception_utils import load_inception  # isort:skip  # noqa
+from mmgen.datasets import UnconditionalImageDataset  # isort:skip  # noqa
+from mmgen.registry import DATASETS  # isort:skip  # noqa
+from mmgen.utils import register_all_modules  # isort:skip  # noqa
 # yapf: enable
 
-if __name__ == '__main__':
+SHARD_SUFFIX = '.shard.pkl'
+
+
+def parse_size(size):
+    """Parse image size to a tuple of (w, h)."""
+    if len(size) == 1:
+        return (size[0], size[0])
+    if len(size) == 2:
+        return tuple(size)
+    raise TypeError(f'args.size mush be int or tuple but got {size}')
+
+
+def build_dataset(args):
+    """Build the dataset of real images from ``imgsdir`` or ``data_cfg``."""
+    if args.pipeline_cfg is not None:
+        pipeline = Config.fromfile(args.pipeline_cfg)['inception_pipeline']
+    else:
+        pipeline = [
+            dict(type='LoadImageFromFile', key='img'),
+            dict(type='Resize', scale=parse_size(args.size), keep_ratio=False),
+            dict(type='PackGenInputs', keys=['img'], meta_keys=[])
+        ]
+        # insert flip aug
+        if args.flip:
+            pipeline.insert(
+                1, dict(type='Flip', keys=['img'], direction='horizontal'))
+
+    if args.imgsdir is not None:
+        return UnconditionalImageDataset(args.imgsdir, pipeline)
+    if args.data_cfg is not None:
+        # Please make sure the dataset will sample images in `BGR` order.
+        data_config = Config.fromfile(args.data_cfg)
+        dataset_config = data_config[f'{args.subset}_dataloader']['dataset']
+        return DATASETS.build(dataset_config)
+    raise RuntimeError('Please provide imgsdir or data_cfg')
+
+
+def get_sample_indices(args, num_images):
+    """Get the indices of images to calculate statistics.
+
+    The permutation is seeded, therefore all shards share the same indices
+    and each of them takes a disjoint contiguous part.
+    """
+    num_samples = num_images if args.num_samples == -1 else args.num_samples
+    if num_samples > num_images:
+        raise ValueError(f'Cannot sample {num_samples} images from a dataset '
+                         f'with {num_images} images.')
+    if args.no_shuffle:
+        return np.arange(num_samples)
+    rng = np.random.RandomState(args.seed)
+    return rng.permutation(num_images)[:num_samples]
+
+
+def get_shard_path(shard_dir, shard_id, num_shards):
+    return osp.join(shard_dir,
+                    f'{shard_id:05d}-of-{num_shards:05d}{SHARD_SUFFIX}')
+
+
+def get_device(args):
+    if args.device is not None:
+        return torch.device(args.device)
+    return torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+
+
+def build_inception(args, device):
+    """Build the inception network, the one optimized for CPU inference is
+    used on CPU."""
+    cpu_optimize = device.type == 'cpu'
+    if args.inception_style == 'stylegan':
+        inception_args = dict(
+            type='StyleGAN',
+            inception_path=args.inception_pth,
+            cpu_optimize=cpu_optimize)
+    else:
+        inception_args = dict(type='Pytorch', normalize_input=False)
+    inception, style = load_inception(inception_args, 'FID')
+    if args.inception_style == 'stylegan' and style != 'StyleGAN':
+        raise RuntimeError('Cannot load the Inception network in StyleGAN '
+                           f'from \'{args.inception_pth}\'.')
+    if not (style == 'StyleGAN' and cpu_optimize):
+        inception = inception.to(device)
+    return inception.eval()
+
+
+@torch.no_grad()
+def forward_inception(inception, inception_style, image):
+    """Extract features from uint8 images in 'bgr' order."""
+    image = image[:, [2, 1, 0]]
+    if inception_style == 'stylegan':
+        return inception(image, return_features=True)
+    image = image.float() / 127.5 - 1
+    return inception(image)[0].view(image.shape[0], -1)
+
+
+def extract_shard(args, shard_id, verbose=True):
+    """Extract the sufficient statistics of inception features of images in
+    the shard ``shard_id``."""
+    if args.threads_per_proc is not None:
+        torch.set_num_threads(args.threads_per_proc)
+    device = get_device(args)
+    register_all_modules()
+    dataset = build_dataset(args)
+    indices = get_sample_indices(args, len(dataset))
+    shard_indices = np.array_split(indices, args.num_shards)[shard_id]
+    dataloader = DataLoader(
+        Subset(dataset, shard_indices.tolist()),
+        batch_size=args.batch_size,
+        num_workers=args.num_workers,
+        collate_fn=pseudo_collate)
+    inception = build_inception(args, device)
+
+    feat_num, feat_sum, feat_outer_sum = 0, None, None
+    start = time.perf_counter()
+    for data in dataloader:
+        image = torch.stack([item['inputs']['img'] for item in data])
+        feat = forward_inception(inception, args.inception_style,
+                                 image.to(device))
+        feat = feat.cpu().double()
+        if feat_sum is None:
+            feat_sum = torch.zeros(feat.shape[1], dtype=torch.float64)
+            feat_outer_sum = torch.zeros(
+                (feat.shape[1], ) * 2, dtype=torch.float64)
+        feat_num += feat.shape[0]
+        feat_sum += feat.sum(0)
+        feat_outer_sum += feat.t() @ feat
+        if verbose:
+            print_log(
+                f'Shard {shard_id}: {feat_num}/{len(shard_indices)} images, '
+                f'{feat_num / (time.perf_counter() - start):.1f} images/s',
+                'current')
+
+    shard_state = dict(
+        shard_id=shard_id,
+        num_shards=args.num_shards,
+        total_samples=len(indices),
+        inception_style=args.inception_style,
+        feat_num=feat_num,
+        feat_sum=None if feat_sum is None else feat_sum.numpy(),
+        feat_outer_sum=None
+        if feat_outer_sum is None else feat_outer_sum.numpy())
+    if args.shard_dir is not None:
+        save_shard(args.shard_dir, shard_state)
+    return shard_state
+
+
+def save_shard(shard_dir, shard_state):
+    """Save the shard to a temporary file and then rename it, therefore
+    incomplete shards of killed workers are never merged."""
+    os.makedirs(shard_dir, exist_ok=True)
+    path = get_shard_path(shard_dir, shard_state['shard_id'],
+                          shard_state['num_shards'])
+    tmp_path = f'{path}.tmp{os.getpid()}'
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(shard_state, f)
+    os.replace(tmp_path, path)
+
+
+def run_workers(args, shard_ids):
+    """Extract shards in worker processes, at most ``args.num_procs`` workers
+    run at the same time."""
+    ctx = mp.get_context('spawn')
+    pending, running = list(shard_ids), []
+    while pending or running:
+        while pending and len(running) < args.num_procs:
+            shard_id = pending.pop(0)
+            proc = ctx.Process(
+                target=extract_shard, args=(args, shard_id, False))
+            proc.start()
+            running.append((shard_id, proc))
+        shard_id, proc = running.pop(0)
+        proc.join()
+        if proc.exitcode != 0:
+            for _, other in running:
+                other.terminate()
+            raise RuntimeError(f'Worker of shard {shard_id} exits with code '
+                               f'{proc.exitcode}.')
+        print_log(f'Shard {shard_id} is finished.', 'current')
+
+
+def merge_shards(shard_states):
+    """Merge the sufficient statistics of shards into mean and covariance."""
+    num_shards = shard_states[0]['num_shards']
+    shard_ids = sorted(state['shard_id'] for state in shard_states)
+    if shard_ids != list(range(num_shards)):
+        missing = sorted(set(range(num_shards)) - set(shard_ids))
+        raise RuntimeError(f'Expect {num_shards} shards, but got shards '
+                           f'{shard_ids}. Missing shards: {missing}.')
+    for key in ['num_shards', 'total_samples', 'inception_style']:
+        values = {state[key] for state in shard_states}
+        if len(values) > 1:
+            raise RuntimeError(
+                f'Shards are inconsistent in \'{key}\': {values}.')
+
+    shard_states = [s for s in shard_states if s['feat_num'] > 0]
+    feat_num = sum(state['feat_num'] for state in shard_states)
+    assert feat_num == shard_states[0]['total_samples'], (
+        'the number of features != num_samples')
+    if feat_num < 2:
+        raise RuntimeError('At least 2 images are required to calculate the '
+                           f'covariance, but got {feat_num}.')
+    feat_sum = sum(state['feat_sum'] for state in shard_states)
+    feat_outer_sum = sum(state['feat_outer_sum'] for state in shard_states)
+    mean = feat_sum / feat_num
+    cov = (feat_outer_sum - feat_num * np.outer(mean, mean)) / (feat_num - 1)
+    return mean, cov, feat_num
+
+
+def load_shards(shard_dir):
+    paths = sorted(glob.glob(osp.join(shard_dir, f'*{SHARD_SUFFIX}')))
+    if not paths:
+        raise RuntimeError(f'No shard is found in \'{shard_dir}\'.')
+    shard_states = []
+    for path in paths:
+        with open(path, 'rb') as f:
+            shard_states.append(pickle.load(f))
+    return shard_states
+
+
+def save_inception_pkl(args, mean, cov, num_samples, inception_style):
+    os.makedirs(args.pkl_dir, exist_ok=True)
+    with open(osp.join(args.pkl_dir, args.pklname), 'wb') as f:
+        pickle.dump(
+            {
+                'real_mean': mean,
+                'real_cov': cov,
+                'num_samples': num_samples,
+                'inception_style': inception_style,
+                'name': args.pklname
+            }, f)
+    print_log(
+        f'Save inception statistics of {num_samples} images to '
+        f'{osp.join(args.pkl_dir, args.pklname)}', 'current')
+
+
+def extract(args):
+    num_shards = args.num_shards
+    shard_ids = list(range(num_shards)) if args.shard_ids is None else sorted(
+        set(args.shard_ids))
+    assert all(0 <= idx < num_shards for idx in shard_ids), (
+        f'\'shard_ids\' should be in [0, {num_shards}), but got {shard_ids}.')
+    if num_shards > 1 and args.shard_dir is None:
+        raise RuntimeError('Please provide \'shard_dir\' to save shards.')
+
+    if num_shards == 1 and args.shard_dir is None:
+        shard_states = [extract_shard(args, 0)]
+    else:
+        if not args.overwrite:
+            finished = [
+                idx for idx in shard_ids
+                if osp.exists(get_shard_path(args.shard_dir, idx, num_shards))
+            ]
+            if finished:
+                print_log(f'Skip finished shards {finished}.', 'current')
+            shard_ids = [idx for idx in shard_ids if idx not in finished]
+        if len(shard_ids) == 1 or args.num_procs == 1:
+            for shard_id in shard_ids:
+                extract_shard(args, shard_id)
+        elif shard_ids:
+            run_workers(args, shard_ids)
+        shard_states = load_shards(args.shard_dir)
+        shard_states = [
+            state for state in shard_states
+            if state['num_shards'] == num_shards
+        ]
+        if len(shard_states) < num_shards:
+            print_log(
+                f'{len(shard_states)}/{num_shards} shards are finished, run '
+                '\'merge\' after all shards are finished.', 'current')
+            return
+
+    mean, cov, num_samples = merge_shards(shard_states)
+    save_inception_pkl(args, mean, cov, num_samples, args.inception_style)
+
+
+def merge(args):
+    shard_states = load_shards(args.shard_dir)
+    mean, cov, num_samples = merge_shards(shard_states)
+    save_inception_pkl(args, mean, cov, num_samples,
+                       shard_states[0]['inception_style'])
+
+
+def parse_args():
     parser = argparse.ArgumentParser(
         description='Pre-calculate inception data and save it in pkl file')
     parser.add_argument(
@@ -64,7 +372,9 @@ if __name__ == '__main__':
     parser.add_argument(
         '--no-shuffle',
         action='store_true',
-        help='not use shuffle in data loader')
+        help='not shuffle images before sampling')
+    parser.add_argument(
+        '--seed', type=int, default=0, help='random seed of shuffling')
     parser.add_argument(
         '--subset',
         default='test',
@@ -78,91 +388,69 @@ if __name__ == '__main__':
         '--inception-pth',
         type=str,
         default='work_dirs/cache/inception-2015-12-05.pt')
+    parser.add_argument(
+        '--device',
+        type=str,
+        default=None,
+        help='device to extract features, use cuda if available by default')
+    parser.add_argument(
+        '--num-workers',
+        type=int,
+        default=4,
+        help='number of data loading workers of each process')
+    parser.add_argument(
+        '--num-shards',
+        type=int,
+        default=1,
+        help='number of shards to split images into')
+    parser.add_argument(
+        '--shard-ids',
+        type=int,
+        nargs='+',
+        default=None,
+        help='shards to extract in this machine, all shards by default')
+    parser.add_argument(
+        '--shard-dir',
+        type=str,
+        default=None,
+        help='the dir to save shards, required if num_shards > 1')
+    parser.add_argument(
+        '--num-procs',
+        type=int,
+        default=None,
+        help='number of processes running at the same time, default to the '
+        'number of shards to extract')
+    parser.add_argument(
+        '--threads-per-proc',
+        type=int,
+        default=None,
+        help='number of intra-op threads of torch in each process')
+    parser.add_argument(
+        '--overwrite',
+        action='store_true',
+        help='extract shards again even if they are saved')
+    subparsers = parser.add_subparsers(dest='command')
+    merge_parser = subparsers.add_parser(
+        'merge', help='merge the shards into the inception pkl')
+    merge_parser.add_argument(
+        '--shard-dir', type=str, required=True, help='the dir of shards')
+    merge_parser.add_argument(
+        '--pklname', type=str, help='the name of inception pkl')
+    merge_parser.add_argument(
+        '--pkl-dir',
+        type=str,
+        default='work_dirs/inception_pkl',
+        help='path to save pkl file')
     args = parser.parse_args()
+    if args.num_procs is None:
+        args.num_procs = args.num_shards if args.shard_ids is None else len(
+            args.shard_ids)
+    return args
 
-    # dataset pipeline (only be used when args.imgsdir is not None)
-    if args.pipeline_cfg is not None:
-        pipeline = Config.fromfile(args.pipeline_cfg)['inception_pipeline']
-    elif args.imgsdir is not None:
-        if isinstance(args.size, list) and len(args.size) == 2:
-            size = args.size
-        elif isinstance(args.size, list) and len(args.size) == 1:
-            size = (args.size[0], args.size[0])
-        elif isinstance(args.size, int):
-            size = (args.size, args.size)
-        else:
-            raise TypeError(
-                f'args.size mush be int or tuple but got {args.size}')
-
-        pipeline = [
-            dict(type='LoadImageFromFile', key='real_img'),
-            dict(
-                type='Resize', keys=['real_img'], scale=size,
-                keep_ratio=False),
-            dict(
-                type='Normalize',
-                keys=['real_img'],
-                mean=[127.5] * 3,
-                std=[127.5] * 3,
-                to_rgb=True),  # default to RGB images
-            dict(type='Collect', keys=['real_img'], meta_keys=[]),
-            dict(type='ImageToTensor', keys=['real_img'])
-        ]
-        # insert flip aug
-        if args.flip:
-            pipeline.insert(
-                1,
-                dict(type='Flip', keys=['real_img'], direction='horizontal'))
-
-    # build dataloader
-    if args.imgsdir is not None:
-        dataset = UnconditionalImageDataset(args.imgsdir, pipeline)
-    elif args.data_cfg is not None:
-        # Please make sure the dataset will sample images in `RGB` order.
-        data_config = Config.fromfile(args.data_cfg)
-        subset_config = data_config.data.get(args.subset, None)
-        print_log(subset_config, 'mmgen')
-        dataset = build_dataset(subset_config)
-    else:
-        raise RuntimeError('Please provide imgsdir or data_cfg')
-
-    data_loader = build_dataloader(
-        dataset, args.batch_size, 4, dist=False, shuffle=(not args.no_shuffle))
 
-    mmcv.mkdir_or_exist(args.pkl_dir)
-
-    # build inception network
-    if args.inception_style == 'stylegan':
-        inception = torch.jit.load(args.inception_pth).eval().cuda()
-        inception = nn.DataParallel(inception)
-        print_log('Adopt Inception network in StyleGAN', 'mmgen')
-    else:
-        inception = nn.DataParallel(
-            InceptionV3([3], resize_input=True, normalize_input=False).cuda())
-        inception.eval()
-
-    if args.num_samples == -1:
-        print_log('Use all samples in subset', 'mmgen')
-        num_samples = len(dataset)
+if __name__ == '__main__':
+    args = parse_args()
+    if args.command == 'merge':
+        merge(args)
     else:
-        num_samples = args.num_samples
-
-    features = extract_inception_features(data_loader, inception, num_samples,
-                                          args.inception_style).numpy()
-
-    # sanity check for the number of features
-    assert features.shape[
-        0] == num_samples, 'the number of features != num_samples'
-    print_log(f'Extract {num_samples} features', 'mmgen')
-
-    mean = np.mean(features, 0)
-    cov = np.cov(features, rowvar=False)
-
-    with open(osp.join(args.pkl_dir, args.pklname), 'wb') as f:
-        pickle.dump(
-            {
-                'mean': mean,
-                'cov': cov,
-                'size': num_samples,
-                'name': args.pklname
-            }, f)
+        extract(args)
@@ -0,0 +1,43 @@
+# Copyright (c) OpenMMLab. All rights reserved.
+import argparse
+import os.path as osp
+import sys
+
+# yapf: disable
+sys.path.append(osp.abspath(osp.join(__file__, '../../..')))  # isort:skip  # noqa
+
+from mmgen.core.evaluation.cache_manager import parse_size  # isort:skip  # noqa
+from mmgen.datasets import pack_images  # isort:skip  # noqa
+# yapf: enable
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Pack images into large shards for PackedImageDataset')
+    parser.add_argument('src', type=str, help='the dir containing images')
+    parser.add_argument('out', type=str, help='the dir to save shards')
+    parser.add_argument(
+        '--file-list',
+        type=str,
+        default=None,
+        help='file listing the relative paths of images to pack. If not '
+        'given, all images in the dir are packed')
+    parser.add_argument(
+        '--shard-size',
+        type=str,
+        default='1G',
+        help='approximate size of each shard, e.g. \'512M\'')
+    parser.add_argument(
+        '--io-backend',
+        type=str,
+        default=None,
+        help='the storage backend of images, inferred from the dir by '
+        'default')
+    args = parser.parse_args()
+
+    num_images = pack_images(
+        args.src,
+        args.out,
+        file_list=args.file_list,
+        shard_size=parse_size(args.shard_size),
+        io_backend=args.io_backend)
+    print(f'{num_images} images are packed into \'{args.out}\'.')